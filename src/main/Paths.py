@@ -0,0 +1,26 @@
+import os
+
+
+class Paths:
+    "Data and output locations resolved relative to this package, so they do not depend on the working directory."
+
+    REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    RESOURCES = os.path.join(REPOSITORY, 'src', 'resources')
+    DATA = os.path.join(RESOURCES, 'data')  # climate_cost_<size>.csv, bada_data.csv and flights_<size>.csv of the quantum approach
+    QUANTUM_FIGURES = os.path.join(RESOURCES, 'quantum')
+    VISUALIZATION = os.path.join(RESOURCES, 'visualization')
+    MATERIAL = os.path.join(REPOSITORY, 'material')  # Original and pre-processed data of the challenge
+    RESULTS_ORTOOLS = os.path.join(REPOSITORY, 'results_ortools')
+    CLASSIC_RESULTS = os.path.join(REPOSITORY, 'classic_results.csv')  # Cost per flight and goal_greedy of the classic planner
+
+    @staticmethod
+    def material(file_name: str) -> str:
+        return os.path.join(Paths.MATERIAL, file_name)
+
+    @staticmethod
+    def in_repository(path: str) -> str:
+        "Absolute path of a path relative to the repository, ValueError if it leads out of the repository."
+        resolved = os.path.realpath(os.path.join(Paths.REPOSITORY, path))
+        if os.path.commonpath([resolved, os.path.realpath(Paths.REPOSITORY)]) != os.path.realpath(Paths.REPOSITORY):
+            raise ValueError(f'{path} is not inside the repository')
+        return resolved
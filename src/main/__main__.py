@@ -0,0 +1,175 @@
+"""Command line entry point: python -m src.main --backend <backend> [--dataset <dataset>] [--size <size>] ...
+
+Only argparse is imported at startup, every backend imports its packages (pandas, dimod, dwave, ortools, matplotlib)
+when it runs. Data paths are resolved relative to the package (see src/main/Paths.py)."""
+import argparse
+import time
+from typing import Dict, List
+
+BACKENDS = ['shortest-path', 'local-cqm', 'leap', 'cpsat', 'classic']
+DATASETS = ['quantum', 'material', 'accf']
+DEFAULT_DATASETS = {'shortest-path': 'accf', 'local-cqm': 'quantum', 'leap': 'quantum', 'cpsat': 'material', 'classic': 'accf'}
+
+
+def load_problem(dataset: str, size: str):
+    from src.main.Paths import Paths
+    from src.main.problem.CompiledProblem import CompiledProblem
+
+    if dataset == 'quantum':
+        return CompiledProblem.from_quantum_resources(Paths.DATA, size)
+    if dataset == 'material':
+        return CompiledProblem.load_or_compile(Paths.material('compiled'), CompiledProblem.from_material)
+    return CompiledProblem.from_accf()
+
+
+def flight_slice(text: str) -> slice:
+    "Python slice notation, e.g. 0:10 or :5."
+    start, _, end = text.partition(':')
+    return slice(int(start) if start else None, int(end) if end else None)
+
+
+def run_shortest_path(arguments) -> List[Dict]:
+    from src.main.problem.TimeDependentRouter import TimeDependentRouter
+
+    problem = load_problem(arguments.dataset, arguments.size)
+    router = TimeDependentRouter(problem, time_resolution_s=arguments.time_resolution)
+    rows = []
+    for row in range(len(problem.flight_numbers))[arguments.flights]:
+        start = time.perf_counter()
+        route = router.route_flight(row)
+        rows.append({
+            'flight_number': int(problem.flight_numbers[row]),
+            'cost': route.cost if route else None,
+            'voxels': len(route.voxels) if route else 0,
+            'duration_s': route.times[-1] - route.times[0] if route else None,
+            'runtime_s': time.perf_counter() - start
+        })
+    return rows
+
+
+def run_cqm(arguments) -> List[Dict]:
+    from src.main.quantum.ProblemDefinition import ProblemDefinition
+    from src.main.quantum.ProblemSolver import ProblemSolver
+
+    problem_definition = ProblemDefinition(arguments.size, compiled_problem=load_problem(arguments.dataset, arguments.size))
+    if arguments.backend == 'local-cqm':
+        from src.main.quantum.LocalCQMSampler import LocalCQMSampler
+        problem_solver = ProblemSolver(LocalCQMSampler(latency_s=(0.0, 0.0)))
+    else:
+        problem_solver = ProblemSolver()
+
+    start = time.perf_counter()
+    problem_solution = problem_solver.solve(problem_definition)
+    repaired_sample = problem_solution.repair_lowest_energy_samples(problem_definition)  # Feasible samples are kept as they are
+    runtime_s = time.perf_counter() - start
+    if repaired_sample is None:
+        return []
+
+    if arguments.plot:
+        from src.main.quantum.ProblemPlotter import ProblemPlotter
+        flight_paths = {flight_number: [problem_definition.voxels[voxel_id] for voxel_id in path] for flight_number, path in repaired_sample.flight_paths.items()}
+        ProblemPlotter(problem_definition.voxels).plot(flight_paths, arguments.size)
+
+    return [
+        {'flight_number': flight_number, 'cost': repaired_sample.flight_costs[flight_number], 'voxels': len(path), 'runtime_s': runtime_s}
+        for flight_number, path in repaired_sample.flight_paths.items()
+    ]
+
+
+def run_cpsat(arguments) -> List[Dict]:
+    from ortools.sat.python import cp_model
+    from src.main.cpsat.CPSolver import CPSolver
+    from src.main.cpsat.Scenario import SCENARIOS_BY_NAME
+
+    problem = load_problem(arguments.dataset, arguments.size)
+    scenario = SCENARIOS_BY_NAME[arguments.scenario]
+    start = time.perf_counter()
+    CP = CPSolver(scenario.nrAirplanes, scenario.size, scenario.time, scenario.start, scenario.destination)
+    CP.addConstraints()
+    if arguments.relative_error is None:
+        CP.model.Minimize(CP.problemCostFunction(problem) - CP.REWARD_WEIGHT * CP.reward())
+    else:
+        from src.main.problem.CostQuantizer import CostQuantizer
+        quantizer = CostQuantizer(arguments.relative_error)
+        CP.model.Minimize(CP.quantizedCostFunction(problem, quantizer) - CP.quantizedReward(quantizer))
+        print(f'Quantized costs: {quantizer.report()}')
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = arguments.workers
+    status = solver.Solve(CP.model)
+    runtime_s = time.perf_counter() - start
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print('No solution found.')
+        return []
+
+    if arguments.plot:
+        CP.plotTrajectory(solver)
+    positions, maneuvers, _ = CP.extractTrajectories(solver.ResponseProto())
+    costs = CP.trajectoryFloatCosts(problem, positions, maneuvers)  # Real costs, independent of the integer scaling of the objective
+    return [
+        {'airplane': airplane, 'cost': float(costs[airplane].sum()), 'destination': [int(value) for value in positions[airplane, -1]],
+         'status': solver.StatusName(status), 'runtime_s': runtime_s}
+        for airplane in range(scenario.nrAirplanes)
+    ]
+
+
+def run_classic(arguments) -> List[Dict]:
+    from src.main.Paths import Paths
+    from src.main.classic.BeamSearchPlanner import BeamSearchPlanner
+    from src.main.classic.ClassicPlanner import ClassicPlanner, load_flights
+    from src.main.classic.ClimateField import ClimateField
+    from src.main.classic.FuelTable import FuelTable
+
+    climate_field, fuel_table = ClimateField.from_csv(Paths.material('aCCF_0623_p_spec.csv')), FuelTable.from_csv(Paths.material('bada_data.csv'))
+    if arguments.planner == 'beam':
+        planner = BeamSearchPlanner(climate_field, fuel_table, beam_width=arguments.beam_width, time_budget_s=arguments.time_budget)
+        settings = {'beam_width': arguments.beam_width}
+    else:
+        planner = ClassicPlanner(climate_field, fuel_table)
+        settings = {'goal_greedy': arguments.goal_greedy}
+    rows = []
+    for flight_number, flight in load_flights(Paths.material('flights.csv'))[arguments.flights].iterrows():
+        start = time.perf_counter()
+        if arguments.planner == 'beam':
+            _, _, cost, history = planner.calculate_flight(flight_number, flight)
+        else:
+            _, _, cost, history = planner.calculate_flight(flight_number, flight, arguments.goal_greedy)
+        rows.append({'flight_number': flight_number, 'planner': arguments.planner, **settings, 'cost': cost, 'steps': max(len(history) - 1, 0),
+                     'runtime_s': time.perf_counter() - start})
+    return rows
+
+
+RUNNERS = {'shortest-path': run_shortest_path, 'local-cqm': run_cqm, 'leap': run_cqm, 'cpsat': run_cpsat, 'classic': run_classic}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='python -m src.main', description='Plan climate optimal flights with one of the approaches of this repository')
+    parser.add_argument('--backend', choices=BACKENDS, default='shortest-path',
+                        help='shortest-path: time dependent router, local-cqm: CQM with an offline random sampler (repaired), '
+                             'leap: CQM on the D-Wave hybrid solver, cpsat: OR-Tools scenario, classic: greedy or beam search planner')
+    parser.add_argument('--dataset', choices=DATASETS, default=None, help='Data set of the compiled problem, defaults depend on the backend (classic always uses accf)')
+    parser.add_argument('--size', choices=['small', 'medium', 'big'], default='small', help='Size of the quantum data set')
+    parser.add_argument('--flights', type=flight_slice, default=slice(None), help='Flights to plan (shortest-path and classic), e.g. 0:10')
+    parser.add_argument('--planner', choices=['greedy', 'beam'], default='greedy', help='greedy: ClassicPlanner, beam: BeamSearchPlanner (classic)')
+    parser.add_argument('--goal-greedy', type=float, default=0.0001, help='Weight of the target distance (classic greedy)')
+    parser.add_argument('--beam-width', type=int, default=256, help='States kept per step (classic beam)')
+    parser.add_argument('--time-budget', type=float, default=10.0, help='Seconds per flight, the best path found so far is returned (classic beam)')
+    parser.add_argument('--time-resolution', type=float, default=1800, help='Seconds per time bucket (shortest-path)')
+    parser.add_argument('--scenario', default='ortools_1_5_5_3', help='Scenario name of src/main/cpsat/Scenario.py (cpsat)')
+    parser.add_argument('--relative-error', type=float, default=None, help='Quantize the costs within this relative error (cpsat)')
+    parser.add_argument('--workers', type=int, default=5, help='CP-SAT search workers (cpsat)')
+    parser.add_argument('--plot', action='store_true', help='Plot the result (local-cqm, leap, cpsat)')
+    parser.add_argument('--output', default=None, help='CSV file for the results, printed if omitted')
+    arguments = parser.parse_args()
+    arguments.dataset = arguments.dataset or DEFAULT_DATASETS[arguments.backend]
+
+    rows = RUNNERS[arguments.backend](arguments)
+
+    from pandas import DataFrame
+    results = DataFrame(rows)
+    if arguments.output:
+        results.to_csv(arguments.output, index=False)
+    print(results.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import itertools
+import math
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.main.classic.ClassicPlanner import ClassicPlanner
+from src.main.classic.ClimateField import ClimateField, to_seconds
+from src.main.classic.FuelTable import FuelTable
+from src.main.classic.LookAheadEngine import LookAheadEngine
+
+
+class BeamSearchPlanner:
+    """Beam search over the maneuvers of the classic planner (same kinematics as ClassicPlanner.lookup_path).
+    In every step all beam states are expanded by all maneuvers, the children are ranked by their path cost plus a
+    estimate of the remaining cost (A* like) and the best beam_width are kept. Children are pruned if a cheaper state
+    already reached the same (cell, heading, flight level, climate snapshot) or if a heuristic bound of their remaining
+    cost says they cannot beat the best complete path anymore. The bound is not a lower bound when climate costs are
+    negative (a detour through negative cells can always lower the cost further), and the beam drops states anyway, so
+    the result is a good path but not necessarily the optimal one.
+    The search stops when no state is left, after MAX_STEPS steps or when the time budget is used up."""
+
+    MAX_STEPS = 500
+    CLOSE_DISTANCE_IN_METER = 80000
+
+    def __init__(self, climate_field: ClimateField, fuel_table: FuelTable, time_grid: int = 120, beam_width: int = 256,
+                 time_budget_s: float = 10.0, cell_size_m: float = 25000, heading_bins: int = 16, goal_weight: float = 1.0):
+        self.climate_field: ClimateField = climate_field
+        self.time_grid: int = time_grid
+        self.beam_width: int = beam_width  # Number of states kept per step
+        self.time_budget_s: float = time_budget_s  # Wall time per flight, the best complete path found so far is returned
+        self.cell_size_m: float = cell_size_m  # Horizontal resolution of the dominance table
+        self.heading_bins: int = heading_bins  # Angular resolution of the dominance table
+        self.goal_weight: float = goal_weight  # Weight of the remaining cost estimate when ranking states (1: A*, > 1: greedier)
+        self.engine: LookAheadEngine = LookAheadEngine(climate_field, fuel_table, time_grid, look_ahead_steps=0)
+
+        fuel_per_meter = np.minimum(np.minimum(self.engine.fuel_cruise, self.engine.fuel_climb), self.engine.fuel_descent) / 60 / self.engine.speed_m_s
+        # Estimate of the cost per horizontal meter (average climate, cheapest cruise), used to rank states
+        self.cruise_cost_per_meter: float = np.nanmean(climate_field.costs) * np.min(self.engine.fuel_cruise / 60 / self.engine.speed_m_s)
+        # Cheapest cost per horizontal meter of the direct way to the destination, the heuristic bound used to prune
+        minimum_climate_cost = np.nanmin(climate_field.costs)
+        self.pruning_cost_per_meter: float = minimum_climate_cost * (np.min(fuel_per_meter) if minimum_climate_cost >= 0 else np.max(fuel_per_meter))
+
+        self.x_bounds = (climate_field.longitudes[0] - cell_size_m, climate_field.longitudes[-1] + cell_size_m)
+        self.y_bounds = (climate_field.latitudes[0] - cell_size_m, climate_field.latitudes[-1] + cell_size_m)
+
+    def __remaining_distance(self, x: np.ndarray, y: np.ndarray, destination) -> np.ndarray:
+        return np.maximum(np.sqrt((x - destination[0]) ** 2 + (y - destination[1]) ** 2) - self.CLOSE_DISTANCE_IN_METER, 0)
+
+    def plan(self, flight) -> Optional[List[Dict]]:
+        "Returns the history of the cheapest complete path found (same format as ClassicPlanner.get_path) or None."
+        started = time.perf_counter()
+        destination = [flight['end_longitudinal'], flight['end_latitudinal'], flight['start_flightlevel']]
+        start_time = flight['start_time']
+        start_seconds = to_seconds(start_time)
+        alpha = math.radians(math.degrees(math.atan2(flight['end_latitudinal'] - flight['start_latitudinal'], flight['end_longitudinal'] - flight['start_longitudinal'])))  # As in ClassicPlanner.get_path
+
+        # Beam of the current step, one entry per state
+        x = np.array([float(flight['start_longitudinal'])])
+        y = np.array([float(flight['start_latitudinal'])])
+        z = np.array([float(flight['start_flightlevel'])])
+        alphas = np.array([alpha])
+        g = np.zeros(1)
+        layers = [{'x': x, 'y': y, 'z': z, 'alpha': alphas, 'cost': np.zeros(1), 'parent': np.array([-1]), 'maneuver': np.array([''])}]
+
+        dominance: Dict[tuple, float] = {}
+        best_cost, best_end = np.inf, None
+
+        for step in range(1, self.MAX_STEPS + 1):
+            if len(x) == 0 or time.perf_counter() - started > self.time_budget_s:
+                break
+
+            # Expand every state of the beam by every possible maneuver
+            maneuvers = [LookAheadEngine.possible_maneuvers(z_parent) for z_parent in z]
+            parent = np.repeat(np.arange(len(x)), [len(m) for m in maneuvers])
+            maneuver = np.concatenate([np.array(m) for m in maneuvers])
+            x_new, y_new, z_new, alpha_new, fuel = self.engine.advance(x[parent], y[parent], z[parent], alphas[parent], maneuver)
+            step_seconds = start_seconds + step * self.time_grid
+            step_cost = self.engine.climate_costs(x_new, y_new, z_new, np.full(len(x_new), step_seconds)) * (fuel / 60 * self.time_grid)
+            g_new = g[parent] + np.where(step_cost > 100, step_cost - 1000, step_cost)  # Counted like ClassicPlanner.step_cost
+            layers.append({'x': x_new, 'y': y_new, 'z': z_new, 'alpha': alpha_new, 'cost': step_cost, 'parent': parent, 'maneuver': maneuver})
+
+            # Complete paths end the expansion of their branch
+            reached = np.sqrt((x_new - destination[0]) ** 2 + (y_new - destination[1]) ** 2 + (z_new - destination[2]) ** 2) < self.CLOSE_DISTANCE_IN_METER
+            if reached.any():
+                index = np.flatnonzero(reached)[np.argmin(g_new[reached])]
+                if g_new[index] < best_cost:
+                    best_cost, best_end = g_new[index], (step, index)
+
+            remaining = self.__remaining_distance(x_new, y_new, destination)
+            keep = ~reached
+            keep &= (self.x_bounds[0] <= x_new) & (x_new <= self.x_bounds[1]) & (self.y_bounds[0] <= y_new) & (y_new <= self.y_bounds[1])
+            keep &= g_new + remaining * self.pruning_cost_per_meter < best_cost  # Heuristically cannot improve the best complete path
+
+            # Dominance: only the cheapest state per (cell, heading, flight level, climate snapshot) survives, a state
+            # reached later may see other climate costs than a cheaper one reached in an earlier snapshot
+            time_index = int(self.climate_field.time_index(step_seconds))
+            keys = list(zip(
+                np.floor(x_new / self.cell_size_m).astype(np.int64).tolist(),
+                np.floor(y_new / self.cell_size_m).astype(np.int64).tolist(),
+                (np.floor(alpha_new / (2 * np.pi) * self.heading_bins).astype(np.int64) % self.heading_bins).tolist(),
+                self.climate_field.flight_level_index(z_new).tolist(),
+                itertools.repeat(time_index)
+            ))
+            for index in np.argsort(g_new, kind='stable'):
+                if not keep[index]:
+                    continue
+                if g_new[index] >= dominance.get(keys[index], np.inf):
+                    keep[index] = False
+                else:
+                    dominance[keys[index]] = g_new[index]
+
+            candidates = np.flatnonzero(keep)
+            rank = g_new[candidates] + self.goal_weight * remaining[candidates] * self.cruise_cost_per_meter
+            beam = candidates[np.argsort(rank, kind='stable')[:self.beam_width]]
+            layers[-1]['beam'] = beam  # The parents of the next layer are positions in the beam
+            x, y, z, alphas, g = x_new[beam], y_new[beam], z_new[beam], alpha_new[beam], g_new[beam]
+
+        if best_end is None:
+            return None
+
+        return self.__history(layers, best_end, start_time)
+
+    def __history(self, layers: List[Dict], end, start_time) -> List[Dict]:
+        step, index = end
+        states = []
+        while step > 0:
+            layer = layers[step]
+            states.append((step, layer, index))
+            parent = layer['parent'][index]
+            step -= 1
+            index = layers[step]['beam'][parent] if step > 0 else parent
+        start = layers[0]
+        history = [{
+            'coordinates': [float(start['x'][0]), float(start['y'][0]), float(start['z'][0])],
+            'time': start_time,
+            'cost': 0,
+            'alpha': float(start['alpha'][0]),
+            'path_cost': 0
+        }]
+        for step, layer, index in reversed(states):
+            history.append({
+                'coordinates': [float(layer['x'][index]), float(layer['y'][index]), float(layer['z'][index])],
+                'time': start_time + timedelta(seconds=step * self.time_grid),
+                'cost': float(layer['cost'][index]),
+                'alpha': float(layer['alpha'][index]),
+                'direction': str(layer['maneuver'][index]),
+                'path_cost': history[-1]['path_cost'] + ClassicPlanner.step_cost(float(layer['cost'][index]))
+            })
+        return history
+
+    def calculate_flight(self, flight_number: int, flight) -> List:
+        "Plans one flight and returns [flight_number, beam_width, cost, history], the cost is 0 if no path was found."
+        history = self.plan(flight)
+        if history is None:
+            print("NO RESULT")
+            return [flight_number, self.beam_width, 0, []]
+        return [flight_number, self.beam_width, history[-1]['path_cost'], history]
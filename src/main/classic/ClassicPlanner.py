@@ -0,0 +1,333 @@
+import math
+import warnings
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.main.classic.ClimateField import ClimateField
+from src.main.classic.FuelTable import FuelTable
+from src.main.classic.LookAheadEngine import LookAheadEngine
+from src.main.classic.PlannerProfile import PlannerProfile
+from src.main.classic.RolloutCache import RolloutCache
+
+
+def load_flights(path: str) -> DataFrame:
+    "Reads the flights (e.g. material/flights.csv) with coordinates converted to meter."
+    flights = pd.read_csv(path, delimiter=';')
+    flights['start_time'] = pd.to_datetime('2018-06-23 ' + flights['start_time'])
+    flights['start_latitudinal'] = flights['start_latitudinal'] * ClimateField.METER_PER_DEGREE_LATITUDE
+    flights['end_latitudinal'] = flights['end_latitudinal'] * ClimateField.METER_PER_DEGREE_LATITUDE
+    flights['start_longitudinal'] = flights['start_longitudinal'] * ClimateField.METER_PER_DEGREE_LONGITUDE
+    flights['end_longitudinal'] = flights['end_longitudinal'] * ClimateField.METER_PER_DEGREE_LONGITUDE
+    return flights
+
+
+def flights_from_compiled_problem(problem) -> DataFrame:
+    "Flights of a CompiledProblem in the format of load_flights."
+    return DataFrame({
+        'flight_number': problem.flight_numbers,
+        'start_time': pd.to_datetime(np.asarray(problem.flight_start_times) * 1e6, unit='us'),
+        'start_flightlevel': problem.flight_start_flight_levels,
+        'start_longitudinal': problem.flight_start_longitudes * ClimateField.METER_PER_DEGREE_LONGITUDE,
+        'start_latitudinal': problem.flight_start_latitudes * ClimateField.METER_PER_DEGREE_LATITUDE,
+        'end_longitudinal': problem.flight_end_longitudes * ClimateField.METER_PER_DEGREE_LONGITUDE,
+        'end_latitudinal': problem.flight_end_latitudes * ClimateField.METER_PER_DEGREE_LATITUDE,
+    })
+
+
+class ClassicPlanner:
+    """Greedy planner: in every step the maneuver with the lowest climate cost (looking ahead a straight flight of
+    look_ahead_steps steps) plus the weighted distance to the destination is chosen.
+
+    Opt-in extensions (the defaults reproduce the original planner):
+    - progress_window: if the distance to the destination did not improve within this many steps, goal_greedy is
+      multiplied by replan_factor (at most MAX_REPLANS times) or, without replan_factor, the flight is aborted.
+    - adaptive_time_step: steps are doubled up to max_time_grid when far from the destination in a uniform climate
+      (local variation below the uniform_quantile of the field) and set to min_time_grid near the destination.
+      Steps are capped so that a turn never exceeds 90°. The look ahead covers the same time for every step length.
+    - profile: counts steps, rollouts and climate lookups and samples the time of the climate lookups, the kinematics
+      and the scoring of the options (see PlannerProfile)."""
+
+    MAX_STEPS = 500
+    CLOSE_DISTANCE_IN_METER = 80000
+    MAX_REPLANS = 3
+    NEAR_GOAL_STEPS = 5  # Below this many steps of time_grid to the destination, min_time_grid is used
+    FAR_GOAL_STEPS = 20  # A step length is only used if the destination is more than this many such steps away
+
+    def __init__(self, climate_field: ClimateField, fuel_table: FuelTable, time_grid: int = 120, look_ahead_steps: int = 20,
+                 progress_window: Optional[int] = None, replan_factor: Optional[float] = None, adaptive_time_step: bool = False,
+                 min_time_grid: Optional[int] = None, max_time_grid: Optional[int] = None, uniform_quantile: float = 0.5,
+                 profile: Optional[PlannerProfile] = None):
+        self.climate_field: ClimateField = climate_field
+        self.fuel_table: FuelTable = fuel_table
+        self.time_grid: int = time_grid  # How long a single step is in seconds
+        self.look_ahead_steps: int = look_ahead_steps  # Number of straight steps following each maneuver in the look ahead
+        self.profile: Optional[PlannerProfile] = profile  # Shared with the look ahead engines
+        self.look_ahead_engine: LookAheadEngine = LookAheadEngine(climate_field, fuel_table, time_grid, look_ahead_steps, profile)
+        self.__look_ahead_engines: Dict[int, LookAheadEngine] = {time_grid: self.look_ahead_engine}  # One engine per step length
+
+        self.progress_window: Optional[int] = progress_window  # Steps without getting closer to the destination until re-planning or aborting
+        self.replan_factor: Optional[float] = replan_factor  # Factor applied to goal_greedy when re-planning
+        self.adaptive_time_step: bool = adaptive_time_step
+        self.min_time_grid: int = min_time_grid or time_grid // 2
+        self.max_time_grid: int = max_time_grid or time_grid * 4
+        self.uniform_quantile: float = uniform_quantile
+        if adaptive_time_step:
+            self.climate_variation: np.ndarray = climate_field.local_variation()
+            self.uniform_threshold: float = np.quantile(self.climate_variation, uniform_quantile)
+
+    def options(self) -> Dict:
+        "Keyword arguments that create a planner with the same settings, e.g. on another climate field (without the profile, which belongs to this planner)."
+        return {
+            'time_grid': self.time_grid,
+            'look_ahead_steps': self.look_ahead_steps,
+            'progress_window': self.progress_window,
+            'replan_factor': self.replan_factor,
+            'adaptive_time_step': self.adaptive_time_step,
+            'min_time_grid': self.min_time_grid,
+            'max_time_grid': self.max_time_grid,
+            'uniform_quantile': self.uniform_quantile
+        }
+
+    @staticmethod
+    def get_distance(p1, p2):
+        return np.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2 + (p1[2]-p2[2])**2)
+
+    def is_close(self, p1, p2):
+        return self.get_distance(p1, p2) < self.CLOSE_DISTANCE_IN_METER
+
+    def lookup_climate(self, x, y, z, t):
+        if self.profile is None:
+            return self.climate_field.lookup(x, y, z, t)
+        self.profile.count('lookups')
+        start = self.profile.start('climate_lookup')
+        cost = self.climate_field.lookup(x, y, z, t)
+        self.profile.stop('climate_lookup', start)
+        return cost
+
+    @staticmethod
+    def turn_radius(v):
+        return v**2 / (9.81 * np.tan(2 / 180 * np.pi))
+
+    @staticmethod
+    def rotate(origin, point, angle):
+        ox, oy = origin
+        px, py = point
+
+        qx = ox + math.cos(angle) * (px - ox) - math.sin(angle) * (py - oy)
+        qy = oy + math.sin(angle) * (px - ox) + math.cos(angle) * (py - oy)
+        return qx, qy
+
+    def point_on_circle(self, x, y, v, direction, time_grid: Optional[int] = None):
+        r = self.turn_radius(v)
+        [a, b] = [x, y + (-1 if direction == 'right' else 1) * r]
+        d = v * (time_grid or self.time_grid)
+        t = d / r
+
+        if t > np.pi / 2:
+            warnings.warn('The airplane will make more than a 90° turn')
+
+        return [
+            a + r * np.sin(t),
+            b - r * np.cos(t) * (-1 if direction == 'right' else 1),
+            t
+        ]
+
+    def lookup_path(self, x, y, z, t, alpha, path, time_grid: Optional[int] = None) -> Dict:
+        """Applies one maneuver (straight, left, right, up or down) for one time step and returns the resulting state and its cost.
+        The step is time_grid seconds long, self.time_grid if None."""
+        time_grid = time_grid or self.time_grid
+        row = self.fuel_table[self.climate_field.closest_flight_level(z)]
+        v = row['TAS-MS']
+
+        if path == 'up':
+            z_change = row['ROC [ft/min]'] / 60 * time_grid
+            z_new = z + z_change / 100
+            distance = time_grid * v
+            x_new = x + np.sqrt(distance ** 2 - z_change ** 2)
+            fuel = row['fuel2']
+            y_new = y
+            new_alpha = alpha
+        elif path == 'down':
+            z_change = row['ROD [ft/min]'] / 60 * time_grid
+            z_new = z - z_change / 100
+            distance = time_grid * v
+            x_new = x + np.sqrt(distance ** 2 - z_change ** 2)
+            fuel = row['fuel3']
+            y_new = y
+            new_alpha = alpha
+        elif path == 'straight':
+            z_new = z
+            fuel = row['fuel1']
+            x_new = x + time_grid * v
+            y_new = y
+            new_alpha = alpha
+        elif path == 'left':
+            [x_new, y_new, delta_alpha] = self.point_on_circle(x, y, v, 'left', time_grid)
+            z_new = z
+            fuel = row['fuel1']
+            new_alpha = alpha - delta_alpha
+        elif path == 'right':
+            [x_new, y_new, delta_alpha] = self.point_on_circle(x, y, v, 'right', time_grid)
+            z_new = z
+            fuel = row['fuel1']
+            new_alpha = alpha + delta_alpha
+
+        new_alpha = new_alpha % (2 * np.pi)
+
+        # rotate new coordinates
+        [x_new, y_new] = self.rotate([x, y], [x_new, y_new], new_alpha)
+
+        # return aggregated data
+        return {
+            'coordinates': [x_new, y_new, z_new],
+            'cost': self.lookup_climate(x_new, y_new, z_new, t + timedelta(seconds=time_grid)) * (fuel / 60 * time_grid),
+            'time': t + timedelta(seconds=time_grid),
+            'alpha': new_alpha
+        }
+
+    def look_ahead_engine_for(self, time_grid: int) -> LookAheadEngine:
+        "Engine for the given step length, its look ahead covers the same time as look_ahead_steps steps of time_grid."
+        if time_grid not in self.__look_ahead_engines:
+            look_ahead_steps = max(1, round(self.look_ahead_steps * self.time_grid / time_grid))
+            self.__look_ahead_engines[time_grid] = LookAheadEngine(self.climate_field, self.fuel_table, time_grid, look_ahead_steps, self.profile)
+        return self.__look_ahead_engines[time_grid]
+
+    @property
+    def climate_lookups(self) -> int:
+        return sum(engine.climate_lookups for engine in self.__look_ahead_engines.values())
+
+    def max_turn_time_grid(self, v) -> int:
+        "Longest step (in seconds) for which a turn does not exceed 90°."
+        return int(np.pi / 2 * self.turn_radius(v) / v)
+
+    def choose_time_grid(self, x, y, z, t, target_distance) -> int:
+        "Step length for the next decision (time_grid unless adaptive_time_step is set)."
+        if not self.adaptive_time_step:
+            return self.time_grid
+
+        v = self.fuel_table[self.climate_field.closest_flight_level(z)][FuelTable.TAS_M_S_KEY]
+        if target_distance < self.NEAR_GOAL_STEPS * v * self.time_grid:
+            return min(self.min_time_grid, self.max_turn_time_grid(v))
+
+        time_grid = self.time_grid
+        cell = (self.climate_field.longitude_index(x), self.climate_field.latitude_index(y),
+                self.climate_field.flight_level_index(z), self.climate_field.time_index(t))
+        if self.climate_variation[cell] <= self.uniform_threshold:
+            while time_grid * 2 <= self.max_time_grid and target_distance > self.FAR_GOAL_STEPS * v * time_grid * 2:
+                time_grid *= 2
+        return min(time_grid, self.max_turn_time_grid(v))
+
+    def look_ahead(self, x, y, z, t, alpha, rollout_cache: RolloutCache = None) -> Dict:
+        "Cost of each maneuver followed by straight flight for look_ahead_steps steps (stored in 'total_path_cost')."
+        return self.look_ahead_engine.look_ahead(x, y, z, t, alpha, rollout_cache)
+
+    @staticmethod
+    def step_cost(cost: float) -> float:
+        "Cost of a step as counted in the total cost of a path."
+        if cost > 100:
+            cost = cost - 1000
+        return cost
+
+    def get_cost(self, history: List[Dict]) -> float:
+        "Replays the path on this planner's climate field, every step with its own length (paths of adaptive_time_step vary)."
+        total_cost = 0
+        for i, h in enumerate(history):
+            if i == len(history) - 1:
+                continue
+            [x, y, z] = h['coordinates']
+            t = h['time']
+            a = h['alpha']
+            direction = history[i+1]['direction']
+            time_grid = round((history[i+1]['time'] - t).total_seconds())
+            result = self.lookup_path(x, y, z, t, a, direction, time_grid)
+            total_cost = total_cost + self.step_cost(result['cost'])
+        return total_cost
+
+    def get_path(self, flight, goal_greedy=0.0001) -> List[Dict]:
+        """Plans a flight step by step. Returns the history of states, which is cut off after MAX_STEPS steps (NO RESULT)
+        or when no progress is made (NO PROGRESS, only with progress_window).
+        Each state holds the accumulated cost of the path up to it in 'path_cost' (equal to get_cost of the history so far)."""
+        x = flight['start_longitudinal']
+        y = flight['start_latitudinal']
+        z = flight['start_flightlevel']
+        t = flight['start_time']
+        alpha = math.radians(math.degrees(math.atan2(flight['end_latitudinal']-y, flight['end_longitudinal']-x)))
+        destination = [flight['end_longitudinal'], flight['end_latitudinal'], flight['start_flightlevel']]
+        history = [{
+            'coordinates': [x, y, z],
+            'time': t,
+            'cost': 0,
+            'alpha': alpha,
+            'path_cost': 0
+        }]
+        rollout_caches: Dict[int, RolloutCache] = {}  # One per step length, a cached rollout is only valid for the engine that evaluated it
+        target_distances = []  # Distance to the destination per state, only tracked with progress_window
+        replans = 0
+        last_replan = 0
+
+        total_distance = self.get_distance(
+            [flight['start_longitudinal'], flight['start_latitudinal'], flight['start_flightlevel']],
+            destination
+        )
+
+        while True:
+            # Only used to weight the target distance, the look ahead always uses look_ahead_steps
+            target_distance = self.get_distance([x, y, z], destination)
+            step_max = round((target_distance / total_distance) * 20) + 1
+            time_grid = self.choose_time_grid(x, y, z, t, target_distance)
+            rollout_cache = rollout_caches.setdefault(time_grid, RolloutCache())
+            options = self.look_ahead_engine_for(time_grid).look_ahead(x, y, z, t, alpha, rollout_cache)
+            scoring_start = self.profile.start('scoring') if self.profile is not None else None
+            for k in options.keys():
+                options[k]['target_distance'] = self.get_distance(options[k]['coordinates'], destination)
+
+                additional_weight = step_max * 10
+                [x_new, y_new, _] = options[k]['coordinates']
+
+                if -2550000.0 <= x_new <= 2550000.0 and 3774000.0 <= y_new <= 6660000.0:
+                    additional_weight = 1
+
+                if step_max < 10:
+                    additional_weight = 1
+
+                options[k]['total_cost'] = options[k]['total_path_cost'] + options[k]['target_distance'] * goal_greedy * additional_weight
+                options[k]['direction'] = k
+
+            next_step = min(options.values(), key=lambda x: x['total_cost'])
+            if self.profile is not None:
+                self.profile.stop('scoring', scoring_start)
+                self.profile.count('steps')
+            [x, y, z] = next_step['coordinates']
+            alpha = next_step['alpha']
+            t = next_step['time']
+            next_step['path_cost'] = history[-1]['path_cost'] + self.step_cost(next_step['cost'])
+            history.append(next_step)
+            if len(history) > self.MAX_STEPS:
+                print("NO RESULT")
+                return history
+            if self.is_close(history[-1]['coordinates'], destination):
+                return history
+
+            if self.progress_window is not None:
+                target_distances.append(next_step['target_distance'])
+                since = len(target_distances) - last_replan
+                if since > self.progress_window and min(target_distances[-self.progress_window:]) >= min(target_distances[last_replan:-self.progress_window]):
+                    if self.replan_factor is None or replans == self.MAX_REPLANS:
+                        print("NO PROGRESS")
+                        return history
+                    goal_greedy = goal_greedy * self.replan_factor  # Re-plan from here with more weight on the destination
+                    replans += 1
+                    last_replan = len(target_distances)
+
+    def calculate_flight(self, flight_number: int, flight, goal_greedy: float) -> List:
+        "Plans one flight and returns [flight_number, goal_greedy, cost, history], the cost is 0 if no path was found."
+        history = self.get_path(flight, goal_greedy)
+        cost = history[-1]['path_cost']
+        destination = [flight['end_longitudinal'], flight['end_latitudinal'], flight['start_flightlevel']]
+        if len(history) == self.MAX_STEPS + 1 or not self.is_close(history[-1]['coordinates'], destination):
+            cost = 0
+        return [flight_number, goal_greedy, cost, history]
@@ -0,0 +1,155 @@
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(time) -> Union[float, np.ndarray]:
+    "Converts datetime, pandas Timestamp or datetime64 (scalars or arrays) to seconds since epoch."
+    if isinstance(time, datetime):
+        return (time - EPOCH).total_seconds()  # Scalar fast path (pandas Timestamp is a datetime as well)
+    seconds = np.asarray(time, dtype='datetime64[us]').astype(np.int64) / 1e6
+    return seconds if seconds.ndim else float(seconds)
+
+
+class ClimateField:
+    METER_PER_DEGREE_LATITUDE: int = 111000
+    METER_PER_DEGREE_LONGITUDE: int = 85000
+
+    LONGITUDE_KEY = 'LONGITUDE'
+    LATITUDE_KEY = 'LATITUDE'
+    FLIGHT_LEVEL_KEY = 'FL'
+    TIME_KEY = 'TIME'
+    MERGED_KEY = 'MERGED'
+    ARRAYS = ['longitudes', 'latitudes', 'flight_levels', 'times', 'costs']  # Constructor arguments stored by save()
+
+    def __init__(self, longitudes: np.ndarray, latitudes: np.ndarray, flight_levels: np.ndarray, times: np.ndarray, costs: np.ndarray):
+        self.longitudes: np.ndarray = np.asarray(longitudes, dtype=np.float64)  # Sorted longitudes of the grid in meter
+        self.latitudes: np.ndarray = np.asarray(latitudes, dtype=np.float64)  # Sorted latitudes of the grid in meter
+        self.flight_levels: np.ndarray = np.asarray(flight_levels, dtype=np.int64)  # Sorted flight levels of the grid
+        self.times: np.ndarray = np.asarray(times, dtype=np.float64)  # Sorted snapshot times of the grid in seconds since epoch
+        self.costs: np.ndarray = np.asarray(costs)  # Dense climate cost (MERGED) of shape (longitude, latitude, flight level, time)
+        self.__longitudes_list = self.longitudes.tolist()  # Python lists are faster than NumPy for scalar lookups with bisect
+        self.__latitudes_list = self.latitudes.tolist()
+        self.__flight_levels_list = self.flight_levels.tolist()
+        self.__times_list = self.times.tolist()
+        self.__horizontal_slices = None  # Created by horizontal_slices() on first use
+
+    @classmethod
+    def from_data_frame(cls, df: DataFrame) -> 'ClimateField':
+        "Builds the dense field from a data frame with LONGITUDE and LATITUDE in meter, FL, TIME and MERGED columns."
+        longitudes = np.sort(df[cls.LONGITUDE_KEY].unique())
+        latitudes = np.sort(df[cls.LATITUDE_KEY].unique())
+        flight_levels = np.sort(df[cls.FLIGHT_LEVEL_KEY].unique())
+        times = to_seconds(pd.to_datetime(df[cls.TIME_KEY]).to_numpy())
+        unique_times = np.unique(times)
+
+        costs = np.full((len(longitudes), len(latitudes), len(flight_levels), len(unique_times)), np.nan)
+        costs[
+            np.searchsorted(longitudes, df[cls.LONGITUDE_KEY].to_numpy()),
+            np.searchsorted(latitudes, df[cls.LATITUDE_KEY].to_numpy()),
+            np.searchsorted(flight_levels, df[cls.FLIGHT_LEVEL_KEY].to_numpy()),
+            np.searchsorted(unique_times, times)
+        ] = df[cls.MERGED_KEY].to_numpy()  # Each row of the data frame fills exactly one cell
+
+        return cls(longitudes, latitudes, flight_levels, unique_times, costs)
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'ClimateField':
+        "Reads the climate data (e.g. material/aCCF_0623_p_spec.csv) with LONGITUDE and LATITUDE in degree."
+        df = pd.read_csv(path)
+        df = df[df['Unnamed: 0'] % 2 == 0]  # Every row is contained twice
+        df[cls.LATITUDE_KEY] = df[cls.LATITUDE_KEY] * cls.METER_PER_DEGREE_LATITUDE
+        df[cls.LONGITUDE_KEY] = df[cls.LONGITUDE_KEY] * cls.METER_PER_DEGREE_LONGITUDE
+        return cls.from_data_frame(df)
+
+    @classmethod
+    def from_compiled_problem(cls, problem) -> 'ClimateField':
+        "Builds the field from a CompiledProblem (axes converted from degree to meter)."
+        return cls(problem.longitudes * cls.METER_PER_DEGREE_LONGITUDE, problem.latitudes * cls.METER_PER_DEGREE_LATITUDE,
+                   problem.flight_levels, problem.times, problem.costs)
+
+    def save(self, directory: str) -> None:
+        "Stores the axes and the cost array as .npy files, so that other processes can memory map them with load()."
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, name + '.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r') -> 'ClimateField':
+        "Loads a field stored with save(). The cost array is memory mapped (read only) and shared by all processes using it."
+        return cls(*[np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode) for name in cls.ARRAYS])
+
+    @staticmethod
+    def nearest_index(axis: np.ndarray, axis_list: list, target) -> Union[int, np.ndarray]:
+        """Index of the closest value on a sorted axis. On a tie the lower value is chosen,
+        like min(axis, key=lambda x: abs(x - target)) does for an ascending axis."""
+        if len(axis) == 1:  # A single snapshot or flight level
+            return 0 if np.ndim(target) == 0 else np.zeros(np.shape(target), dtype=np.int64)
+        if np.ndim(target) == 0:
+            values = axis_list
+            upper = min(max(bisect_left(values, target), 1), len(values) - 1)
+            return upper - 1 if abs(values[upper - 1] - target) <= abs(values[upper] - target) else upper
+
+        target = np.asarray(target, dtype=np.float64)
+        upper = np.searchsorted(axis[1:-1], target) + 1  # Between 1 and len(axis) - 1, so that lower and upper are valid
+        lower = upper - 1
+        return np.where(np.abs(axis[lower] - target) <= np.abs(axis[upper] - target), lower, upper)
+
+    def longitude_index(self, x):
+        return self.nearest_index(self.longitudes, self.__longitudes_list, x)
+
+    def latitude_index(self, y):
+        return self.nearest_index(self.latitudes, self.__latitudes_list, y)
+
+    def flight_level_index(self, z):
+        return self.nearest_index(self.flight_levels, self.__flight_levels_list, z)
+
+    def time_index(self, t):
+        "t can be given as datetime (scalar or array) or in seconds since epoch."
+        if isinstance(t, datetime) or not np.issubdtype(np.asarray(t).dtype, np.number):
+            t = to_seconds(t)
+        return self.nearest_index(self.times, self.__times_list, t)
+
+    def closest_flight_level(self, z):
+        return self.flight_levels[self.flight_level_index(z)]
+
+    def closest_time(self, t) -> datetime:
+        return EPOCH + timedelta(seconds=self.times[self.time_index(t)])
+
+    def local_variation(self) -> np.ndarray:
+        "Largest absolute cost difference of each cell to its horizontal neighbours, same shape as costs."
+        variation = np.zeros_like(self.costs)
+        for axis in [0, 1]:
+            difference = np.abs(np.diff(self.costs, axis=axis))
+            lower = [slice(None)] * self.costs.ndim
+            upper = [slice(None)] * self.costs.ndim
+            lower[axis] = slice(None, -1)
+            upper[axis] = slice(1, None)
+            variation[tuple(lower)] = np.maximum(variation[tuple(lower)], difference)
+            variation[tuple(upper)] = np.maximum(variation[tuple(upper)], difference)
+        return variation
+
+    def horizontal_slices(self) -> np.ndarray:
+        "Costs of shape (flight level, time, latitude, longitude): one image per (flight level, time), computed once."
+        if self.__horizontal_slices is None:
+            self.__horizontal_slices = np.ascontiguousarray(np.transpose(self.costs, (2, 3, 1, 0)))
+        return self.__horizontal_slices
+
+    def extent(self):
+        "Borders of the grid in meter as (left, right, bottom, top) for imshow, half a cell beyond the outermost points."
+        longitude_step = (self.longitudes[-1] - self.longitudes[0]) / max(len(self.longitudes) - 1, 1)
+        latitude_step = (self.latitudes[-1] - self.latitudes[0]) / max(len(self.latitudes) - 1, 1)
+        return [self.longitudes[0] - longitude_step / 2, self.longitudes[-1] + longitude_step / 2,
+                self.latitudes[0] - latitude_step / 2, self.latitudes[-1] + latitude_step / 2]
+
+    def lookup(self, x, y, z, t):
+        "Climate cost of the grid cell closest to (x, y, z, t). Accepts scalars or arrays of equal shape."
+        return self.costs[self.longitude_index(x), self.latitude_index(y), self.flight_level_index(z), self.time_index(t)]
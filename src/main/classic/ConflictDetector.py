@@ -0,0 +1,144 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+from src.main.classic.ClassicPlanner import ClassicPlanner
+from src.main.classic.ClimateField import ClimateField, to_seconds
+
+
+class SeparationLoss(NamedTuple):
+    flight_a: int
+    flight_b: int  # flight_a < flight_b
+    start_time: float  # First and last sample time of the loss in seconds since epoch
+    end_time: float
+    horizontal_distance: float  # Smallest horizontal distance in meter during the loss
+    vertical_distance: float  # Vertical distance in flight levels at that time
+
+
+class ConflictDetector:
+    """Finds pairs of planned flights that come closer than the separation minima at the same time.
+    The paths are sampled every sample_interval_s seconds (on the same absolute times for all flights) and the samples are
+    put into a hash grid with cells of the size of the separation minima, so only samples in the same or a neighbouring
+    cell at the same time are compared. The work grows with the number of samples instead of the number of flight pairs."""
+
+    def __init__(self, horizontal_separation_m: float = 9260, vertical_separation_fl: float = 10, sample_interval_s: float = 20):
+        self.horizontal_separation_m: float = horizontal_separation_m  # 5 NM
+        self.vertical_separation_fl: float = vertical_separation_fl  # 1000 ft
+        self.sample_interval_s: float = sample_interval_s  # Should be short enough that a plane moves less than the horizontal separation
+
+    def samples(self, history: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        "Linear interpolation of a path (history of ClassicPlanner.get_path) at multiples of sample_interval_s."
+        times = np.array([to_seconds(step['time']) for step in history])
+        coordinates = np.array([step['coordinates'] for step in history], dtype=np.float64)
+        slots = np.arange(math.ceil(times[0] / self.sample_interval_s), math.floor(times[-1] / self.sample_interval_s) + 1)
+        ts = slots * self.sample_interval_s
+        return slots, np.interp(ts, times, coordinates[:, 0]), np.interp(ts, times, coordinates[:, 1]), np.interp(ts, times, coordinates[:, 2])
+
+    def detect(self, histories: Dict[int, List[Dict]]) -> List[SeparationLoss]:
+        "All separation losses between the given paths (flight number to history), one per pair and consecutive samples."
+        flight_numbers, slots, xs, ys, zs = [], [], [], [], []
+        for flight_number, history in histories.items():
+            if len(history) < 2:
+                continue
+            flight_slots, x, y, z = self.samples(history)
+            flight_numbers.append(np.full(len(flight_slots), flight_number))
+            slots.append(flight_slots)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+        if not slots:
+            return []
+        flight_numbers, slots, xs, ys, zs = [np.concatenate(values) for values in [flight_numbers, slots, xs, ys, zs]]
+
+        cells = np.stack([
+            slots,
+            np.floor(xs / self.horizontal_separation_m),
+            np.floor(ys / self.horizontal_separation_m),
+            np.floor(zs / self.vertical_separation_fl)
+        ], axis=1).astype(np.int64).tolist()
+        flight_numbers, xs, ys, zs = flight_numbers.tolist(), xs.tolist(), ys.tolist(), zs.tolist()  # Python floats are faster in the pair loop
+        grid: Dict[tuple, List[int]] = defaultdict(list)
+        for sample, cell in enumerate(cells):
+            grid[tuple(cell)].append(sample)
+
+        losses: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = defaultdict(list)  # Pair to (slot, horizontal, vertical distance)
+        neighbours = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+        for (slot, cx, cy, cz), samples in grid.items():
+            for dx, dy, dz in neighbours:
+                others = grid.get((slot, cx + dx, cy + dy, cz + dz))
+                if others is None:
+                    continue
+                for a in samples:
+                    for b in others:
+                        if flight_numbers[a] >= flight_numbers[b]:
+                            continue  # Every pair once and no comparison with the same flight
+                        horizontal = math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+                        vertical = abs(zs[a] - zs[b])
+                        if horizontal < self.horizontal_separation_m and vertical < self.vertical_separation_fl:
+                            losses[(flight_numbers[a], flight_numbers[b])].append((slot, horizontal, vertical))
+
+        separation_losses = []
+        for (flight_a, flight_b), pair_losses in sorted(losses.items()):
+            pair_losses.sort()
+            start = 0
+            for i in range(1, len(pair_losses) + 1):
+                if i == len(pair_losses) or pair_losses[i][0] != pair_losses[i - 1][0] + 1:
+                    closest = min(pair_losses[start:i], key=lambda loss: loss[1])
+                    separation_losses.append(SeparationLoss(
+                        flight_a, flight_b,
+                        pair_losses[start][0] * self.sample_interval_s, pair_losses[i - 1][0] * self.sample_interval_s,
+                        closest[1], closest[2]
+                    ))
+                    start = i
+        return separation_losses
+
+    def conflict_cells(self, climate_field: ClimateField, losses: List[SeparationLoss], histories: Dict[int, List[Dict]]) -> Set[Tuple[int, int, int, int]]:
+        "Grid cells (longitude, latitude, flight level, time index) of the climate field in which the separation losses happen."
+        cells = set()
+        for loss in losses:
+            slots, x, y, z = self.samples(histories[loss.flight_a])
+            ts = slots * self.sample_interval_s
+            during = (ts >= loss.start_time) & (ts <= loss.end_time)
+            cells.update(zip(
+                climate_field.longitude_index(x[during]).tolist(),
+                climate_field.latitude_index(y[during]).tolist(),
+                climate_field.flight_level_index(z[during]).tolist(),
+                climate_field.time_index(ts[during]).tolist()
+            ))
+        return cells
+
+    @staticmethod
+    def penalty_field(climate_field: ClimateField, cells: Set[Tuple[int, int, int, int]], penalty: float) -> ClimateField:
+        "Copy of the climate field with the cost of the given cells raised by penalty."
+        costs = climate_field.costs.copy()
+        for cell in cells:
+            costs[cell] += penalty
+        return ClimateField(climate_field.longitudes, climate_field.latitudes, climate_field.flight_levels, climate_field.times, costs)
+
+    def resolve(self, planner: ClassicPlanner, flights, results: List[List], penalty: float = 0.1, max_rounds: int = 3) -> Tuple[List[List], List[SeparationLoss]]:
+        """Re-plans conflicting flights until the paths are free of separation losses or max_rounds are used.
+        results holds one [flight_number, goal_greedy, cost, history] per flight (see ClassicPlanner.calculate_flight).
+        Of each conflicting pair the flight with the higher number is re-planned on a field in which the cells of the
+        losses are penalized, its cost is evaluated on the original field (replaying every step with its own length, see
+        ClassicPlanner.get_cost). The re-planning planner has the settings but not the profile of planner, so the
+        re-plans do not show up in its profile. A flight without a new path keeps its old one.
+        Returns the results and the remaining losses."""
+        results = {result[0]: list(result) for result in results}
+        histories = {flight_number: result[3] for flight_number, result in results.items() if result[2] != 0}
+        losses = self.detect(histories)
+        cells: Set[Tuple[int, int, int, int]] = set()
+        for _ in range(max_rounds):
+            if not losses:
+                break
+            cells |= self.conflict_cells(planner.climate_field, losses, histories)  # Penalties of earlier rounds are kept, so re-planned flights do not return there
+            penalized = ClassicPlanner(self.penalty_field(planner.climate_field, cells, penalty), planner.fuel_table, **planner.options())
+            for flight_number in sorted({loss.flight_b for loss in losses}):
+                goal_greedy = results[flight_number][1]
+                _, _, cost, history = penalized.calculate_flight(flight_number, flights.loc[flight_number], goal_greedy)
+                if cost != 0:  # Otherwise the previous path is kept
+                    results[flight_number] = [flight_number, goal_greedy, planner.get_cost(history), history]
+                    histories[flight_number] = history
+            losses = self.detect(histories)
+        return list(results.values()), losses
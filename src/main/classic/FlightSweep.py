@@ -0,0 +1,139 @@
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from src.main.classic.ClassicPlanner import ClassicPlanner
+from src.main.classic.ClimateField import ClimateField
+from src.main.classic.FuelTable import FuelTable
+from src.main.classic.PlannerProfile import PlannerProfile
+from src.main.classic.TrajectoryStore import TrajectoryStore
+
+# Planner of the worker process, built once per worker from the memory mapped tables (see _initialize_worker)
+_planner: Optional[ClassicPlanner] = None
+
+Task = Tuple[int, int, object, float]  # (position in the result list, flight number, flight, goal_greedy)
+
+
+def _initialize_worker(directory: str, time_grid: int, look_ahead_steps: int, planner_options: Dict, profile_sample_every: Optional[int]) -> None:
+    global _planner
+    climate_field = ClimateField.load(os.path.join(directory, FlightSweep.CLIMATE_DIRECTORY))
+    fuel_table = FuelTable.load(os.path.join(directory, FlightSweep.FUEL_FILE))
+    profile = PlannerProfile(profile_sample_every) if profile_sample_every else None
+    # planner_options may come from ClassicPlanner.options(), the step settings and the profile of the sweep take precedence
+    options = {**planner_options, 'time_grid': time_grid, 'look_ahead_steps': look_ahead_steps, 'profile': profile}
+    _planner = ClassicPlanner(climate_field, fuel_table, **options)
+
+
+def run_task(flight_number: int, flight, goal_greedy: float) -> Tuple[List, Optional[Dict]]:
+    "Result of the task and, if the planner is profiled, the summary of its profile."
+    if _planner.profile is None:
+        return _planner.calculate_flight(flight_number, flight, goal_greedy), None
+    _planner.profile.reset()
+    start = time.perf_counter()
+    result = _planner.calculate_flight(flight_number, flight, goal_greedy)
+    return result, {'flight_number': flight_number, 'goal_greedy': goal_greedy, 'wall_time_s': time.perf_counter() - start, **_planner.profile.summary()}
+
+
+def run_chunk(tasks: List[Task]) -> List[Tuple[int, List, Optional[Dict]]]:
+    return [(position, *run_task(flight_number, flight, goal_greedy)) for position, flight_number, flight, goal_greedy in tasks]
+
+
+class FlightSweep:
+    """Plans every (goal_greedy, flight) combination with the greedy planner in a process pool.
+    The climate and fuel tables are written once to .npy files that every worker memory maps, so the workers share the
+    pages of the climate array instead of receiving a pickled copy each. Tasks are sorted by their expected number of
+    steps (longest first) and sent in chunks of chunk_size, the results are collected as the chunks complete.
+    With profile_sample_every, every worker profiles its planner (see PlannerProfile) and returns a summary per task,
+    the summaries of the last run are kept in task_profiles and combined by profile_report."""
+
+    CLIMATE_DIRECTORY = 'climate'
+    FUEL_FILE = 'fuel.npy'
+
+    def __init__(self, climate_field: ClimateField, fuel_table: FuelTable, time_grid: int = 120, look_ahead_steps: int = 20,
+                 max_workers: Optional[int] = None, chunk_size: int = 4, planner_options: Optional[Dict] = None,
+                 profile_sample_every: Optional[int] = None):
+        self.climate_field: ClimateField = climate_field
+        self.fuel_table: FuelTable = fuel_table
+        self.time_grid: int = time_grid
+        self.look_ahead_steps: int = look_ahead_steps
+        self.max_workers: Optional[int] = max_workers  # Number of processes, defaults to the number of cores
+        self.chunk_size: int = chunk_size  # Tasks per submitted job
+        self.planner_options: Dict = planner_options or {}  # Further keyword arguments of ClassicPlanner (e.g. progress_window or ClassicPlanner.options())
+        self.profile_sample_every: Optional[int] = profile_sample_every  # Sampling interval of the timers, no profiling if None
+        self.task_profiles: List[Dict] = []  # Profile summary per planned task of the last run
+
+    def expected_steps(self, flight) -> float:
+        "Number of steps of a straight flight at the start flight level."
+        distance = np.sqrt((flight['end_longitudinal'] - flight['start_longitudinal']) ** 2 + (flight['end_latitudinal'] - flight['start_latitudinal']) ** 2)
+        speed = self.fuel_table[self.climate_field.closest_flight_level(flight['start_flightlevel'])][FuelTable.TAS_M_S_KEY]
+        return distance / (speed * self.time_grid)
+
+    def tasks(self, flights: DataFrame, goal_greedies: List[float]) -> List[Task]:
+        "Tasks are numbered in the order of itertools.product(goal_greedies, flights)."
+        return [
+            (position, flight_number, flight, goal_greedy)
+            for position, (goal_greedy, (flight_number, flight)) in enumerate(itertools.product(goal_greedies, list(flights.iterrows())))
+        ]
+
+    def chunks(self, tasks: List[Task]) -> List[List[Task]]:
+        "Groups the tasks longest first."
+        tasks = sorted(tasks, key=lambda task: self.expected_steps(task[2]), reverse=True)
+        return [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+
+    def run(self, flights: DataFrame, goal_greedies: List[float], store: Optional[TrajectoryStore] = None) -> List[List]:
+        """Returns [flight_number, goal_greedy, cost, history] per task in the order of itertools.product(goal_greedies, flights),
+        like the joblib sweep of Classic_Approach.ipynb. With a store, each result is appended to it as soon as it is
+        finished and tasks already in the store are not planned again but read from it."""
+        tasks = self.tasks(flights, goal_greedies)
+        results: List[Optional[List]] = [None] * len(tasks)
+        if store is not None:
+            finished_tasks = store.finished_tasks()
+            for position, flight_number, _, goal_greedy in tasks:
+                if (flight_number, goal_greedy) in finished_tasks:
+                    history = store.load_history(flight_number, goal_greedy)
+                    cost = store.index[(store.index['flight_number'] == flight_number) & (store.index['goal_greedy'] == goal_greedy)]['cost'].iloc[-1]
+                    results[position] = [flight_number, goal_greedy, cost, history]
+            tasks = [task for task in tasks if results[task[0]] is None]
+        chunks = self.chunks(tasks)
+        self.task_profiles = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.climate_field.save(os.path.join(directory, self.CLIMATE_DIRECTORY))
+            self.fuel_table.save(os.path.join(directory, self.FUEL_FILE))
+
+            with ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_initialize_worker,
+                    initargs=(directory, self.time_grid, self.look_ahead_steps, self.planner_options, self.profile_sample_every)
+            ) as executor:
+                futures = [executor.submit(run_chunk, chunk) for chunk in chunks]
+                finished = 0
+                for future in as_completed(futures):
+                    for position, result, profile in future.result():
+                        results[position] = result
+                        if profile is not None:
+                            self.task_profiles.append(profile)
+                        if store is not None:
+                            store.append(*result)
+                    finished += 1
+                    print(f'{finished}/{len(futures)} chunks finished')
+
+        return results
+
+    def profile_report(self) -> DataFrame:
+        "Profile summaries of the tasks of the last run and their total (tasks read from the store are not profiled)."
+        return PlannerProfile.report(self.task_profiles)
+
+    @staticmethod
+    def results_data_frame(results: List[List]) -> DataFrame:
+        "Cost per flight (rows) and goal_greedy (columns), as stored in classic_results.csv."
+        result_df = DataFrame(columns=list(dict.fromkeys(result[1] for result in results)))
+        for result in results:
+            result_df.at[result[0], result[1]] = result[2]
+        return result_df
@@ -0,0 +1,65 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+class FuelTable:
+    KNOTS_PER_METER_PER_SECOND: float = 1.94384
+
+    FLIGHT_LEVEL_KEY = 'FL'
+    TAS_M_S_KEY = 'TAS-MS'
+    ROC_FT_PER_MIN_KEY = 'ROC [ft/min]'
+    ROD_FT_PER_MIN_KEY = 'ROD [ft/min]'
+    FUEL_CRUISE_KEY = 'fuel1'
+    FUEL_CLIMB_KEY = 'fuel2'
+    FUEL_DESCENT_KEY = 'fuel3'
+    COLUMNS = [TAS_M_S_KEY, ROC_FT_PER_MIN_KEY, ROD_FT_PER_MIN_KEY, FUEL_CRUISE_KEY, FUEL_CLIMB_KEY, FUEL_DESCENT_KEY]  # Column order of save()
+
+    def __init__(self, rows: Dict[int, Dict[str, float]]):
+        self.rows: Dict[int, Dict[str, float]] = rows  # Map flight level to speed, rate of climb/descent and fuel consumption in kg/min
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'FuelTable':
+        "Reads the BADA data (e.g. material/bada_data.csv) for flight levels of at least 100."
+        df = pd.read_csv(path, delimiter='\t')
+        df = df[df[cls.FLIGHT_LEVEL_KEY] >= 100]
+        df[cls.TAS_M_S_KEY] = df['TAS [kts]'] / cls.KNOTS_PER_METER_PER_SECOND
+
+        return cls({
+            int(row[cls.FLIGHT_LEVEL_KEY]): {
+                cls.FUEL_CRUISE_KEY: row[cls.FUEL_CRUISE_KEY],
+                cls.ROC_FT_PER_MIN_KEY: row[cls.ROC_FT_PER_MIN_KEY],
+                cls.FUEL_CLIMB_KEY: row[cls.FUEL_CLIMB_KEY],
+                cls.ROD_FT_PER_MIN_KEY: row[cls.ROD_FT_PER_MIN_KEY],
+                cls.FUEL_DESCENT_KEY: row[cls.FUEL_DESCENT_KEY],
+                cls.TAS_M_S_KEY: row[cls.TAS_M_S_KEY],
+            } for [_, row] in df.iterrows()
+        })
+
+    @classmethod
+    def from_compiled_problem(cls, problem) -> 'FuelTable':
+        return cls({
+            int(flight_level): {
+                cls.FUEL_CRUISE_KEY: problem.fuel_cruise[row],
+                cls.ROC_FT_PER_MIN_KEY: problem.rate_of_climb_ft_min[row],
+                cls.FUEL_CLIMB_KEY: problem.fuel_climb[row],
+                cls.ROD_FT_PER_MIN_KEY: problem.rate_of_descent_ft_min[row],
+                cls.FUEL_DESCENT_KEY: problem.fuel_descent[row],
+                cls.TAS_M_S_KEY: problem.speed_kts[row] / cls.KNOTS_PER_METER_PER_SECOND,
+            } for row, flight_level in enumerate(problem.fuel_flight_levels)
+        })
+
+    def __getitem__(self, flight_level: int) -> Dict[str, float]:
+        return self.rows[int(flight_level)]
+
+    def save(self, path: str) -> None:
+        "Stores the table as a .npy array with one row per flight level: FL followed by COLUMNS."
+        np.save(path, np.array([[flight_level] + [row[key] for key in self.COLUMNS] for flight_level, row in self.rows.items()], dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = 'r') -> 'FuelTable':
+        table = np.load(path, mmap_mode=mmap_mode)
+        return cls({
+            int(values[0]): {key: float(value) for key, value in zip(cls.COLUMNS, values[1:])} for values in table
+        })
@@ -0,0 +1,197 @@
+import warnings
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.main.classic.ClimateField import ClimateField, to_seconds
+from src.main.classic.FuelTable import FuelTable
+from src.main.classic.PlannerProfile import PlannerProfile
+from src.main.classic.RolloutCache import Rollout, RolloutCache
+
+
+class LookAheadEngine:
+    """Evaluates the look ahead of all candidate maneuvers at once: every maneuver is applied for one step and followed by
+    look_ahead_steps straight steps. The states of all candidates and rollout steps are NumPy arrays of shape
+    (maneuvers, look_ahead_steps + 1), their climate costs are looked up in a single batched query.
+    The arithmetic is the same as in ClassicPlanner.lookup_path, so the results match the step by step look ahead."""
+
+    def __init__(self, climate_field: ClimateField, fuel_table: FuelTable, time_grid: int = 120, look_ahead_steps: int = 20,
+                 profile: Optional[PlannerProfile] = None):
+        self.climate_field: ClimateField = climate_field
+        self.time_grid: int = time_grid
+        self.look_ahead_steps: int = look_ahead_steps
+        self.climate_lookups: int = 0  # Number of states whose climate cost has been looked up
+        self.profile: Optional[PlannerProfile] = profile  # Counters and sampled timers, not collected without a profile
+
+        fuel_rows = [fuel_table[flight_level] for flight_level in climate_field.flight_levels]  # Fuel table aligned to the flight levels of the climate field
+        self.speed_m_s: np.ndarray = np.array([row['TAS-MS'] for row in fuel_rows])
+        self.rate_of_climb_ft_min: np.ndarray = np.array([row['ROC [ft/min]'] for row in fuel_rows])
+        self.rate_of_descent_ft_min: np.ndarray = np.array([row['ROD [ft/min]'] for row in fuel_rows])
+        self.fuel_cruise: np.ndarray = np.array([row['fuel1'] for row in fuel_rows])
+        self.fuel_climb: np.ndarray = np.array([row['fuel2'] for row in fuel_rows])
+        self.fuel_descent: np.ndarray = np.array([row['fuel3'] for row in fuel_rows])
+
+    @staticmethod
+    def possible_maneuvers(z) -> List[str]:
+        maneuvers = ['straight', 'left', 'right']
+        if z > 100:
+            maneuvers.append('down')
+        if z < 400:
+            maneuvers.append('up')
+        return maneuvers
+
+    def first_step(self, x, y, z, alpha, maneuvers: List[str]):
+        "Applies each maneuver for one step from the same state. Returns x, y, z, alpha and fuel (kg/min) per maneuver."
+        n = len(maneuvers)
+        return self.advance(np.full(n, float(x)), np.full(n, float(y)), np.full(n, float(z)), np.full(n, float(alpha)), np.array(maneuvers))
+
+    def advance(self, x: np.ndarray, y: np.ndarray, z: np.ndarray, alpha: np.ndarray, maneuvers: np.ndarray):
+        "Applies maneuvers[i] for one step to state i (float arrays). Returns x, y, z, alpha and fuel (kg/min) per state."
+        start = self.profile.start('kinematics') if self.profile is not None else None
+        flight_level_index = self.climate_field.flight_level_index(z)
+        v = self.speed_m_s[flight_level_index]
+
+        x_local = x + self.time_grid * v  # straight
+        y_local = y.copy()
+        z_new = z.copy()
+        new_alpha = alpha.copy()
+        fuel = self.fuel_cruise[flight_level_index]
+
+        turning = (maneuvers == 'left') | (maneuvers == 'right')
+        if turning.any():
+            r = v[turning]**2 / (9.81 * np.tan(2 / 180 * np.pi))  # Turn radius
+            delta_alpha = v[turning] * self.time_grid / r
+            if (delta_alpha > np.pi / 2).any():
+                warnings.warn('The airplane will make more than a 90° turn')
+            sign = np.where(maneuvers[turning] == 'right', -1, 1)
+            x_local[turning] = x[turning] + r * np.sin(delta_alpha)
+            y_local[turning] = (y[turning] + sign * r) - r * np.cos(delta_alpha) * sign
+            new_alpha[turning] = alpha[turning] - sign * delta_alpha
+
+        for maneuver, rate, direction, fuel_by_level in [('up', self.rate_of_climb_ft_min, 1, self.fuel_climb), ('down', self.rate_of_descent_ft_min, -1, self.fuel_descent)]:
+            vertical = maneuvers == maneuver
+            if vertical.any():
+                z_change = rate[flight_level_index[vertical]] / 60 * self.time_grid
+                distance = self.time_grid * v[vertical]
+                x_local[vertical] = x[vertical] + np.sqrt(distance ** 2 - z_change ** 2)
+                z_new[vertical] = z[vertical] + direction * (z_change / 100)
+                fuel[vertical] = fuel_by_level[flight_level_index[vertical]]
+
+        new_alpha = new_alpha % (2 * np.pi)
+        x_new, y_new = self.rotate(x, y, x_local, y_local, new_alpha)
+        if self.profile is not None:
+            self.profile.stop('kinematics', start)
+        return x_new, y_new, z_new, new_alpha, fuel
+
+    @staticmethod
+    def rotate(ox, oy, px, py, angle):
+        qx = ox + np.cos(angle) * (px - ox) - np.sin(angle) * (py - oy)
+        qy = oy + np.sin(angle) * (px - ox) + np.cos(angle) * (py - oy)
+        return qx, qy
+
+    def rollout(self, x: np.ndarray, y: np.ndarray, z: np.ndarray, alpha: np.ndarray, steps: int):
+        "Flies straight for the given number of steps from each state. Returns x and y of shape (states, steps)."
+        start = self.profile.start('kinematics') if self.profile is not None else None
+        advance = self.time_grid * self.speed_m_s[self.climate_field.flight_level_index(z)]
+        cos_alpha, sin_alpha = np.cos(alpha), np.sin(alpha)
+
+        xs = np.empty((steps, len(x)))
+        ys = np.empty((steps, len(x)))
+        for step in range(steps):
+            # Same operations as rotate() (its terms with py - oy == 0 do not change the result), so that the states
+            # do not drift from the step by step look ahead
+            distance = (x + advance) - x
+            x = x + cos_alpha * distance
+            y = y + sin_alpha * distance
+            xs[step] = x
+            ys[step] = y
+        if self.profile is not None:
+            self.profile.count('rollouts', len(x))
+            self.profile.stop('kinematics', start)
+        return xs.T, ys.T
+
+    def climate_costs(self, xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        "Batched climate lookup, ts in seconds since epoch."
+        self.climate_lookups += xs.size
+        if self.profile is None:
+            return self.climate_field.lookup(xs, ys, zs, ts)
+        self.profile.count('lookups', xs.size)
+        start = self.profile.start('climate_lookup')
+        costs = self.climate_field.lookup(xs, ys, zs, ts)
+        self.profile.stop('climate_lookup', start)
+        return costs
+
+    @staticmethod
+    def total_path_cost(costs: np.ndarray) -> np.ndarray:
+        "Sums the costs along each row from the last step backwards, in the same order as the recursive look ahead."
+        total = costs[:, -1]
+        for step in range(costs.shape[1] - 2, -1, -1):
+            total = costs[:, step] + total
+        return total
+
+    def look_ahead(self, x, y, z, t, alpha, rollout_cache: Optional[RolloutCache] = None) -> Dict[str, Dict]:
+        """Maps each possible maneuver to its first step (coordinates, cost, time, alpha) and its total_path_cost.
+        With a rollout cache, the straight maneuver reuses the rollout evaluated in the previous decision for the
+        maneuver that led to this state, and the rollouts of this decision are put into the cache for the next one."""
+        maneuvers = self.possible_maneuvers(z)
+        steps = self.look_ahead_steps + 1  # First step of the maneuver and the straight rollout after it
+        x_first, y_first, z_first, alpha_first, fuel_first = self.first_step(x, y, z, alpha, maneuvers)
+        flight_level_index = self.climate_field.flight_level_index(z_first)
+        fuel_rollout = self.fuel_cruise[flight_level_index]
+
+        t_seconds = to_seconds(t)
+        shape = (len(maneuvers), steps)
+        zs = np.broadcast_to(z_first[:, None], shape)
+        ts = np.broadcast_to(t_seconds + self.time_grid * np.arange(1, steps + 1), shape)  # Step k is reached at t + (k + 1) * time_grid
+        fuel = np.empty(shape)
+        fuel[:, 0] = fuel_first
+        fuel[:, 1:] = fuel_rollout[:, None]
+
+        cached = rollout_cache.get((float(x), float(y), float(z), float(alpha), t_seconds)) if rollout_cache is not None else None
+        if cached is None or len(cached) < steps - 1:
+            xs = np.empty(shape)
+            ys = np.empty(shape)
+            xs[:, 0], ys[:, 0] = x_first, y_first
+            xs[:, 1:], ys[:, 1:] = self.rollout(x_first, y_first, z_first, alpha_first, self.look_ahead_steps)
+            costs = self.climate_costs(xs, ys, zs, ts) * (fuel / 60 * self.time_grid)
+        else:
+            # Flying straight continues the cached rollout of the maneuver that led here, it only needs one more step
+            if self.profile is not None:
+                self.profile.count('cached_rollouts')
+            straight = maneuvers.index('straight')
+            evaluate = np.ones(len(maneuvers), dtype=bool)
+            evaluate[straight] = False
+            xs = np.empty(shape)
+            ys = np.empty(shape)
+            xs[evaluate, 0], ys[evaluate, 0] = x_first[evaluate], y_first[evaluate]
+            xs[evaluate, 1:], ys[evaluate, 1:] = self.rollout(x_first[evaluate], y_first[evaluate], z_first[evaluate], alpha_first[evaluate], self.look_ahead_steps)
+            xs[straight, :-1], ys[straight, :-1] = cached.xs[:steps - 1], cached.ys[:steps - 1]
+            x_next, y_next = self.rollout(xs[straight, -2:-1], ys[straight, -2:-1], z_first[straight:straight + 1], alpha_first[straight:straight + 1], 1)
+            xs[straight, -1], ys[straight, -1] = x_next[0, 0], y_next[0, 0]
+
+            new = np.zeros(shape, dtype=bool)  # States not evaluated before are looked up in one batch
+            new[evaluate] = True
+            new[straight, -1] = True
+            costs = np.empty(shape)
+            costs[straight, :-1] = cached.costs[:steps - 1]
+            costs[new] = self.climate_costs(xs[new], ys[new], zs[new], ts[new]) * (fuel[new] / 60 * self.time_grid)
+
+        total_path_costs = self.total_path_cost(costs)
+
+        t_first = t + timedelta(seconds=self.time_grid)
+        if rollout_cache is not None:
+            rollout_cache.replace({
+                (float(x_first[i]), float(y_first[i]), float(z_first[i]), float(alpha_first[i]), t_seconds + self.time_grid): Rollout(xs[i, 1:], ys[i, 1:], costs[i, 1:])
+                for i in range(len(maneuvers))
+            })
+
+        return {
+            maneuver: {
+                'coordinates': [float(x_first[i]), float(y_first[i]), float(z_first[i])],
+                'cost': float(costs[i, 0]),
+                'time': t_first,
+                'alpha': float(alpha_first[i]),
+                'total_path_cost': float(total_path_costs[i]),
+            } for i, maneuver in enumerate(maneuvers)
+        }
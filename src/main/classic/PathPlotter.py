@@ -0,0 +1,122 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from pandas import DataFrame
+
+from src.main.classic.ClimateField import ClimateField, EPOCH, to_seconds
+
+# Plotter of the worker process, built once per worker from the memory mapped climate field (see _initialize_worker)
+_path_plotter: Optional['PathPlotter'] = None
+
+
+def _initialize_worker(directory: str, plotter_options: Dict) -> None:
+    global _path_plotter
+    _path_plotter = PathPlotter(ClimateField.load(directory), **plotter_options)
+
+
+def plot_flight(history: List[Dict], flight, directory: str, prefix: str) -> List[str]:
+    return _path_plotter.save_path(history, flight, directory, prefix)
+
+
+class Segment(NamedTuple):
+    flight_level_index: int
+    time_index: int
+    points: np.ndarray  # Coordinates (x, y, z) of the states in the segment and the first state of the next segment
+
+
+class PathPlotter:
+    """Draws a path of ClassicPlanner.get_path on the climate cost map, one figure per part of the path that stays on the
+    same flight level and climate snapshot. The maps are slices of ClimateField.horizontal_slices, which are created once
+    and shared by all figures. Figures are drawn without pyplot (Agg canvas), so they can be created in worker processes."""
+
+    def __init__(self, climate_field: ClimateField, vmin: float = 0.08, vmax: float = 0.13, cmap: str = 'RdBu_r', dpi: int = 100, file_format: str = 'svg'):
+        self.climate_field: ClimateField = climate_field
+        self.vmin: float = vmin  # Color range of the climate cost
+        self.vmax: float = vmax
+        self.cmap: str = cmap
+        self.dpi: int = dpi
+        self.file_format: str = file_format
+        self.slices: np.ndarray = climate_field.horizontal_slices()
+        self.extent = climate_field.extent()
+        self.__figure: Optional[Figure] = None  # Created on first use, see __create_figure
+
+    def segments(self, history: List[Dict]) -> List[Segment]:
+        "Splits the path where the closest flight level or climate snapshot changes."
+        points = np.array([state['coordinates'] for state in history], dtype=np.float64)
+        flight_level_indices = self.climate_field.flight_level_index(points[:, 2])
+        time_indices = self.climate_field.time_index(np.array([to_seconds(state['time']) for state in history]))
+
+        changes = np.flatnonzero((np.diff(flight_level_indices) != 0) | (np.diff(time_indices) != 0)) + 1
+        starts = [0] + changes.tolist()
+        ends = changes.tolist() + [len(points) - 1]
+        return [
+            Segment(int(flight_level_indices[start]), int(time_indices[start]), points[start:end + 1])
+            for start, end in zip(starts, ends) if end > start  # A segment needs at least two points to be drawn
+        ]
+
+    def title(self, segment: Segment) -> str:
+        time = EPOCH + timedelta(seconds=float(self.climate_field.times[segment.time_index]))
+        return 'FL ' + str(self.climate_field.flight_levels[segment.flight_level_index]) + ' - ' + str(time)
+
+    def __create_figure(self) -> None:
+        "One figure per plotter, its artists are updated for every segment instead of drawing a new figure."
+        self.__figure = Figure(dpi=self.dpi)
+        FigureCanvasAgg(self.__figure)
+        ax = self.__figure.add_subplot()
+
+        self.__image = ax.imshow(self.slices[0, 0], extent=self.extent, origin='lower', cmap=self.cmap, vmin=self.vmin,
+                                 vmax=self.vmax)  # Rows are sorted by latitude, so the first row is the southern border
+        self.__figure.colorbar(self.__image, ax=ax, fraction=0.02503)
+        self.__path, = ax.plot([], [], label='path')
+        self.__start = ax.scatter([0], [0], label='start')
+        self.__end = ax.scatter([0], [0], label='end')
+        ax.set_xlim(self.extent[0], self.extent[1])  # The placeholder data must not change the limits
+        ax.set_ylim(self.extent[2], self.extent[3])
+        ax.legend()
+        self.__title = ax.set_title('')
+
+    def figure(self, segment: Segment, flight) -> Figure:
+        "The figure of the plotter showing the segment. It is changed by the next call, save or copy it before."
+        if self.__figure is None:
+            self.__create_figure()
+
+        self.__image.set_data(self.slices[segment.flight_level_index, segment.time_index])
+        self.__path.set_data(segment.points[:, 0], segment.points[:, 1])
+        self.__start.set_offsets([[flight['start_longitudinal'], flight['start_latitudinal']]])
+        self.__end.set_offsets([[flight['end_longitudinal'], flight['end_latitudinal']]])
+        self.__title.set_text(self.title(segment))
+        return self.__figure
+
+    def save_path(self, history: List[Dict], flight, directory: str = '.', prefix: str = 'flight') -> List[str]:
+        """Saves one figure per segment of the path as <prefix>_<segment number>FL<flight level><time>.<file format>
+        and returns the file names."""
+        os.makedirs(directory, exist_ok=True)
+        file_names = []
+        for number, segment in enumerate(self.segments(history)):
+            file_name = os.path.join(directory, (f'{prefix}_{number}' + self.title(segment).replace(' - ', '') + '.' + self.file_format).replace(' ', ''))
+            self.figure(segment, flight).savefig(file_name, format=self.file_format)
+            file_names.append(file_name)
+        return file_names
+
+    def save_paths(self, histories: Dict[int, List[Dict]], flights: DataFrame, directory: str = '.', max_workers: Optional[int] = None) -> Dict[int, List[str]]:
+        """Saves the figures of the paths of all flights (flight number to history) in a process pool, the figures of a
+        flight are prefixed with flight<flight number>. The climate field is memory mapped by the workers."""
+        file_names = {}
+        with tempfile.TemporaryDirectory() as climate_directory:
+            self.climate_field.save(climate_directory)
+            plotter_options = {'vmin': self.vmin, 'vmax': self.vmax, 'cmap': self.cmap, 'dpi': self.dpi, 'file_format': self.file_format}
+
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(climate_directory, plotter_options)) as executor:
+                futures = {
+                    executor.submit(plot_flight, history, flights.loc[flight_number], directory, f'flight{flight_number}'): flight_number
+                    for flight_number, history in histories.items() if len(history) > 1
+                }
+                for future in as_completed(futures):
+                    file_names[futures[future]] = future.result()
+        return file_names
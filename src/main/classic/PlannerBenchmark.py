@@ -0,0 +1,134 @@
+import argparse
+import math
+import sys
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+from pandas import DataFrame
+
+from src.main.classic.ClassicPlanner import ClassicPlanner, load_flights
+from src.main.classic.ClimateField import ClimateField
+from src.main.classic.FuelTable import FuelTable
+from src.main.Paths import Paths
+
+
+class TaskMeasurement(NamedTuple):
+    flight_number: int
+    goal_greedy: float
+    wall_time_s: float
+    steps: int  # Number of steps of the path (NO RESULT paths have MAX_STEPS)
+    climate_lookups: int
+    cost: float  # 0 if no path was found (see ClassicPlanner.calculate_flight)
+    reference_cost: float  # NaN if the task is not in the reference
+    reference_steps: float  # NaN without reference steps
+    cost_matches: bool
+    steps_match: bool
+
+
+class PlannerBenchmark:
+    """Runs the classic planner on a subset of flights and goal_greedy values, measures every task and compares it with
+    the committed results (classic_results.csv: cost per flight and goal_greedy, 0 for NO RESULT).
+    The reference has no step counts, so without reference_steps a task only has to agree on whether a path was found:
+    cost 0 if and only if the planner stopped after MAX_STEPS steps. Reference steps can be written with save_steps.
+    The tasks run one after the other in this process, so the wall times are comparable between runs."""
+
+    def __init__(self, planner: ClassicPlanner, reference: DataFrame, reference_steps: Optional[DataFrame] = None,
+                 cost_rel_tol: float = 0.0, cost_abs_tol: float = 0.0, step_tol: int = 0):
+        self.planner: ClassicPlanner = planner
+        self.reference: DataFrame = reference  # Rows are flight numbers, columns goal_greedy values
+        self.reference_steps: Optional[DataFrame] = reference_steps  # Same layout as reference
+        self.cost_rel_tol: float = cost_rel_tol  # The defaults require the exact float of the reference
+        self.cost_abs_tol: float = cost_abs_tol
+        self.step_tol: int = step_tol
+
+    @staticmethod
+    def read_results(path: str = Paths.CLASSIC_RESULTS) -> DataFrame:
+        "Reads a result table with the columns as float goal_greedy values. round_trip reads the floats exactly as written."
+        results = pd.read_csv(path, index_col=0, float_precision='round_trip')
+        results.columns = [float(column) for column in results.columns]
+        return results
+
+    @staticmethod
+    def __reference_value(reference: Optional[DataFrame], flight_number: int, goal_greedy: float) -> float:
+        if reference is None or flight_number not in reference.index or goal_greedy not in reference.columns:
+            return math.nan
+        return float(reference.at[flight_number, goal_greedy])
+
+    def measure(self, flight_number: int, flight, goal_greedy: float) -> TaskMeasurement:
+        lookups = self.planner.climate_lookups
+        start = time.perf_counter()
+        _, _, cost, history = self.planner.calculate_flight(flight_number, flight, goal_greedy)
+        wall_time_s = time.perf_counter() - start
+        steps = len(history) - 1
+
+        reference_cost = self.__reference_value(self.reference, flight_number, goal_greedy)
+        reference_steps = self.__reference_value(self.reference_steps, flight_number, goal_greedy)
+        cost_matches = math.isnan(reference_cost) or math.isclose(cost, reference_cost, rel_tol=self.cost_rel_tol, abs_tol=self.cost_abs_tol)
+        if not math.isnan(reference_steps):
+            steps_match = abs(steps - reference_steps) <= self.step_tol
+        elif not math.isnan(reference_cost):
+            steps_match = (reference_cost == 0) == (steps == self.planner.MAX_STEPS)
+        else:
+            steps_match = True
+
+        return TaskMeasurement(flight_number, goal_greedy, wall_time_s, steps, self.planner.climate_lookups - lookups, cost,
+                               reference_cost, reference_steps, cost_matches, steps_match)
+
+    def run(self, flights: DataFrame, goal_greedies: Sequence[float]) -> DataFrame:
+        "One row per (goal_greedy, flight) task with the columns of TaskMeasurement."
+        measurements: List[TaskMeasurement] = []
+        for goal_greedy in goal_greedies:
+            for flight_number, flight in flights.iterrows():
+                measurements.append(self.measure(flight_number, flight, goal_greedy))
+        return DataFrame(measurements, columns=TaskMeasurement._fields)
+
+    @staticmethod
+    def summary(measurements: DataFrame) -> DataFrame:
+        "Totals per goal_greedy and over all tasks."
+        aggregation = {'wall_time_s': 'sum', 'steps': 'sum', 'climate_lookups': 'sum', 'cost': 'sum', 'cost_matches': 'all', 'steps_match': 'all'}
+        summary = measurements.groupby('goal_greedy').agg(aggregation)
+        summary.loc['total'] = measurements.agg(aggregation)
+        summary['tasks'] = measurements.groupby('goal_greedy').size().tolist() + [len(measurements)]
+        return summary
+
+    @staticmethod
+    def save_steps(measurements: DataFrame, path: str) -> None:
+        "Writes the step counts in the layout of classic_results.csv, to be used as reference_steps of later runs."
+        measurements.pivot(index='flight_number', columns='goal_greedy', values='steps').to_csv(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the classic planner and compare it with classic_results.csv')
+    parser.add_argument('--flights', default='0:100', help='Slice of material/flights.csv, e.g. 0:10')
+    parser.add_argument('--greedies', type=float, nargs='+', default=[1, 0.1, 0.01, 0.001, 0.0005, 0.0001])
+    parser.add_argument('--reference', default=Paths.CLASSIC_RESULTS)
+    parser.add_argument('--reference-steps', default=None, help='Step counts written by --save-steps of an earlier run')
+    parser.add_argument('--cost-rel-tol', type=float, default=0.0)
+    parser.add_argument('--cost-abs-tol', type=float, default=0.0, help='Absolute tolerance, the only one that applies to cost 0 (NO RESULT)')
+    parser.add_argument('--step-tol', type=int, default=0)
+    parser.add_argument('--output', default=None, help='CSV file for the measurement of every task')
+    parser.add_argument('--save-steps', default=None)
+    arguments = parser.parse_args()
+
+    start, end = (int(value) if value else None for value in arguments.flights.split(':'))
+    benchmark = PlannerBenchmark(
+        ClassicPlanner(ClimateField.from_csv(Paths.material('aCCF_0623_p_spec.csv')), FuelTable.from_csv(Paths.material('bada_data.csv'))),
+        PlannerBenchmark.read_results(arguments.reference),
+        PlannerBenchmark.read_results(arguments.reference_steps) if arguments.reference_steps else None,
+        cost_rel_tol=arguments.cost_rel_tol,
+        cost_abs_tol=arguments.cost_abs_tol,
+        step_tol=arguments.step_tol
+    )
+    measurements = benchmark.run(load_flights(Paths.material('flights.csv'))[start:end], arguments.greedies)
+    if arguments.output:
+        measurements.to_csv(arguments.output, index=False)
+    if arguments.save_steps:
+        PlannerBenchmark.save_steps(measurements, arguments.save_steps)
+
+    print(PlannerBenchmark.summary(measurements).to_string())
+    mismatches = measurements[~(measurements['cost_matches'] & measurements['steps_match'])]
+    if len(mismatches):
+        print(mismatches.to_string())
+    print(f'{len(measurements) - len(mismatches)}/{len(measurements)} tasks match the reference')
+    sys.exit(1 if len(mismatches) else 0)
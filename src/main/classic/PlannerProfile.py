@@ -0,0 +1,86 @@
+import time
+from typing import Dict, List, Optional
+
+from pandas import DataFrame
+
+
+class SampledTimer:
+    "Counts every call but only reads the clock on every sample_every-th one, the total time is extrapolated from the samples."
+
+    def __init__(self, sample_every: int = 16):
+        self.sample_every: int = sample_every
+        self.calls: int = 0
+        self.samples: int = 0
+        self.sampled_s: float = 0.0  # Time of the sampled calls
+
+    def start(self) -> Optional[float]:
+        "Start time of a sampled call, None if the call is not sampled."
+        self.calls += 1
+        if self.calls % self.sample_every:
+            return None
+        return time.perf_counter()
+
+    def stop(self, start: Optional[float]) -> None:
+        if start is not None:
+            self.samples += 1
+            self.sampled_s += time.perf_counter() - start
+
+    @property
+    def estimated_s(self) -> float:
+        "Estimated time of all calls."
+        return self.sampled_s * self.calls / self.samples if self.samples else 0.0
+
+    def reset(self) -> None:
+        self.calls, self.samples, self.sampled_s = 0, 0, 0.0
+
+
+class PlannerProfile:
+    """Counters and sampled timers of the classic planner, shared by the planner and its look ahead engines.
+    Counters are plain integers, timers only read the clock on every sample_every-th call, so profiling a sweep does not
+    change where its time goes. summary() is a flat dict per task, report() combines the summaries of many tasks
+    (e.g. collected from the workers of FlightSweep) into one table."""
+
+    # steps: decisions of the planner, rollouts: straight rollouts evaluated (an extended cached rollout counts as one),
+    # cached_rollouts: decisions that reused a cached rollout, lookups: states whose climate cost has been looked up
+    COUNTERS = ('steps', 'rollouts', 'cached_rollouts', 'lookups')
+    TIMERS = ('climate_lookup', 'kinematics', 'scoring')
+
+    def __init__(self, sample_every: int = 16):
+        self.sample_every: int = sample_every  # 1 times every call
+        self.counters: Dict[str, int] = dict.fromkeys(self.COUNTERS, 0)
+        self.timers: Dict[str, SampledTimer] = {name: SampledTimer(sample_every) for name in self.TIMERS}
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def start(self, timer: str) -> Optional[float]:
+        return self.timers[timer].start()
+
+    def stop(self, timer: str, start: Optional[float]) -> None:
+        self.timers[timer].stop(start)
+
+    def reset(self) -> None:
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        for timer in self.timers.values():
+            timer.reset()
+
+    def summary(self) -> Dict[str, float]:
+        "Counters, and calls and estimated seconds per timer."
+        summary = dict(self.counters)
+        for name, timer in self.timers.items():
+            summary[f'{name}_calls'] = timer.calls
+            summary[f'{name}_s'] = timer.estimated_s
+        return summary
+
+    @staticmethod
+    def report(summaries: List[Dict]) -> DataFrame:
+        "One row per task summary and a total row, sorted by the estimated time of all timers (slowest first)."
+        timer_columns = [f'{name}_s' for name in PlannerProfile.TIMERS]
+        if not summaries:  # Nothing profiled (no profile_sample_every, or every task read from the store)
+            return DataFrame(columns=['flight_number', 'goal_greedy', 'wall_time_s', *PlannerProfile.COUNTERS,
+                                      *[column for name in PlannerProfile.TIMERS for column in (f'{name}_calls', f'{name}_s')], 'profiled_s'])
+        report = DataFrame(summaries)
+        report['profiled_s'] = report[timer_columns].sum(axis=1)
+        report = report.sort_values('profiled_s', ascending=False)
+        report.loc['total'] = report.drop(columns=[column for column in ['flight_number', 'goal_greedy'] if column in report]).sum()
+        return report
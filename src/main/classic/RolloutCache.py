@@ -0,0 +1,45 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+State = Tuple[float, float, float, float, float]  # (x, y, z, alpha, time in seconds since epoch)
+
+
+class Rollout:
+    def __init__(self, xs: np.ndarray, ys: np.ndarray, costs: np.ndarray):
+        self.xs: np.ndarray = xs  # Coordinates after each straight step
+        self.ys: np.ndarray = ys
+        self.costs: np.ndarray = costs  # Cost of each straight step
+
+    def __len__(self):
+        return len(self.costs)
+
+
+class RolloutCache:
+    """Sliding window of the straight rollouts evaluated for the last decision, keyed by the state they start from.
+    Once a maneuver is chosen, the planner continues from its state, so the straight rollout of the next decision
+    starts with the steps already evaluated for the chosen maneuver and only has to be extended by one step.
+    Only the straight maneuver is reused: the other maneuvers start from states that were never evaluated, so a decision
+    still looks up about (maneuvers - 1) * (look_ahead_steps + 1) + 1 states (85 instead of 106 with 5 maneuvers and 20
+    steps), the lookups of a flight stay O(steps * look_ahead_steps). Keys are the exact states: a rollout of a nearby
+    state (e.g. the same grid cell) would change the chosen maneuvers, and classic_results.csv is reproduced exactly."""
+
+    def __init__(self):
+        self.__rollouts: Dict[State, Rollout] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, state: State) -> Optional[Rollout]:
+        rollout = self.__rollouts.get(state)
+        if rollout is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rollout
+
+    def replace(self, rollouts: Dict[State, Rollout]) -> None:
+        "Slides the window: only the rollouts of the latest decision are kept."
+        self.__rollouts = rollouts
+
+    def clear(self) -> None:
+        self.__rollouts = {}
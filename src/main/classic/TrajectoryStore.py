@@ -0,0 +1,119 @@
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.main.classic.ClimateField import EPOCH, to_seconds
+
+DIRECTIONS = ['straight', 'left', 'right', 'up', 'down']  # Stored as their index, -1 for the start of a path
+
+
+class TrajectoryStore:
+    """Columnar store of planned paths in a directory: one raw binary file per column with one row per step, which is
+    appended for every finished (flight, goal_greedy) task and read back with memory maps. The index file lists the
+    tasks with their cost and their rows. A task is only listed after its rows have been written, so rows of an
+    interrupted write, and a partially written last line of the index, are dropped when the store is opened again and
+    the sweep can resume with the missing tasks."""
+
+    INDEX_FILE = 'index.csv'
+    INDEX_COLUMNS = ['flight_number', 'goal_greedy', 'cost', 'offset', 'length']
+    INDEX_TYPES = {'flight_number': np.int64, 'goal_greedy': np.float64, 'cost': np.float64, 'offset': np.int64, 'length': np.int64}
+    COLUMNS: Dict[str, np.dtype] = {
+        'x': np.dtype(np.float64),
+        'y': np.dtype(np.float64),
+        'z': np.dtype(np.float64),
+        'time': np.dtype(np.float64),  # Seconds since epoch
+        'alpha': np.dtype(np.float64),
+        'direction': np.dtype(np.int8),  # Index in DIRECTIONS
+        'cost': np.dtype(np.float64),
+        'path_cost': np.dtype(np.float64),
+    }
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+        index_path = self.__path(self.INDEX_FILE)
+        self.__drop_partial_index_line(index_path)
+        if not os.path.exists(index_path) or os.path.getsize(index_path) == 0:
+            with open(index_path, 'w') as index_file:
+                index_file.write(','.join(self.INDEX_COLUMNS) + '\n')
+        self.index: DataFrame = pd.read_csv(index_path, float_precision='round_trip', dtype=self.INDEX_TYPES)
+        self.rows: int = int((self.index['offset'] + self.index['length']).max()) if len(self.index) else 0
+        for name, dtype in self.COLUMNS.items():
+            with open(self.__path(name), 'ab') as column:
+                column.truncate(self.rows * dtype.itemsize)  # Drop rows of a task that was not added to the index
+
+    @staticmethod
+    def __drop_partial_index_line(index_path: str) -> None:
+        "Drops the last line of the index if its write was interrupted (no line break), its task is planned again."
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'rb+') as index_file:
+            content = index_file.read()
+            if content and not content.endswith(b'\n'):
+                index_file.truncate(content.rfind(b'\n') + 1)
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def finished_tasks(self) -> Set[Tuple[int, float]]:
+        return set(zip(self.index['flight_number'].tolist(), self.index['goal_greedy'].tolist()))
+
+    def append(self, flight_number: int, goal_greedy: float, cost: float, history: List[Dict]) -> None:
+        "Appends the path of one finished task (a result of ClassicPlanner.calculate_flight)."
+        columns = {
+            'x': [step['coordinates'][0] for step in history],
+            'y': [step['coordinates'][1] for step in history],
+            'z': [step['coordinates'][2] for step in history],
+            'time': [to_seconds(step['time']) for step in history],
+            'alpha': [step['alpha'] for step in history],
+            'direction': [DIRECTIONS.index(step['direction']) if 'direction' in step else -1 for step in history],
+            'cost': [step['cost'] for step in history],
+            'path_cost': [step['path_cost'] for step in history],
+        }
+        for name, dtype in self.COLUMNS.items():
+            with open(self.__path(name), 'ab') as column:
+                column.write(np.asarray(columns[name], dtype=dtype).tobytes())
+
+        row = [int(flight_number), float(goal_greedy), float(cost), self.rows, len(history)]
+        with open(self.__path(self.INDEX_FILE), 'a') as index_file:
+            index_file.write(','.join(repr(value) for value in row) + '\n')
+        task = DataFrame([row], columns=self.INDEX_COLUMNS)
+        self.index = pd.concat([self.index, task], ignore_index=True) if len(self.index) else task
+        self.rows += len(history)
+
+    def column(self, name: str) -> np.ndarray:
+        "Memory map of a column over all stored steps."
+        if self.rows == 0:
+            return np.empty(0, dtype=self.COLUMNS[name])
+        return np.memmap(self.__path(name), dtype=self.COLUMNS[name], mode='r', shape=(self.rows,))
+
+    def load_history(self, flight_number: int, goal_greedy: float) -> Optional[List[Dict]]:
+        "Reads the path of one task in the format of ClassicPlanner.get_path, or None if it is not stored."
+        task = self.index[(self.index['flight_number'] == flight_number) & (self.index['goal_greedy'] == goal_greedy)]
+        if len(task) == 0:
+            return None
+        start = int(task['offset'].iloc[-1])
+        rows = slice(start, start + int(task['length'].iloc[-1]))
+        columns = {name: self.column(name)[rows].tolist() for name in self.COLUMNS}
+
+        history = []
+        for i in range(rows.stop - rows.start):
+            step = {
+                'coordinates': [columns['x'][i], columns['y'][i], columns['z'][i]],
+                'time': EPOCH + timedelta(seconds=columns['time'][i]),
+                'cost': columns['cost'][i],
+                'alpha': columns['alpha'][i],
+                'path_cost': columns['path_cost'][i],
+            }
+            if columns['direction'][i] >= 0:
+                step['direction'] = DIRECTIONS[columns['direction'][i]]
+            history.append(step)
+        return history
+
+    def results_data_frame(self) -> DataFrame:
+        "Cost per flight (rows) and goal_greedy (columns), as stored in classic_results.csv."
+        return self.index.pivot_table(index='flight_number', columns='goal_greedy', values='cost', aggfunc='last').sort_index(axis=1, ascending=False)
@@ -0,0 +1,244 @@
+from typing import Tuple
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+
+class CPSolver(object):
+    REWARD_WEIGHT = 1000  # Weight of reward() in the integer objective of problemCostFunction
+    INTEGER_COST_SCALE = 1e6*10  # problemCosts scales the climate cost by 1e6 and the fuel by 10
+
+    def __init__(self,nrAirplanes,size,time,start,destination):
+        self.nrAirplanes = nrAirplanes
+        self.size_x,self.size_y,self.size_z = size
+        self.time = time
+        self.destination = destination
+        self.model = cp_model.CpModel()
+        self.createMap()
+        self.start = start
+
+    def createMap(self):
+        "Defines the size of the airspace, maximum number of timesteps, and the number of airplanes. "
+        T = []
+        indices = []
+        for t in range(self.time):
+            A = []
+            for a in range(self.nrAirplanes):
+                X = []
+                for x in range(self.size_x):
+                    Y = []
+                    for y in range(self.size_y):
+                        Z = []
+                        for z in range(self.size_z):
+                            C = []
+                            for c in [0,1,2]:
+                                C.append(self.model.NewIntVar(0, 1, 't%ia%ix%iy%iz%i%s' %(t,a,x,y,z,c)))
+                                indices.append(C[-1].Index())
+                            Z.append(C)
+                        Y.append(Z)
+                    X.append(Y)
+                A.append(X)
+            T.append(A)
+        self.qbits = T
+        # Position of every qbit in the solution vector of a CP-SAT response, shaped like qbits (t, a, x, y, z, c)
+        self.qbitIndices = np.array(indices).reshape((self.time, self.nrAirplanes, self.size_x, self.size_y, self.size_z, 3))
+
+    def possibleTrajectory(self):
+        """List of all possible trajectories any airplane can take.
+        Planes will:
+            - only move to neighbouring voxels
+            - not leave the defined grid
+            - change their altitude by at most one flight level
+            - stay at the destination once it has arrived there
+        """
+        for t in range(self.time-1):
+            for a in range(self.nrAirplanes):
+                for x in range(self.size_x):
+                    for y in range(self.size_y):
+                        for z in range(self.size_z):
+                            if [x,y,z] != self.destination[a]:
+                                self.model.Add(self.qbits[t+1][a][min(self.size_x-1,x+1)][y][max(0,z-1)][0]
+                                    + self.qbits[t+1][a][max(0,x-1)][y][max(0,z-1)][0]
+                                    + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][max(0,z-1)][0]
+                                    + self.qbits[t+1][a][x][max(0,y-1)][max(0,z-1)][0]
+
+                                    + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][z][1]
+                                    + self.qbits[t+1][a][max(0,x-1)][y][z][1]
+                                    + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][z][1]
+                                    + self.qbits[t+1][a][x][max(0,y-1)][z][1]
+
+
+                                    + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][min(self.size_z-1,z+1)][2]
+                                    + self.qbits[t+1][a][max(0,x-1)][y][min(self.size_z-1,z+1)][2]
+                                    + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][min(self.size_z-1,z+1)][2]
+                                    + self.qbits[t+1][a][x][max(0,y-1)][min(self.size_z-1,z+1)][2]
+                                    -self.qbits[t][a][x][y][z][0] -self.qbits[t][a][x][y][z][1] -self.qbits[t][a][x][y][z][2] >= 0)
+                            else:
+                                self.model.Add(self.qbits[t][a][x][y][z][0] + self.qbits[t][a][x][y][z][1] + self.qbits[t][a][x][y][z][2] <= self.qbits[t+1][a][x][y][z][1])
+
+    def avoidCrash(self):
+        "Prohibits two airplanes to be in the same voxel at the same time, no matter the maneuver."
+        for t in range(self.time):
+            for a1 in range(self.nrAirplanes):
+                for a2 in range(a1+1,self.nrAirplanes):
+                    for x in range(self.size_x):
+                        for y in range(self.size_y):
+                            for z in range(self.size_z):
+                                self.model.Add(self.qbits[t][a1][x][y][z][0] + self.qbits[t][a2][x][y][z][0]
+                                               + self.qbits[t][a1][x][y][z][1] + self.qbits[t][a2][x][y][z][1]
+                                               + self.qbits[t][a1][x][y][z][2] + self.qbits[t][a2][x][y][z][2] <= 1)
+
+    def flightlevel(self):
+        "Defines process of changing flight level by one."
+        for t in range(self.time-1):
+            for a in range(self.nrAirplanes):
+                for x in range(self.size_x):
+                    for y in range(self.size_y):
+                        for z in range(self.size_z):
+                            for c in [0,1,2]:
+                                self.model.Add(self.qbits[t][a][x][y][z][0]
+                                + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][z][c]
+                                + self.qbits[t+1][a][max(0,x-1)][y][z][c]
+                                + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][z][c]
+                                + self.qbits[t+1][a][x][max(0,y-1)][z][c] <= 1)
+                                if z!=self.size_z-1:
+                                    self.model.Add(self.qbits[t][a][x][y][z][0]
+                                    + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][z+1][c]
+                                    + self.qbits[t+1][a][max(0,x-1)][y][z+1][c]
+                                    + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][z+1][c]
+                                    + self.qbits[t+1][a][x][max(0,y-1)][z+1][c] <= 1)
+                                self.model.Add(self.qbits[t][a][x][y][z][2]
+                                + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][z][c]
+                                + self.qbits[t+1][a][max(0,x-1)][y][z][c]
+                                + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][z][c]
+                                + self.qbits[t+1][a][x][max(0,y-1)][z][c] <= 1)
+                                if z!=0:
+                                    self.model.Add(self.qbits[t][a][x][y][z][2]
+                                    + self.qbits[t+1][a][min(self.size_x-1,x+1)][y][z-1][c]
+                                    + self.qbits[t+1][a][max(0,x-1)][y][z-1][c]
+                                    + self.qbits[t+1][a][x][min(self.size_y-1,y+1)][z-1][c]
+                                    + self.qbits[t+1][a][x][max(0,y-1)][z-1][c] <= 1)
+
+
+
+    def addConstraints(self):
+        "Adds all the individual constraints to the model."
+        for a in range(self.nrAirplanes):
+            # Create Start
+            self.model.Add(self.qbits[0][a][self.start[a][0]][self.start[a][1]][self.start[a][2]][1] == 1)
+            # # Create destination
+            self.model.Add(self.qbits[self.time-1][a][self.destination[a][0]][self.destination[a][1]][self.destination[a][2]][0]
+                           +self.qbits[self.time-1][a][self.destination[a][0]][self.destination[a][1]][self.destination[a][2]][1]
+                           +self.qbits[self.time-1][a][self.destination[a][0]][self.destination[a][1]][self.destination[a][2]][2] == 1)
+            # Conserve number of planes
+            for t in range(self.time):
+                self.model.Add(self.planeConservation(self.qbits[t][a])==1)
+            # Define all trajectories
+            self.possibleTrajectory()
+            # Avoid crash between any two planes
+            self.avoidCrash()
+            # Defines change of flight level and associated cost.
+            self.flightlevel()
+
+    def planeConservation(self,mapbits):
+        "Conserves total number of planes in the system."
+        res = 0
+        for x in mapbits:
+            for y in x:
+                for z in y:
+                    for c in z:
+                        res+=c
+        return res
+
+    def problemCosts(self,problem,timeIndex: int = 0) -> np.ndarray:
+        """Cost of one time step in voxel (x, y, z) with maneuver c (0: descent, 1: cruise, 2: climb), shaped (x, y, z, c):
+        int(1e6*climate) of snapshot timeIndex times int(10*fuel) of the next flight level of a CompiledProblem."""
+        climate_cost = (1e6*problem.costs[:self.size_x,:self.size_y,:self.size_z,timeIndex]).astype(np.int64)
+        fuel_rows = np.arange(1,self.size_z+1)
+        costs = np.empty((self.size_x,self.size_y,self.size_z,3),dtype=np.int64)
+        costs[...,0] = (10*problem.fuel_descent[fuel_rows]).astype(np.int64)*climate_cost
+        costs[...,1] = (10*problem.fuel_cruise[fuel_rows]).astype(np.int64)*climate_cost
+        costs[...,2] = (10*problem.fuel_climb[fuel_rows]).astype(np.int64)*climate_cost
+        return costs
+
+    def problemFloatCosts(self,problem,timeIndex: int = 0) -> np.ndarray:
+        "Climate cost times fuel consumption (kg/min) per voxel and maneuver, shaped (x, y, z, c), without rounding."
+        climate_cost = np.asarray(problem.costs[:self.size_x,:self.size_y,:self.size_z,timeIndex],dtype=np.float64)
+        fuel_rows = np.arange(1,self.size_z+1)
+        fuel = np.stack([problem.fuel_descent[fuel_rows],problem.fuel_cruise[fuel_rows],problem.fuel_climb[fuel_rows]],axis=1)
+        return climate_cost[...,None]*fuel[None,None,:,:]
+
+    def problemCostFunction(self,problem,timeIndex: int = 0):
+        "Overall cost function: climate cost depending on fuel consumption and voxels traversed (see problemCosts)."
+        return self.objective(self.problemCosts(problem,timeIndex))
+
+    def quantizedCostFunction(self,problem,quantizer,timeIndex: int = 0):
+        """Cost function with the float costs of problemFloatCosts mapped to the smallest integers within the relative error
+        of the CostQuantizer, instead of int(1e6*climate)*int(10*fuel). quantizer.dequantize converts objective values back."""
+        return self.objective(quantizer.fit_quantize(self.problemFloatCosts(problem,timeIndex)))
+
+    def quantizedReward(self,quantizer):
+        """reward() with the weight REWARD_WEIGHT has relative to problemCosts, in the units of the fitted quantizer, so that
+        reward and quantized costs are traded off like in the integer objective. The weight is at least 1: at coarse
+        scales it would round to 0 and drop the reward from the objective."""
+        return max(1,int(quantizer.quantize(self.REWARD_WEIGHT/self.INTEGER_COST_SCALE)))*self.reward()
+
+    def trajectoryFloatCosts(self,problem,positions: np.ndarray,maneuvers: np.ndarray,timeIndex: int = 0) -> np.ndarray:
+        "Real cost (problemFloatCosts) per airplane and time step of trajectories of extractTrajectories, 0 at the destination."
+        costs = self.problemFloatCosts(problem,timeIndex)[positions[...,0],positions[...,1],positions[...,2],maneuvers]
+        costs[(positions == np.array(self.destination)[:,None,:]).all(axis=2)] = 0
+        return costs
+
+    def objective(self,costs: np.ndarray):
+        "Sum of the cost of every qbit outside the destination."
+        self.costs = costs  # Kept to evaluate trajectories without querying the solver per qbit
+        res = 0
+        for t in range(self.time):
+            for a in range(self.nrAirplanes):
+                for x in range(self.size_x):
+                    for y in range(self.size_y):
+                        for z in range(self.size_z):
+                            for c in [0,1,2]:
+                                if [x,y,z] != self.destination[a]:
+                                    res += self.qbits[t][a][x][y][z][c]*int(self.costs[x,y,z,c])
+        return res
+
+    def reward(self):
+        "Hands out reward for having reaching the destination at the final time step."
+        res = 0
+        for a in range(self.nrAirplanes):
+            res+=self.qbits[self.time-1][a][self.destination[a][0]][self.destination[a][1]][self.destination[a][2]][1]
+        return res
+
+    def solutionValues(self,response) -> np.ndarray:
+        "Values of all qbits, shaped like qbits (t, a, x, y, z, c), read in bulk from a CP-SAT response."
+        return np.asarray(response.solution)[self.qbitIndices]
+
+    def extractTrajectories(self,response) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Extracts the trajectories of a solution from a CP-SAT response (solver.ResponseProto() or callback.Response()).
+        Returns:
+            - positions of shape (nrAirplanes, time, 3) with the voxel (x, y, z) of each airplane per time step
+            - maneuvers of shape (nrAirplanes, time) with the active maneuver c per time step
+            - costs of shape (nrAirplanes, time) with the cost per time step (only if a cost function has been built)
+        """
+        values = self.solutionValues(response).transpose(1,0,2,3,4,5).reshape(self.nrAirplanes,self.time,-1)
+        # Plane conservation guarantees exactly one active qbit per airplane and time step
+        x,y,z,c = np.unravel_index(values.argmax(axis=2),(self.size_x,self.size_y,self.size_z,3))
+        positions = np.stack([x,y,z],axis=2)
+        costs = np.zeros((self.nrAirplanes,self.time),dtype=np.int64)
+        if hasattr(self,'costs'):
+            costs = self.costs[x,y,z,c]
+            costs[(positions == np.array(self.destination)[:,None,:]).all(axis=2)] = 0  # No cost at the destination
+        return positions,c,costs
+
+    def plotTrajectory(self,solver):
+        "Plots the resulting trajectory."
+        import matplotlib.pyplot as plt  # Only needed for plotting, solving works without matplotlib
+
+        positions,_,_ = self.extractTrajectories(solver.ResponseProto())
+        fig = plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+        for a in range(self.nrAirplanes):
+            ax.plot(positions[a,:,0], positions[a,:,1],positions[a,:,2], linestyle='-')
+            ax.scatter(*self.start[a])
+        plt.show()
@@ -0,0 +1,33 @@
+from typing import List
+
+
+class Scenario:
+    def __init__(self, name: str, nrAirplanes: int, size: List[int], time: int, start: List[List[int]], destination: List[List[int]]):
+        self.name: str = name
+        self.nrAirplanes: int = nrAirplanes
+        self.size: List[int] = size  # Number of voxels in x, y and z direction
+        self.time: int = time  # Maximum number of time steps
+        self.start: List[List[int]] = start  # One [x, y, z] start voxel per airplane
+        self.destination: List[List[int]] = destination  # One [x, y, z] destination voxel per airplane
+
+    def number_of_voxels(self) -> int:
+        return self.size[0] * self.size[1] * self.size[2]
+
+    def __repr__(self):
+        return f'{self.name}: {self.nrAirplanes} airplane(s), size {self.size}, time {self.time}'
+
+
+# Scenarios behind the plots in results_ortools (ortools_<nrAirplanes>_<size_x>_<size_y>_<size_z>.png)
+SCENARIOS: List[Scenario] = [
+    Scenario('ortools_1_5_5_1', 1, [5, 5, 1], 20, [[0, 0, 0]], [[3, 4, 0]]),
+    Scenario('ortools_1_5_5_3', 1, [5, 5, 3], 20, [[0, 0, 0]], [[3, 4, 2]]),
+    Scenario('ortools_1_5_5_5', 1, [5, 5, 5], 20, [[0, 0, 0]], [[3, 4, 4]]),
+    Scenario('ortools_1_10_10_5', 1, [10, 10, 5], 20, [[0, 0, 0]], [[7, 9, 4]]),
+    Scenario('ortools_2_5_5_3', 2, [5, 5, 3], 20, [[0, 0, 0], [2, 2, 0]], [[3, 4, 1], [1, 3, 2]]),
+    Scenario('ortools_3_5_5_3', 3, [5, 5, 3], 20, [[0, 0, 0], [2, 2, 0], [4, 4, 1]], [[3, 4, 1], [1, 3, 2], [0, 2, 1]]),
+    Scenario('ortools_4_5_5_3', 4, [5, 5, 3], 20, [[0, 0, 0], [2, 2, 0], [4, 4, 1], [1, 2, 0]], [[3, 4, 1], [1, 3, 2], [0, 2, 1], [4, 2, 1]]),
+    Scenario('ortools_2flights', 2, [6, 6, 3], 20, [[0, 0, 0], [5, 3, 2]], [[4, 2, 1], [2, 1, 0]]),
+    Scenario('ortools_4_10_10_5', 4, [10, 10, 5], 30, [[0, 0, 1], [5, 0, 1], [3, 0, 1], [6, 0, 1]], [[8, 3, 2], [2, 4, 4], [1, 7, 3], [1, 3, 3]]),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
@@ -0,0 +1,116 @@
+import tempfile
+import time as t
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import matplotlib
+from ortools.sat.python import cp_model
+from pandas import DataFrame
+
+from src.main.Paths import Paths
+from src.main.cpsat.CPSolver import CPSolver
+from src.main.cpsat.Scenario import SCENARIOS, Scenario
+from src.main.problem.CompiledProblem import CompiledProblem
+
+# The compiled problem is memory mapped once per worker process (see _initialize_worker) instead of parsed once per scenario
+_problem: Optional[CompiledProblem] = None
+
+
+def _initialize_worker(problem_directory: str) -> None:
+    global _problem
+    _problem = CompiledProblem.load(problem_directory)
+
+
+def run_scenario(scenario: Scenario, num_search_workers: int, max_time_in_seconds: Optional[float] = None) -> Dict:
+    t0 = t.time()
+    CP = CPSolver(scenario.nrAirplanes, scenario.size, scenario.time, scenario.start, scenario.destination)
+    CP.addConstraints()
+    t1 = t.time()
+    CP.model.Minimize(CP.problemCostFunction(_problem) - CP.REWARD_WEIGHT * CP.reward())  # Same objective as python -m src.main --backend cpsat
+    t2 = t.time()
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = num_search_workers  # Threads used by CP-SAT inside this job
+    if max_time_in_seconds is not None:
+        solver.parameters.max_time_in_seconds = max_time_in_seconds
+    status = solver.Solve(CP.model)
+    t3 = t.time()
+
+    found_solution = status == cp_model.OPTIMAL or status == cp_model.FEASIBLE
+    return {
+        'scenario': scenario.name,
+        'nrAirplanes': scenario.nrAirplanes,
+        'size_x': scenario.size[0],
+        'size_y': scenario.size[1],
+        'size_z': scenario.size[2],
+        'voxels': scenario.number_of_voxels(),
+        'time': scenario.time,
+        'num_search_workers': num_search_workers,
+        'constraints_s': t1 - t0,
+        # Objective built from the compiled cost array; the baseline scripts also looked up every cell in the climate data
+        # frame here, so these times are not comparable with the cost function times of the original plots
+        'cost_function_s': t2 - t1,
+        'solving_s': t3 - t2,
+        'status': solver.StatusName(status),
+        'objective': solver.ObjectiveValue() if found_solution else None,
+    }
+
+
+class ScenarioSweep:
+    PATH_TO_CLIMATE_CSV = Paths.material('climate.csv')
+    PATH_TO_BADA_CSV = Paths.material('bada_data.csv')
+    PATH_TO_RESULTS = Paths.RESULTS_ORTOOLS
+
+    def __init__(self, max_parallel_jobs: int = 1, num_search_workers: int = 5, max_time_in_seconds: Optional[float] = None):
+        self.max_parallel_jobs: int = max_parallel_jobs  # Number of scenarios solved at the same time (one process each)
+        self.num_search_workers: int = num_search_workers  # CP-SAT threads per scenario, i.e. max_parallel_jobs * num_search_workers cores are used
+        self.max_time_in_seconds: Optional[float] = max_time_in_seconds  # Optional time limit per solve
+
+    def run(self, scenarios: List[Scenario], results_csv: Optional[str] = None) -> DataFrame:
+        results_csv = results_csv or self.PATH_TO_RESULTS + '/ortools_sweep.csv'
+        rows = []
+        with tempfile.TemporaryDirectory() as problem_directory, ProcessPoolExecutor(
+                max_workers=self.max_parallel_jobs,
+                initializer=_initialize_worker,
+                initargs=(problem_directory,)
+        ) as executor:
+            CompiledProblem.from_material(self.PATH_TO_CLIMATE_CSV, self.PATH_TO_BADA_CSV).save(problem_directory)
+            futures = {
+                executor.submit(run_scenario, scenario, self.num_search_workers, self.max_time_in_seconds): scenario
+                for scenario in scenarios
+            }
+            for future in as_completed(futures):
+                row = future.result()
+                print(f'{futures[future]} -> {row["status"]} (constraints: {row["constraints_s"]:.2f} s, '
+                      f'cost function: {row["cost_function_s"]:.2f} s, solving: {row["solving_s"]:.2f} s)')
+                rows.append(row)
+                DataFrame(rows).to_csv(results_csv, index=False)  # Rewrite after each job, so an interrupted sweep keeps its finished scenarios
+
+        return DataFrame(rows)
+
+    def plot_scaling(self, results: DataFrame) -> None:
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        single_plane = results[results['nrAirplanes'] == 1].sort_values('voxels')
+        self.__plot_timings(plt, single_plane, 'voxels', 'number of voxels', self.PATH_TO_RESULTS + '/ortools_single_plane_scaling.png')
+
+        same_size = results[(results['size_x'] == 5) & (results['size_y'] == 5) & (results['size_z'] == 3)].sort_values('nrAirplanes')
+        self.__plot_timings(plt, same_size, 'nrAirplanes', 'number of airplanes', self.PATH_TO_RESULTS + '/ortools_plane_scaling.png')
+
+    def __plot_timings(self, plt, results: DataFrame, x_key: str, x_label: str, path: str) -> None:
+        fig = plt.figure()
+        ax = fig.add_subplot()
+        for key, label in [('constraints_s', 'constraints'), ('cost_function_s', 'cost function'), ('solving_s', 'solving')]:
+            ax.plot(results[x_key], results[key], marker='o', label=label)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel('time [s]')
+        ax.legend()
+        fig.savefig(path)
+        plt.close(fig)
+
+
+if __name__ == "__main__":
+    scenario_sweep = ScenarioSweep(max_parallel_jobs=2, num_search_workers=4)
+
+    sweep_results = scenario_sweep.run(SCENARIOS)
+    scenario_sweep.plot_scaling(sweep_results)
@@ -0,0 +1,77 @@
+import json
+import queue
+import threading
+from typing import Dict, List
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.main.cpsat.CPSolver import CPSolver
+
+
+class SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """Appends every improving solution to a JSON lines file while the solver keeps searching.
+    The callback only copies the solution vector and extracts the trajectories with NumPy, the file is written by a
+    background thread, so the search is not blocked by I/O. Use as a context manager or call close() after solving.
+    """
+
+    def __init__(self, cp_solver: CPSolver, path: str):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.__cp_solver = cp_solver
+        self.__path = path
+        self.__solution_count = 0
+        self.__best_objective = None
+        self.__queue: queue.Queue = queue.Queue()
+        self.__writer = threading.Thread(target=self.__write_solutions, daemon=True)
+        self.__writer.start()
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        if self.__best_objective is not None and objective >= self.__best_objective:
+            return  # Only improving solutions are streamed
+
+        self.__best_objective = objective
+        self.__solution_count += 1
+        positions, maneuvers, costs = self.__cp_solver.extractTrajectories(self.Response())
+        self.__queue.put({
+            'solution': self.__solution_count,
+            'objective': objective,
+            'wall_time': self.WallTime(),
+            'positions': positions.tolist(),
+            'maneuvers': maneuvers.tolist(),
+            'costs': costs.tolist(),
+        })
+
+    def __write_solutions(self):
+        with open(self.__path, 'a') as solutions_file:
+            while True:
+                solution = self.__queue.get()
+                if solution is None:  # Sentinel put by close()
+                    return
+                solutions_file.write(json.dumps(solution) + '\n')
+                solutions_file.flush()
+
+    def close(self):
+        self.__queue.put(None)
+        self.__writer.join()
+
+    def solution_count(self):
+        return self.__solution_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_solutions(path: str) -> List[Dict]:
+    "Reads a file written by SolutionStreamer, with positions, maneuvers and costs as NumPy arrays."
+    solutions = []
+    with open(path, 'r') as solutions_file:
+        for line in solutions_file:
+            solution = json.loads(line)
+            for key in ['positions', 'maneuvers', 'costs']:
+                solution[key] = np.array(solution[key])
+            solutions.append(solution)
+    return solutions
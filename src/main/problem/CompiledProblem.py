@@ -0,0 +1,321 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.main.Paths import Paths
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class CompiledProblem:
+    """Compiled representation of one dataset, shared by the CQM (ProblemDefinition), CP-SAT (CPSolver) and classic
+    (ClimateField, FuelTable) front ends, so the csv files are parsed and indexed only once per dataset.
+
+    - grid axes in degree and flight level, snapshot times in seconds since epoch
+    - costs: climate cost tensor of shape (longitude, latitude, flight level, time), NaN where the dataset has no voxel
+    - voxels: integer ids 0..n-1 (in grid order) with their grid cell, coordinates in meter and the label of the dataset
+    - fuel table per flight level: speed and rates of climb/descent, fuel consumption in kg/min
+    - flights with start and destination snapped to voxel ids
+    - optional CSR neighbour graph over the voxel ids and the distance limits it was built with (see build_neighbour_graph),
+      components that need other limits get a problem with a graph of their own (see with_neighbour_graph)
+
+    save() writes every array to a .npy file, load() memory maps them."""
+
+    METER_PER_DEGREE_LATITUDE: int = 111000
+    METER_PER_DEGREE_LONGITUDE: int = 85000
+    METER_PER_FLIGHT_LEVEL: float = 0.3048 * 100  # Same product as in Voxel
+    KNOTS_PER_METER_PER_SECOND: float = 1.94384
+
+    ARRAYS = [
+        'longitudes', 'latitudes', 'flight_levels', 'times', 'costs',
+        'voxel_ids', 'voxel_cells', 'voxel_labels', 'voxel_longitude_meter', 'voxel_latitude_meter', 'voxel_flight_level_meter',
+        'fuel_flight_levels', 'speed_kts', 'rate_of_climb_ft_min', 'rate_of_descent_ft_min', 'fuel_cruise', 'fuel_climb', 'fuel_descent',
+        'flight_numbers', 'flight_start_times', 'flight_start_flight_levels', 'flight_start_longitudes', 'flight_start_latitudes',
+        'flight_end_longitudes', 'flight_end_latitudes', 'flight_start_voxels', 'flight_destination_voxels'
+    ]
+    GRAPH_ARRAYS = ['neighbour_indptr', 'neighbour_indices']
+    METADATA_FILE = 'metadata.json'
+
+    def __init__(self, arrays: Dict[str, np.ndarray], name: str = '', neighbour_limits: Optional[Tuple[float, float]] = None):
+        self.name: str = name
+        self.longitudes: np.ndarray = arrays['longitudes']  # Sorted longitudes of the grid in degree
+        self.latitudes: np.ndarray = arrays['latitudes']  # Sorted latitudes of the grid in degree
+        self.flight_levels: np.ndarray = arrays['flight_levels']  # Sorted flight levels of the grid
+        self.times: np.ndarray = arrays['times']  # Sorted snapshot times in seconds since epoch
+        self.costs: np.ndarray = arrays['costs']  # Climate cost (MERGED) of shape (longitude, latitude, flight level, time)
+
+        self.voxel_ids: np.ndarray = arrays['voxel_ids']  # Voxel id per grid cell (longitude, latitude, flight level), -1 if the dataset has no such voxel
+        self.voxel_cells: np.ndarray = arrays['voxel_cells']  # Grid cell (longitude, latitude, flight level index) per voxel id, shape (n, 3)
+        self.voxel_labels: np.ndarray = arrays['voxel_labels']  # Index of the voxel in the dataset (INDEX column) per voxel id
+        self.voxel_longitude_meter: np.ndarray = arrays['voxel_longitude_meter']
+        self.voxel_latitude_meter: np.ndarray = arrays['voxel_latitude_meter']
+        self.voxel_flight_level_meter: np.ndarray = arrays['voxel_flight_level_meter']
+
+        self.fuel_flight_levels: np.ndarray = arrays['fuel_flight_levels']  # Flight levels of the fuel table (at least 100)
+        self.speed_kts: np.ndarray = arrays['speed_kts']  # True air speed
+        self.rate_of_climb_ft_min: np.ndarray = arrays['rate_of_climb_ft_min']
+        self.rate_of_descent_ft_min: np.ndarray = arrays['rate_of_descent_ft_min']
+        self.fuel_cruise: np.ndarray = arrays['fuel_cruise']  # Fuel consumption in kg/min
+        self.fuel_climb: np.ndarray = arrays['fuel_climb']
+        self.fuel_descent: np.ndarray = arrays['fuel_descent']
+
+        self.flight_numbers: np.ndarray = arrays['flight_numbers']
+        self.flight_start_times: np.ndarray = arrays['flight_start_times']  # Seconds since epoch
+        self.flight_start_flight_levels: np.ndarray = arrays['flight_start_flight_levels']
+        self.flight_start_longitudes: np.ndarray = arrays['flight_start_longitudes']  # Degree
+        self.flight_start_latitudes: np.ndarray = arrays['flight_start_latitudes']
+        self.flight_end_longitudes: np.ndarray = arrays['flight_end_longitudes']
+        self.flight_end_latitudes: np.ndarray = arrays['flight_end_latitudes']
+        self.flight_start_voxels: np.ndarray = arrays['flight_start_voxels']  # Closest voxel id to the start
+        self.flight_destination_voxels: np.ndarray = arrays['flight_destination_voxels']  # Closest voxel id to the destination (at the start flight level)
+
+        self.neighbour_indptr: Optional[np.ndarray] = arrays.get('neighbour_indptr')  # CSR neighbour graph: neighbours of voxel i are
+        self.neighbour_indices: Optional[np.ndarray] = arrays.get('neighbour_indices')  # neighbour_indices[neighbour_indptr[i]:neighbour_indptr[i + 1]]
+        self.neighbour_limits: Optional[Tuple[float, float]] = tuple(neighbour_limits) if neighbour_limits is not None else None  # Horizontal and vertical distance of the graph, None if unknown
+
+    @classmethod
+    def compile(cls, climate: DataFrame, fuel: DataFrame, flights: DataFrame, name: str = '') -> 'CompiledProblem':
+        """Builds the problem from data frames in a common format:
+        - climate: LONGITUDE and LATITUDE in degree, FL, TIME (datetime), MERGED and optionally INDEX
+        - fuel: FL, TAS [kts], ROC [ft/min], ROD [ft/min], fuel (cruise/climb/descent) in kg/min as fuel1, fuel2, fuel3
+        - flights: flight_number, start_time (datetime), start_flightlevel, start/end longitudinal/latitudinal in degree"""
+        longitudes = np.sort(climate['LONGITUDE'].unique()).astype(np.float64)
+        latitudes = np.sort(climate['LATITUDE'].unique()).astype(np.float64)
+        flight_levels = np.sort(climate['FL'].unique()).astype(np.int64)
+        times = cls.to_seconds(climate['TIME'])
+        unique_times = np.unique(times)
+
+        cells = (
+            np.searchsorted(longitudes, climate['LONGITUDE'].to_numpy()),
+            np.searchsorted(latitudes, climate['LATITUDE'].to_numpy()),
+            np.searchsorted(flight_levels, climate['FL'].to_numpy())
+        )
+        costs = np.full((len(longitudes), len(latitudes), len(flight_levels), len(unique_times)), np.nan)
+        costs[cells + (np.searchsorted(unique_times, times),)] = climate['MERGED'].to_numpy()
+
+        present = np.zeros(costs.shape[:3], dtype=bool)
+        present[cells] = True
+        voxel_ids = np.full(present.shape, -1, dtype=np.int64)
+        voxel_ids[present] = np.arange(present.sum())
+        voxel_cells = np.argwhere(present)  # In the order of the ids
+        labels = np.full(present.shape, -1, dtype=np.int64)
+        labels[cells] = climate['INDEX'].to_numpy() if 'INDEX' in climate else voxel_ids[cells]
+
+        fuel = fuel[fuel['FL'] >= 100].sort_values('FL')
+        arrays = {
+            'longitudes': longitudes,
+            'latitudes': latitudes,
+            'flight_levels': flight_levels,
+            'times': unique_times,
+            'costs': costs,
+            'voxel_ids': voxel_ids,
+            'voxel_cells': voxel_cells,
+            'voxel_labels': labels[present],
+            'voxel_longitude_meter': longitudes[voxel_cells[:, 0]] * cls.METER_PER_DEGREE_LONGITUDE,
+            'voxel_latitude_meter': latitudes[voxel_cells[:, 1]] * cls.METER_PER_DEGREE_LATITUDE,
+            'voxel_flight_level_meter': flight_levels[voxel_cells[:, 2]] * cls.METER_PER_FLIGHT_LEVEL,
+            'fuel_flight_levels': fuel['FL'].to_numpy(dtype=np.int64),
+            'speed_kts': fuel['TAS [kts]'].to_numpy(dtype=np.float64),
+            'rate_of_climb_ft_min': fuel['ROC [ft/min]'].to_numpy(dtype=np.float64),
+            'rate_of_descent_ft_min': fuel['ROD [ft/min]'].to_numpy(dtype=np.float64),
+            'fuel_cruise': fuel['fuel1'].to_numpy(dtype=np.float64),
+            'fuel_climb': fuel['fuel2'].to_numpy(dtype=np.float64),
+            'fuel_descent': fuel['fuel3'].to_numpy(dtype=np.float64),
+        }
+        problem = cls({**arrays, **cls.__flight_arrays(flights)}, name)
+        problem.__snap_flights()
+        return problem
+
+    @classmethod
+    def __flight_arrays(cls, flights: DataFrame) -> Dict[str, np.ndarray]:
+        "Flight arrays of a flights data frame in the format of compile(), without the voxels of start and destination."
+        return {
+            'flight_numbers': flights['flight_number'].to_numpy(dtype=np.int64),
+            'flight_start_times': cls.to_seconds(flights['start_time']),
+            'flight_start_flight_levels': flights['start_flightlevel'].to_numpy(dtype=np.int64),
+            'flight_start_longitudes': flights['start_longitudinal'].to_numpy(dtype=np.float64),
+            'flight_start_latitudes': flights['start_latitudinal'].to_numpy(dtype=np.float64),
+            'flight_end_longitudes': flights['end_longitudinal'].to_numpy(dtype=np.float64),
+            'flight_end_latitudes': flights['end_latitudinal'].to_numpy(dtype=np.float64),
+            'flight_start_voxels': np.empty(0, dtype=np.int64),
+            'flight_destination_voxels': np.empty(0, dtype=np.int64)
+        }
+
+    def __snap_flights(self) -> None:
+        self.flight_start_voxels = self.closest_voxels(self.flight_start_longitudes, self.flight_start_latitudes, self.flight_start_flight_levels)
+        self.flight_destination_voxels = self.closest_voxels(self.flight_end_longitudes, self.flight_end_latitudes, self.flight_start_flight_levels)
+
+    def derive(self, flights: Optional[DataFrame] = None, neighbour_graph: bool = True) -> 'CompiledProblem':
+        """Problem that shares the arrays (grid, climate, voxels, fuel table) of this one, with other flights in the format of
+        compile() and/or without the neighbour graph. Nothing is parsed or copied, so this is cheap for every request."""
+        neighbour_graph = neighbour_graph and self.neighbour_indptr is not None
+        arrays = {name: getattr(self, name) for name in self.ARRAYS + (self.GRAPH_ARRAYS if neighbour_graph else [])}
+        if flights is not None:
+            arrays.update(self.__flight_arrays(flights))
+        problem = CompiledProblem(arrays, self.name, self.neighbour_limits if neighbour_graph else None)
+        if flights is not None:
+            problem.__snap_flights()
+        return problem
+
+    def same_voxels(self, other: 'CompiledProblem') -> bool:
+        "Whether both problems have the same voxels at the same coordinates (so they can share a neighbour graph)."
+        return all(np.array_equal(getattr(self, name), getattr(other, name))
+                   for name in ['voxel_cells', 'voxel_longitude_meter', 'voxel_latitude_meter', 'voxel_flight_level_meter'])
+
+    def share_neighbour_graph(self, other: 'CompiledProblem') -> None:
+        "Uses the neighbour graph of a problem with the same voxels, this problem must not have a graph yet."
+        if self.neighbour_indptr is not None:
+            raise ValueError('The problem already has a neighbour graph')
+        if not self.same_voxels(other):
+            raise ValueError('The problems have different voxels')
+        self.neighbour_indptr, self.neighbour_indices, self.neighbour_limits = other.neighbour_indptr, other.neighbour_indices, other.neighbour_limits
+
+    @classmethod
+    def from_quantum_resources(cls, directory: str, problem_size: str) -> 'CompiledProblem':
+        "Compiles climate_cost_<size>.csv, bada_data.csv and flights_<size>.csv of src/resources/data."
+        climate = pd.read_csv(os.path.join(directory, 'climate_cost_' + problem_size + '.csv'), delimiter=',')
+        climate['TIME'] = pd.to_datetime(climate['TIME'])
+        fuel = pd.read_csv(os.path.join(directory, 'bada_data.csv'), delimiter=';', encoding='utf-8-sig').rename(columns={
+            'fuel (cruise) [kg/min]': 'fuel1', 'fuel (climb) [kg/min]': 'fuel2', 'fuel (descent) [kg/min]': 'fuel3'
+        })
+        flights = pd.read_csv(os.path.join(directory, 'flights_' + problem_size + '.csv'), delimiter=',')
+        flights['start_time'] = pd.to_datetime(flights['start_time'])
+        return cls.compile(climate, fuel, flights, problem_size)
+
+    @classmethod
+    def from_material(cls, climate_csv: Optional[str] = Paths.material('climate.csv'), bada_csv: str = Paths.material('bada_data.csv'),
+                      flights_csv: str = Paths.material('flights.csv'), climate: Optional[DataFrame] = None) -> 'CompiledProblem':
+        """Compiles the pre-processed data of the material folder (climate in meter, tab separated BADA data, flights of 2018-06-23).
+        Instead of climate_csv, a climate data frame in the common format of compile() can be given."""
+        if climate is None:
+            climate = pd.read_csv(climate_csv)
+            climate['LONGITUDE'] = climate['LONGITUDE'] / cls.METER_PER_DEGREE_LONGITUDE
+            climate['LATITUDE'] = climate['LATITUDE'] / cls.METER_PER_DEGREE_LATITUDE
+            climate['TIME'] = pd.to_datetime(climate['TIME'])
+        fuel = pd.read_csv(bada_csv, delimiter='\t')  # The first 'TAS [kts]' column belongs to cruise
+        flights = pd.read_csv(flights_csv, delimiter=';')
+        flights['start_time'] = pd.to_datetime('2018-06-23 ' + flights['start_time'])
+        return cls.compile(climate, fuel, flights, 'material')
+
+    @classmethod
+    def from_accf(cls, accf_csv: str = Paths.material('aCCF_0623_p_spec.csv'), bada_csv: str = Paths.material('bada_data.csv'),
+                  flights_csv: str = Paths.material('flights.csv')) -> 'CompiledProblem':
+        "Compiles the original climate data (in degree, every row twice) used by the classic approach."
+        climate = pd.read_csv(accf_csv)
+        climate = climate[climate['Unnamed: 0'] % 2 == 0]
+        climate['TIME'] = pd.to_datetime(climate['TIME'])
+        problem = cls.from_material(None, bada_csv, flights_csv, climate)
+        problem.name = 'accf'
+        return problem
+
+    @staticmethod
+    def to_seconds(times) -> np.ndarray:
+        return np.asarray(pd.to_datetime(times).to_numpy(), dtype='datetime64[us]').astype(np.int64) / 1e6
+
+    @staticmethod
+    def to_datetime(seconds: float) -> datetime:
+        return EPOCH + timedelta(seconds=float(seconds))
+
+    def number_of_voxels(self) -> int:
+        return len(self.voxel_cells)
+
+    def voxel_costs(self, time_index: int = 0) -> np.ndarray:
+        "Climate cost per voxel id at a snapshot."
+        cells = self.voxel_cells
+        return self.costs[cells[:, 0], cells[:, 1], cells[:, 2], time_index]
+
+    def fuel_row(self, flight_level: int) -> int:
+        "Row of the fuel table for a flight level."
+        return int(np.searchsorted(self.fuel_flight_levels, flight_level))
+
+    def closest_voxels(self, longitudes, latitudes, flight_levels) -> np.ndarray:
+        "Voxel ids closest (in meter) to the given points in degree and flight level; on a tie the lower id is chosen."
+        x = np.asarray(longitudes, dtype=np.float64)[:, None] * self.METER_PER_DEGREE_LONGITUDE - self.voxel_longitude_meter
+        y = np.asarray(latitudes, dtype=np.float64)[:, None] * self.METER_PER_DEGREE_LATITUDE - self.voxel_latitude_meter
+        z = np.asarray(flight_levels, dtype=np.float64)[:, None] * self.METER_PER_FLIGHT_LEVEL - self.voxel_flight_level_meter
+        return np.argmin(x ** 2 + y ** 2 + z ** 2, axis=1)
+
+    def build_neighbour_graph(self, max_horizontal_distance_m: float, max_vertical_distance_m: float) -> None:
+        """Connects every voxel with all other voxels within the given horizontal and vertical distance (CSR arrays).
+        A graph is never replaced, since other components may already use it: building it again with other limits fails."""
+        limits = (float(max_horizontal_distance_m), float(max_vertical_distance_m))
+        if self.neighbour_indptr is not None:
+            if self.neighbour_limits == limits:
+                return
+            raise ValueError(f'The problem already has a neighbour graph with the limits {self.neighbour_limits}, use with_neighbour_graph for {limits}')
+        indptr = np.zeros(self.number_of_voxels() + 1, dtype=np.int64)
+        indices = []
+        for voxel in range(self.number_of_voxels()):  # One row at a time keeps the memory linear in the number of edges
+            horizontal = np.sqrt(np.power(self.voxel_longitude_meter[voxel] - self.voxel_longitude_meter, 2)
+                                 + np.power(self.voxel_latitude_meter[voxel] - self.voxel_latitude_meter, 2))
+            vertical = np.absolute(self.voxel_flight_level_meter[voxel] - self.voxel_flight_level_meter)
+            neighbours = np.flatnonzero((horizontal <= max_horizontal_distance_m) & (vertical <= max_vertical_distance_m))
+            neighbours = neighbours[neighbours != voxel]
+            indices.append(neighbours)
+            indptr[voxel + 1] = indptr[voxel] + len(neighbours)
+        self.neighbour_indptr = indptr
+        self.neighbour_indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        self.neighbour_limits = limits
+
+    def with_neighbour_graph(self, max_horizontal_distance_m: float, max_vertical_distance_m: float) -> 'CompiledProblem':
+        """This problem if its neighbour graph has the given limits (it is built here if the problem has none yet), otherwise
+        a problem that shares all other arrays with this one and has a graph with these limits of its own."""
+        limits = (float(max_horizontal_distance_m), float(max_vertical_distance_m))
+        problem = self if self.neighbour_indptr is None or self.neighbour_limits == limits else self.derive(neighbour_graph=False)
+        problem.build_neighbour_graph(*limits)
+        return problem
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        "Start and end voxel id of every edge of the neighbour graph."
+        starts = np.repeat(np.arange(self.number_of_voxels()), np.diff(self.neighbour_indptr))
+        return starts, np.asarray(self.neighbour_indices)
+
+    def edge_costs(self, voxel_costs: np.ndarray) -> np.ndarray:
+        """Climate cost of flying along each edge of the neighbour graph: half of the distance is flown in each voxel, with the
+        fuel consumption of the flight direction (descent, climb, cruise) at the flight level of that voxel."""
+        starts, ends = self.edges()
+        distance = np.sqrt(
+            np.power(self.voxel_longitude_meter[starts] - self.voxel_longitude_meter[ends], 2)
+            + np.power(self.voxel_latitude_meter[starts] - self.voxel_latitude_meter[ends], 2)
+            + np.power(self.voxel_flight_level_meter[starts] - self.voxel_flight_level_meter[ends], 2)
+        )
+        start_levels = self.flight_levels[self.voxel_cells[starts, 2]]
+        end_levels = self.flight_levels[self.voxel_cells[ends, 2]]
+        descent = self.voxel_flight_level_meter[starts] > self.voxel_flight_level_meter[ends]
+        climb = self.voxel_flight_level_meter[starts] < self.voxel_flight_level_meter[ends]
+
+        def cost_per_voxel(levels, voxels):
+            rows = np.searchsorted(self.fuel_flight_levels, levels)
+            fuel_kg_min = np.where(descent, self.fuel_descent[rows], np.where(climb, self.fuel_climb[rows], self.fuel_cruise[rows]))
+            time_s = (distance / 2) / (self.speed_kts[rows] / self.KNOTS_PER_METER_PER_SECOND)
+            return voxel_costs[voxels] * ((fuel_kg_min / 60) * time_s)
+
+        return cost_per_voxel(start_levels, starts) + cost_per_voxel(end_levels, ends)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        arrays = self.ARRAYS + (self.GRAPH_ARRAYS if self.neighbour_indptr is not None else [])
+        for name in arrays:
+            np.save(os.path.join(directory, name + '.npy'), np.asarray(getattr(self, name)))
+        with open(os.path.join(directory, self.METADATA_FILE), 'w') as metadata:
+            json.dump({'name': self.name, 'arrays': arrays, 'neighbour_limits': self.neighbour_limits if self.neighbour_indptr is not None else None}, metadata)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'CompiledProblem':
+        "Loads a problem stored with save(), the arrays are memory mapped (read only) by default."
+        with open(os.path.join(directory, cls.METADATA_FILE)) as metadata_file:
+            metadata = json.load(metadata_file)
+        return cls({name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode) for name in metadata['arrays']}, metadata['name'],
+                   metadata.get('neighbour_limits'))  # Graphs saved without their limits count as built with unknown limits
+
+    @classmethod
+    def load_or_compile(cls, directory: str, compile_problem) -> 'CompiledProblem':
+        "Loads the problem from directory, or compiles it with compile_problem() and saves it there first."
+        if not os.path.exists(os.path.join(directory, cls.METADATA_FILE)):
+            compile_problem().save(directory)
+        return cls.load(directory)
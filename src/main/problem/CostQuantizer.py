@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class CostQuantizer:
+    """Maps float costs (climate cost x fuel of cells or edges) to the smallest integers that keep every cost within a
+    relative error of relative_error: weight = round(scale * cost) with scale = 0.5 / (relative_error * min_cost), where
+    min_cost is the smallest cost magnitude that has to meet the bound (by default the smallest non-zero one).
+    Smaller costs are only within an absolute error of 0.5 / scale, zero stays zero.
+
+    For non-negative costs every solution's quantized cost lies within (1 +- relative_error) of its real cost, so the
+    optimum of the quantized problem is at most relative_gap = 2 * relative_error / (1 - relative_error) worse than the
+    real optimum. With negative costs only the absolute bound holds, see absolute_gap."""
+
+    def __init__(self, relative_error: float = 0.01, min_cost: Optional[float] = None):
+        if not 0 < relative_error < 1:
+            raise ValueError('relative_error has to be between 0 and 1')
+        self.relative_error: float = relative_error
+        self.min_cost: Optional[float] = min_cost  # Costs with a smaller magnitude are not covered by the relative bound
+        self.scale: Optional[float] = None  # Set by fit
+        self.non_negative: bool = True  # Whether the fitted costs were all non-negative (the relative gap holds)
+        self.max_weight: int = 0  # Largest absolute integer weight of the fitted costs
+
+    def fit(self, costs: np.ndarray) -> 'CostQuantizer':
+        magnitudes = np.abs(np.asarray(costs, dtype=np.float64))
+        magnitudes = magnitudes[np.isfinite(magnitudes)]
+        min_cost = self.min_cost if self.min_cost is not None else (magnitudes[magnitudes > 0].min() if (magnitudes > 0).any() else 1.0)
+        self.scale = float(0.5 / (self.relative_error * min_cost))
+        self.non_negative = bool((np.asarray(costs)[np.isfinite(costs)] >= 0).all())
+        self.max_weight = int(np.round(self.scale * magnitudes.max())) if len(magnitudes) else 0
+        return self
+
+    def quantize(self, costs: np.ndarray) -> np.ndarray:
+        if self.scale is None:
+            raise ValueError('fit has to be called before quantize')
+        return np.round(self.scale * np.asarray(costs, dtype=np.float64)).astype(np.int64)
+
+    def fit_quantize(self, costs: np.ndarray) -> np.ndarray:
+        return self.fit(costs).quantize(costs)
+
+    def dequantize(self, weights) -> np.ndarray:
+        "Cost in the unit of the original costs (e.g. an objective value of the integer solver)."
+        return np.asarray(weights, dtype=np.float64) / self.scale
+
+    @property
+    def relative_gap(self) -> float:
+        "Bound of (real cost of the quantized optimum - real optimum) / real optimum, only valid for non-negative costs."
+        return 2 * self.relative_error / (1 - self.relative_error)
+
+    def absolute_gap(self, active_terms: int) -> float:
+        "Bound of the real cost difference for solutions made of at most active_terms costs, valid for any sign."
+        return active_terms / self.scale
+
+    def max_relative_error(self, costs: np.ndarray) -> float:
+        "Largest relative error of the given costs (zero costs are skipped)."
+        costs = np.asarray(costs, dtype=np.float64)
+        costs = costs[np.isfinite(costs) & (costs != 0)]
+        return float(np.max(np.abs(self.dequantize(self.quantize(costs)) - costs) / np.abs(costs))) if len(costs) else 0.0
+
+    def report(self) -> Dict:
+        return {
+            'relative_error': self.relative_error,
+            'scale': self.scale,
+            'max_weight': self.max_weight,
+            'relative_gap': self.relative_gap if self.non_negative else None,
+            'non_negative': self.non_negative
+        }
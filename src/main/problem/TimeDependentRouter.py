@@ -0,0 +1,128 @@
+import heapq
+import itertools
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.main.problem.CompiledProblem import CompiledProblem
+
+
+class Route(NamedTuple):
+    voxels: List[int]  # Voxel ids from start to destination
+    times: List[float]  # Time (seconds since epoch) at which each voxel is entered
+    cost: float  # Climate cost along the route with the real (not clipped) climate costs
+
+
+class TimeDependentRouter:
+    """Cheapest path over the neighbour graph of a CompiledProblem in which the climate cost depends on the time a voxel
+    is crossed. Arrival times follow from the distance and the airplane speed at the flight levels of the voxels, the
+    climate cost is taken from the closest snapshot or interpolated between the snapshots.
+    The search runs on states (voxel, arrival time rounded to time_resolution_s) that are generated when their predecessor
+    is expanded, so only the explored part of the time-expanded graph is ever held in memory.
+    Dijkstra needs non-negative costs: negative climate costs (a few cells of the data) count as 0 during the search, per
+    voxel, so the other half of an edge keeps its cost. Routes report the real costs."""
+
+    METER_PER_FLIGHT_LEVEL_STEP: float = 20 * CompiledProblem.METER_PER_FLIGHT_LEVEL
+
+    def __init__(self, problem: CompiledProblem, interpolate: bool = True, time_resolution_s: float = 1800,
+                 max_horizontal_distance_m: float = 4e5, max_vertical_distance_m: float = METER_PER_FLIGHT_LEVEL_STEP + 1):
+        problem = problem.with_neighbour_graph(max_horizontal_distance_m, max_vertical_distance_m)  # Default: one flight level step up or down
+        self.problem: CompiledProblem = problem  # Shares all arrays with the given problem, the graph only if it has these limits
+        self.interpolate: bool = interpolate  # Interpolate linearly between snapshots instead of using the closest one
+        self.time_resolution_s: float = time_resolution_s  # Arrival times within the same interval are one state
+        self.expanded_states: int = 0  # States taken from the queue in the last search
+        self.generated_states: int = 0  # States put into the queue in the last search
+
+        # Time independent part of every edge: half of the distance is flown in each voxel
+        starts, ends = problem.edges()
+        distance = np.sqrt(
+            np.power(problem.voxel_longitude_meter[starts] - problem.voxel_longitude_meter[ends], 2)
+            + np.power(problem.voxel_latitude_meter[starts] - problem.voxel_latitude_meter[ends], 2)
+            + np.power(problem.voxel_flight_level_meter[starts] - problem.voxel_flight_level_meter[ends], 2)
+        )
+        descent = problem.voxel_flight_level_meter[starts] > problem.voxel_flight_level_meter[ends]
+        climb = problem.voxel_flight_level_meter[starts] < problem.voxel_flight_level_meter[ends]
+        self.edge_times: List[np.ndarray] = []  # Time spent in the start and in the end voxel of each edge
+        self.edge_fuel: List[np.ndarray] = []  # Fuel burnt in the start and in the end voxel of each edge in kg
+        for voxels in [starts, ends]:
+            rows = np.searchsorted(problem.fuel_flight_levels, problem.flight_levels[problem.voxel_cells[voxels, 2]])
+            fuel_kg_min = np.where(descent, problem.fuel_descent[rows], np.where(climb, problem.fuel_climb[rows], problem.fuel_cruise[rows]))
+            time_s = (distance / 2) / (problem.speed_kts[rows] / CompiledProblem.KNOTS_PER_METER_PER_SECOND)
+            self.edge_times.append(time_s)
+            self.edge_fuel.append((fuel_kg_min / 60) * time_s)
+
+        cells = problem.voxel_cells
+        self.voxel_costs: np.ndarray = np.asarray(problem.costs[cells[:, 0], cells[:, 1], cells[:, 2], :])  # Shape (voxels, snapshots)
+
+    def climate_cost(self, voxels: np.ndarray, times: np.ndarray) -> np.ndarray:
+        "Climate cost of the voxels at the given times (seconds since epoch)."
+        snapshots = self.problem.times
+        if len(snapshots) == 1:
+            return self.voxel_costs[voxels, 0]
+        upper = np.clip(np.searchsorted(snapshots, times), 1, len(snapshots) - 1)
+        lower = upper - 1
+        if not self.interpolate:
+            closest = np.where(np.abs(snapshots[lower] - times) <= np.abs(snapshots[upper] - times), lower, upper)
+            return self.voxel_costs[voxels, closest]
+        weight = np.clip((times - snapshots[lower]) / (snapshots[upper] - snapshots[lower]), 0, 1)  # Constant before the first and after the last snapshot
+        return (1 - weight) * self.voxel_costs[voxels, lower] + weight * self.voxel_costs[voxels, upper]
+
+    def __expand(self, voxel: int, time: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Neighbours of a voxel entered at time, with their arrival time, the real cost of the edge and its search cost,
+        in which the climate cost of each of the two voxels is clipped at 0."""
+        edges = np.arange(self.problem.neighbour_indptr[voxel], self.problem.neighbour_indptr[voxel + 1])
+        neighbours = np.asarray(self.problem.neighbour_indices[edges])
+        middle = time + self.edge_times[0][edges]
+        arrival = middle + self.edge_times[1][edges]
+        start_climate = self.climate_cost(np.full(len(edges), voxel), np.full(len(edges), time))
+        end_climate = self.climate_cost(neighbours, middle)
+        cost = start_climate * self.edge_fuel[0][edges] + end_climate * self.edge_fuel[1][edges]
+        search_cost = np.maximum(start_climate, 0.0) * self.edge_fuel[0][edges] + np.maximum(end_climate, 0.0) * self.edge_fuel[1][edges]
+        return neighbours, arrival, cost, search_cost
+
+    def route(self, start_voxel: int, destination_voxel: int, start_time: float) -> Optional[Route]:
+        "Cheapest route from start_voxel (entered at start_time) to destination_voxel, None if it cannot be reached."
+        start = (start_voxel, int(start_time // self.time_resolution_s))
+        best: Dict[Tuple[int, int], float] = {start: 0.0}  # Search cost per state
+        parents: Dict[Tuple[int, int], Tuple[Optional[Tuple[int, int]], float, float]] = {start: (None, start_time, 0.0)}  # Predecessor, entry time and real cost
+        counter = itertools.count()  # Tie breaker, so states are never compared
+        queue = [(0.0, next(counter), start)]
+        self.expanded_states = 0
+        self.generated_states = 1
+
+        while queue:
+            search_cost, _, state = heapq.heappop(queue)
+            if search_cost > best[state]:
+                continue  # Outdated entry
+            self.expanded_states += 1
+            voxel = state[0]
+            _, time, cost = parents[state]
+            if voxel == destination_voxel:
+                return self.__route(state, parents)
+
+            neighbours, arrival, edge_cost, edge_search_cost = self.__expand(voxel, time)
+            for neighbour, neighbour_time, neighbour_cost, neighbour_search_cost in zip(neighbours.tolist(), arrival.tolist(), edge_cost.tolist(), edge_search_cost.tolist()):
+                next_state = (neighbour, int(neighbour_time // self.time_resolution_s))
+                next_search_cost = search_cost + neighbour_search_cost
+                if next_search_cost < best.get(next_state, np.inf):
+                    best[next_state] = next_search_cost
+                    parents[next_state] = (state, neighbour_time, cost + neighbour_cost)
+                    heapq.heappush(queue, (next_search_cost, next(counter), next_state))
+                    self.generated_states += 1
+        return None
+
+    @staticmethod
+    def __route(state, parents) -> Route:
+        voxels, times = [], []
+        cost = parents[state][2]
+        while state is not None:
+            parent, time, _ = parents[state]
+            voxels.append(state[0])
+            times.append(time)
+            state = parent
+        return Route(voxels[::-1], times[::-1], cost)
+
+    def route_flight(self, flight_index: int) -> Optional[Route]:
+        "Route of the flight in row flight_index of the problem."
+        return self.route(int(self.problem.flight_start_voxels[flight_index]), int(self.problem.flight_destination_voxels[flight_index]),
+                          float(self.problem.flight_start_times[flight_index]))
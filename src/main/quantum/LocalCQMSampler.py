@@ -0,0 +1,45 @@
+import random
+import threading
+import time
+import uuid
+from typing import AnyStr, Dict, Optional, Tuple
+
+from dimod import ConstrainedQuadraticModel, SampleSet
+
+
+class LocalCQMSampler:
+    """Offline stand-in for LeapHybridCQMSampler: waits a random simulated latency and returns num_reads random samples
+    of the CQM (energy and feasibility computed by dimod), with the same info fields as the hybrid solver.
+    Random samples are rarely feasible, use ProblemSolution.repair_lowest_energy_samples to turn them into paths.
+    Every job samples with a random generator of its own, seeded from seed, its label and how many jobs with that label
+    came before, so jobs sampled in parallel threads (ProblemSolver.solve_all) do not depend on the thread scheduling."""
+
+    def __init__(self, latency_s: Tuple[float, float] = (1.0, 3.0), num_reads: int = 20, active_probability: float = 0.01, seed: Optional[int] = None):
+        self.latency_s: Tuple[float, float] = latency_s  # Lower and upper bound of the simulated latency in seconds
+        self.num_reads: int = num_reads  # Number of samples per problem
+        self.active_probability: float = active_probability  # Probability that a binary variable is 1 in a sample
+        self.seed: Optional[int] = seed  # None samples differently on every run
+        self.__jobs_by_label: Dict[str, int] = {}  # Number of jobs sampled per label
+        self.__jobs_lock: threading.Lock = threading.Lock()
+
+    def job_random(self, label: AnyStr) -> random.Random:
+        "Random generator of the next job with the given label."
+        with self.__jobs_lock:
+            job = self.__jobs_by_label.get(label, 0)
+            self.__jobs_by_label[label] = job + 1
+        return random.Random(f'{self.seed}/{label}/{job}') if self.seed is not None else random.Random()
+
+    def sample_cqm(self, cqm: ConstrainedQuadraticModel, label: AnyStr = '') -> SampleSet:
+        start = time.perf_counter()
+        job_random = self.job_random(label)
+        latency_s = job_random.uniform(*self.latency_s)
+        samples = [{variable: int(job_random.random() < self.active_probability) for variable in cqm.variables} for _ in range(self.num_reads)]
+        time.sleep(max(latency_s - (time.perf_counter() - start), 0))  # The time to create the samples counts as latency
+
+        run_time_us = int((time.perf_counter() - start) * 1e6)
+        return SampleSet.from_samples_cqm(samples, cqm, info={
+            'run_time': run_time_us,  # Microseconds, like the hybrid solver
+            'qpu_access_time': 0,
+            'problem_id': str(uuid.uuid4()),
+            'problem_label': label
+        })
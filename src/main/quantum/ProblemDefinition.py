@@ -1,14 +1,12 @@
 import random
-from datetime import datetime
-from typing import AnyStr, List, Literal
+from typing import AnyStr, List, Literal, Optional
 from typing import Dict
 
 import numpy as np
-import pandas as pd
-from dimod import ConstrainedQuadraticModel, Binary, quicksum
-from dimod.sym import Sense
-from pandas import DataFrame
 
+from src.main.Paths import Paths
+from src.main.problem.CompiledProblem import CompiledProblem
+from src.main.problem.CostQuantizer import CostQuantizer
 from src.main.quantum.model.AirplaneDetails import AirplaneDetails
 from src.main.quantum.model.AirplaneSpeed import AirplaneSpeed
 from src.main.quantum.model.FlightDetails import FlightDetails
@@ -18,115 +16,101 @@ from src.main.quantum.model.Voxel import Voxel
 
 
 class ProblemDefinition:
-    __PATH_TO_CLIMATE_COST_CSV = '../../resources/data/climate_cost'
-    __PATH_TO_FUEL_CONSUMPTION_CSV = '../../resources/data/bada_data'
-    __PATH_TO_FLIGHTS_CSV = '../../resources/data/flights'
-
-    INDEX_KEY = "INDEX"
-    LONGITUDE_DEGREE_KEY = 'LONGITUDE'
-    LATITUDE_DEGREE_KEY = 'LATITUDE'
-    FLIGHT_LEVEL_KEY = 'FL'
-    TIME_KEY = 'TIME'
-    MERGED_KEY = 'MERGED'
-
-    TAS_KTS_KEY = 'TAS [kts]'
-    ROD_FT_PER_MIN_KEY = 'ROD [ft/min]'
-    ROC_FT_PER_MIN_KEY = 'ROC [ft/min]'
-    FUEL_CONSUMPTION_CRUISE_KEY = "fuel (cruise) [kg/min]"
-    FUEL_CONSUMPTION_DESCENT_KEY = "fuel (descent) [kg/min]"
-    FUEL_CONSUMPTION_CLIMB_KEY = "fuel (climb) [kg/min]"
+    __PATH_TO_DATA = Paths.DATA  # climate_cost_<size>.csv, bada_data.csv and flights_<size>.csv
 
     MAX_VOXEL_HORIZONTAL_DISTANCE_IN_METER = 4e5
     MAX_VOXEL_VERTICAL_DISTANCE_IN_METER = 4e2
 
-    def __init__(self, problem_size: Literal['small', 'medium', 'big'] = 'small', random_cost: bool = False):
+    def __init__(self, problem_size: Literal['small', 'medium', 'big'] = 'small', random_cost: bool = False, compiled_problem: Optional[CompiledProblem] = None,
+                 cost_quantizer: Optional[CostQuantizer] = None):
         self.__problem_size: Literal['small', 'medium', 'big'] = problem_size  # Define problem size (small: 6 x 6 x 1 for one flight; medium: 6 x 6 x 3 for two flights; big: full problem set)
         print(f'Running {self.__problem_size} problem set!')
 
         self.__random_cost: bool = random_cost  # Use random climate costs instead of the climate cost defined in csv
         print(f'Running with {"random costs" if self.__random_cost else "costs from data"}!')
 
+        self.cost_quantizer: Optional[CostQuantizer] = cost_quantizer  # Integer edge costs in the CQM objective within a relative error, None keeps the floats
+        self.compiled_problem: CompiledProblem = (compiled_problem or CompiledProblem.from_quantum_resources(self.__PATH_TO_DATA, problem_size)).with_neighbour_graph(
+            self.MAX_VOXEL_HORIZONTAL_DISTANCE_IN_METER, self.MAX_VOXEL_VERTICAL_DISTANCE_IN_METER)  # Parsed and indexed data set with the neighbour graph of the CQM: voxels which are too far away (horizontally or vertically) have no direct connection
+
         self.airplane_details = self.find_airplane_details()  # Define flight speed and fuel consumption for airplane
+        self.voxels: List[Voxel] = self.find_voxels()  # Define grid from climate cost voxels (position in the list is the voxel id of the compiled problem)
         self.cost_by_voxels: Dict[TimeVoxel: float] = self.find_cost_by_voxels()  # Define climate cost for each voxel
-        self.voxels: List[Voxel] = [time_voxel.voxel for time_voxel in self.cost_by_voxels.keys()]  # Define grid from climate cost voxels
         self.flight_details_by_flight_number: Dict[int, FlightDetails] = self.find_flight_details()  # Define flight start and destination
 
     def find_airplane_details(self) -> Dict[AnyStr, AirplaneDetails]:
-        df: DataFrame = pd.read_csv(self.__PATH_TO_FUEL_CONSUMPTION_CSV + ".csv", delimiter=';')  # Read in fuel consumption and flight speed depending on flight level
+        problem = self.compiled_problem
 
         return {
-            int(row[self.FLIGHT_LEVEL_KEY]): AirplaneDetails(
+            int(flight_level): AirplaneDetails(
                 AirplaneSpeed(
-                    int(row[self.FLIGHT_LEVEL_KEY]),  # Define flight speed for flight level
-                    float(row[self.TAS_KTS_KEY]),
-                    float(row[self.ROD_FT_PER_MIN_KEY]),
-                    float(row[self.ROC_FT_PER_MIN_KEY]),
+                    int(flight_level),  # Define flight speed for flight level
+                    float(problem.speed_kts[row]),
+                    float(problem.rate_of_descent_ft_min[row]),
+                    float(problem.rate_of_climb_ft_min[row]),
                 ),
                 FuelConsumption(  # Define fuel consumption for flight level
-                    int(row[self.FLIGHT_LEVEL_KEY]),
-                    float(row[self.FUEL_CONSUMPTION_CRUISE_KEY]),
-                    float(row[self.FUEL_CONSUMPTION_DESCENT_KEY]),
-                    float(row[self.FUEL_CONSUMPTION_CLIMB_KEY]),
+                    int(flight_level),
+                    float(problem.fuel_cruise[row]),
+                    float(problem.fuel_descent[row]),
+                    float(problem.fuel_climb[row]),
                 )
-            ) for [_, row] in df.iterrows()  # Map flight level to airplane details
+            ) for row, flight_level in enumerate(problem.fuel_flight_levels)  # Map flight level to airplane details
         }
 
+    def find_voxels(self) -> List[Voxel]:
+        problem = self.compiled_problem
+
+        return [
+            Voxel(
+                int(problem.voxel_labels[voxel_id]),  # The index of the data set names the binary variables of the CQM
+                int(problem.longitudes[longitude_index]),
+                int(problem.latitudes[latitude_index]),
+                int(problem.flight_levels[flight_level_index])
+            ) for voxel_id, (longitude_index, latitude_index, flight_level_index) in enumerate(problem.voxel_cells.tolist())
+        ]
+
     def find_cost_by_voxels(self) -> Dict:
-        df: DataFrame = pd.read_csv(self.__PATH_TO_CLIMATE_COST_CSV + "_" + self.__problem_size + ".csv", delimiter=',')  # Read in climate cost depending on voxel
+        problem = self.compiled_problem
+        voxel_costs = [problem.voxel_costs(time_index) for time_index in range(len(problem.times))]
 
         return {
             TimeVoxel(
-                Voxel(
-                    int(row[self.INDEX_KEY]),
-                    int(row[self.LONGITUDE_DEGREE_KEY]),
-                    int(row[self.LATITUDE_DEGREE_KEY]),
-                    int(row[self.FLIGHT_LEVEL_KEY])
-                ),
-                datetime.fromisoformat(row[self.TIME_KEY])
-            ): float(row[self.MERGED_KEY]) if not self.__random_cost else random.random()  # generate random climate cost for testing, if self.__random_cost is True
-            for [_, row] in df.iterrows()  # Map voxel (depending on time) to climate cost. The voxels define the grid
+                voxel,
+                problem.to_datetime(time)
+            ): float(voxel_costs[time_index][voxel_id]) if not self.__random_cost else random.random()  # generate random climate cost for testing, if self.__random_cost is True
+            for voxel_id, voxel in enumerate(self.voxels)
+            for time_index, time in enumerate(problem.times)
+            if not np.isnan(voxel_costs[time_index][voxel_id])  # Map voxel (depending on time) to climate cost. The voxels define the grid
         }
 
     def find_flight_details(self) -> Dict[int, FlightDetails]:
-        df: DataFrame = pd.read_csv(self.__PATH_TO_FLIGHTS_CSV + "_" + self.__problem_size + ".csv", delimiter=',')  # Read in flights
+        problem = self.compiled_problem
 
         return {
-            int(row.flight_number):
+            int(flight_number):
                 FlightDetails(
                     TimeVoxel(
-                        self.find_closest_voxel(  # Map start voxel to a voxel on the grid defined by the climate costs
-                            Voxel(
-                                None,  # No index has to be defined for the start voxel, as it will be mapped to an indexed voxel on the climate costs grid
-                                int(row.start_longitudinal),
-                                int(row.start_latitudinal),
-                                int(row.start_flightlevel),
-                            )
-                        ),
-                        datetime.fromisoformat(row.start_time)
+                        self.voxels[problem.flight_start_voxels[row]],  # Start voxel mapped to the closest voxel on the grid defined by the climate costs
+                        problem.to_datetime(problem.flight_start_times[row])
                     ),
                     TimeVoxel(
-                        self.find_closest_voxel(  # Map destination voxel to a voxel on the grid defined by the climate costs
-                            Voxel(
-                                None,  # No index has to be defined for the destination voxel, as it will be mapped to an indexed voxel on the climate costs grid
-                                int(row.end_longitudinal),
-                                int(row.end_latitudinal),
-                                int(row.start_flightlevel)
-                            )
-                        ),
+                        self.voxels[problem.flight_destination_voxels[row]],  # Destination voxel mapped to the closest voxel on the grid defined by the climate costs
                         None  # No time defined for the flight to arrive at the destination
                     )
                 )
-            for [_, row] in df.iterrows()  # Map flight number to flight details (start, destination)
+            for row, flight_number in enumerate(problem.flight_numbers)  # Map flight number to flight details (start, destination)
         }
 
     def find_closest_voxel(self, voxel: Voxel) -> Voxel:
-        index_of_closest_voxel_in_list = np.argmin(
-            [self.find_distance(voxel, voxel_on_grid) for voxel_on_grid in self.voxels]  # Calculate distance to other voxels
-        )
+        closest_voxel_id = self.compiled_problem.closest_voxels([voxel.longitude_degree], [voxel.latitude_degree], [voxel.flight_level])[0]
 
-        return self.voxels[index_of_closest_voxel_in_list]  # Return closest voxel on grid to input voxel
+        return self.voxels[closest_voxel_id]  # Return closest voxel on grid to input voxel
 
     def create_constraint_quadratic_model(self):
+        from dimod import ConstrainedQuadraticModel, Binary, quicksum  # dimod is only imported when a CQM is built
+        from dimod.sym import Sense
+
         cqm = ConstrainedQuadraticModel()  # Define CQM
 
         cost_for_neighbouring_voxels = self.find_cost_for_neighbouring_voxels()  # Calculate cost for travel to neighbours for each voxel
@@ -162,6 +146,9 @@ class ProblemDefinition:
         return cqm
 
     def add_active_neighbour_constraints(self, flight_detail, flight_number, selected_neighbours_constraint, cqm):
+        from dimod import quicksum
+        from dimod.sym import Sense
+
         for voxel, binary_variable_by_neighbour_voxel in selected_neighbours_constraint.items():
             for neighbour_voxel, neighbour_binary_variable in binary_variable_by_neighbour_voxel.items():
                 if neighbour_voxel == flight_detail.destination_voxel.voxel.index:
@@ -175,96 +162,29 @@ class ProblemDefinition:
                     next_neighbour_binary_variables), Sense.Eq, 1,
                                               label=f'next_neighbour_{flight_number}_{voxel}_{neighbour_voxel}')  # Only one of the binary variables representing travelling from a neighbour to its corresponding neighbours is allowed to be active (if one travelling to the initial neighbour is active)
 
-    def find_cost_for_neighbouring_voxels(self) -> Dict:
-        cost_between_neighbouring_voxels = {}
-        for time_voxel_start, cost_start in self.cost_by_voxels.items():
-            cost_between_neighbouring_voxels[time_voxel_start.voxel.index] = {}
-            for time_voxel_end, cost_end in self.cost_by_voxels.items():
-                if time_voxel_start.voxel == time_voxel_end.voxel:
-                    continue  # Same voxel -> no connection
-
-                if time_voxel_start.time != time_voxel_end.time:
-                    continue  # Ignore connections between voxel for different times
+    def find_edge_costs(self) -> np.ndarray:
+        "Climate cost of every edge of the neighbour graph of the compiled problem (in the order of CompiledProblem.edges)."
+        problem = self.compiled_problem
 
-                # if time_voxel_end.voxel.index in cost_between_neighbouring_voxels.keys():
-                #     if time_voxel_start.voxel.index in cost_between_neighbouring_voxels[time_voxel_end.voxel.index].keys():
-                #         continue
+        voxel_id_by_index = {voxel.index: voxel_id for voxel_id, voxel in enumerate(self.voxels)}
+        voxel_costs = np.empty(len(self.voxels))
+        for time_voxel, cost in self.cost_by_voxels.items():
+            voxel_costs[voxel_id_by_index[time_voxel.voxel.index]] = cost  # Connections are only between voxels of the same time, the last snapshot defines the cost
 
-                if self.find_horizontal_distance(time_voxel_start.voxel, time_voxel_end.voxel) > self.MAX_VOXEL_HORIZONTAL_DISTANCE_IN_METER:  # If the other voxel is too far away (horizontally), there will be no direct connection
-                    continue
+        return problem.edge_costs(voxel_costs)  # Climate cost between start voxel and end voxel (see CompiledProblem.edge_costs)
 
-                if self.find_vertical_distance(time_voxel_start.voxel, time_voxel_end.voxel) > self.MAX_VOXEL_VERTICAL_DISTANCE_IN_METER:  # If the other voxel is too far away (vertically), there will be no direct connection
-                    continue
+    def find_cost_for_neighbouring_voxels(self) -> Dict:
+        edge_costs = self.find_edge_costs()
+        if self.cost_quantizer is not None:
+            edge_costs = self.cost_quantizer.fit_quantize(edge_costs)  # See self.cost_quantizer.report() for the optimality gap
+        starts, ends = self.compiled_problem.edges()
 
-                cost_between_neighbouring_voxels[time_voxel_start.voxel.index][time_voxel_end.voxel.index] = self.calculate_cost(  # Calculate climate cost between start_voxel and end_voxel
-                    time_voxel_start.voxel,
-                    time_voxel_end.voxel,
-                    cost_start,
-                    cost_end
-                )
+        cost_between_neighbouring_voxels = {voxel.index: {} for voxel in self.voxels}
+        for start, end, cost in zip(starts.tolist(), ends.tolist(), edge_costs.tolist()):
+            cost_between_neighbouring_voxels[self.voxels[start].index][self.voxels[end].index] = cost
 
         return cost_between_neighbouring_voxels
 
-    def calculate_cost(self, voxel_start: Voxel, voxel_end: Voxel, cost_start_voxel: float, cost_end_voxel: float) -> float:
-        distance: float = self.find_distance(voxel_start, voxel_end)  # Find distance between voxels
-
-        flight_direction: str = self.find_flight_direction(voxel_start.flight_level_meter, voxel_end.flight_level_meter)  # Find flight direction (DESCENT, CLIMB, CRUISE) between voxels
-
-        cost_K_start = self.cost_per_voxel((distance / 2), flight_direction, voxel_start, cost_start_voxel)  # Calculate climate cost in start_voxel
-        cost_K_end = self.cost_per_voxel((distance / 2), flight_direction, voxel_end, cost_end_voxel)  # Calculate climate cost in destination voxel
-
-        return cost_K_start + cost_K_end  # Add climate cost in start_voxel and end_voxel
-
-    def find_distance(self, voxel_a: Voxel, voxel_b: Voxel) -> float:
-        return np.sqrt(
-            np.power(voxel_a.longitude_meter - voxel_b.longitude_meter, 2)
-            + np.power(voxel_a.latitude_meter - voxel_b.latitude_meter, 2)
-            + np.power(voxel_a.flight_level_meter - voxel_b.flight_level_meter, 2)
-        )
-
-    def find_vertical_distance(self, voxel_a: Voxel, voxel_b: Voxel) -> float:
-        return np.absolute(voxel_a.flight_level_meter - voxel_b.flight_level_meter)
-
-    def find_horizontal_distance(self, voxel_a: Voxel, voxel_b: Voxel) -> float:
-        return np.sqrt(
-            np.power(voxel_a.longitude_meter - voxel_b.longitude_meter, 2)
-            + np.power(voxel_a.latitude_meter - voxel_b.latitude_meter, 2)
-        )
-
-    def cost_per_voxel(self, distance: float, direction: str, voxel: Voxel, cost_in_voxel: float):
-        fuel_consumption_kg: float = self.calculate_fuel_consumption_in_voxel(distance, direction, voxel)  # Calculate fuel consumption in voxel (depends on flight direction: DESCENT, CLIMB, CRUISE)
-
-        return cost_in_voxel * fuel_consumption_kg
-
-    def calculate_fuel_consumption_in_voxel(self, distance: float, direction: str, voxel: Voxel) -> float:
-        fuel_consumption: float = self.find_fuel_consumption_for_flight_direction(direction, voxel)  # Define fuel consumption per second by flight direction (DESCENT, CLIMB, CRUISE)
-        time_s = self.calculate_time_in_voxel(distance, voxel)  # Find time in voxel, depending on airplane speed
-
-        return fuel_consumption * time_s
-
-    def find_fuel_consumption_for_flight_direction(self, direction: str, voxel: Voxel) -> float:
-        if direction == "DESCENT":
-            return self.airplane_details[voxel.flight_level].fuel_consumption.descent_fuel_consumption_kg_s  # Define fuel consumption for flight direction DESCENT
-
-        if direction == "CLIMB":
-            return self.airplane_details[voxel.flight_level].fuel_consumption.climb_fuel_consumption_kg_s  # Define fuel consumption for flight direction CLIMB
-
-        return self.airplane_details[voxel.flight_level].fuel_consumption.cruise_fuel_consumption_kg_s  # Define fuel consumption for flight direction CRUISE
-
-    def calculate_time_in_voxel(self, distance: float, voxel: Voxel) -> float:
-        airplane_speed: AirplaneSpeed = self.airplane_details[voxel.flight_level].airplane_speed  # Find airplane speed for flight level
-
-        return distance / airplane_speed.airplane_speed_m_s  # Calculate time to travel distance with airplane speed
-
-    def find_flight_direction(self, flight_level_start: float, flight_level_end: float) -> str:
-        if flight_level_start > flight_level_end:
-            return "DESCENT"
-
-        if flight_level_start < flight_level_end:
-            return "CLIMB"
-
-        return "CRUISE"
-
     def print_flight_details(self):
         for flight_number, flight_details in self.flight_details_by_flight_number.items():
             print(f'Flight details for flight number {flight_number}: {flight_details}')
@@ -1,17 +1,21 @@
 import random
 from typing import List, Dict, Literal
 
+import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.lines import Line2D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
+from src.main.Paths import Paths
 from src.main.quantum.model.Voxel import Voxel
 
 
 class ProblemPlotter:
-    __PATH_TO_FLIGHT_PATHS_FIGURES = '../../resources/quantum'
+    __PATH_TO_FLIGHT_PATHS_FIGURES = Paths.QUANTUM_FIGURES
 
-    def __init__(self, grid: List[Voxel]):
+    def __init__(self, grid: List[Voxel], dpi: int = 600):
 
-        self.__fig = plt.figure(dpi=600)
+        self.__fig = plt.figure(dpi=dpi)
         self.__ax = self.__fig.add_subplot(projection='3d')
 
         longitudinal_min, longitudinal_max = self.__find_longitudinal_range(grid)
@@ -48,22 +52,25 @@ class ProblemPlotter:
         return [voxel.flight_level for voxel in voxels]
 
     def plot(self, flight_paths: Dict[int, List[Voxel]], problem_size: Literal['small', 'medium', 'big', 'dummy']) -> None:
-
-        for flight_number, flight_path in flight_paths.items():
-            longitudinal_points = self.__find_longitudinal_values(flight_path)
-            latitudinal_points = self.__find_latitudinal_values(flight_path)
-            flight_level_points = self.__find_flight_level_values(flight_path)
-
-            self.__ax.plot(
-                longitudinal_points,
-                latitudinal_points,
-                flight_level_points,
-                alpha=0.5,
-                label=f'Flight number: {flight_number + 1}'
-            )
-
-        self.__fig.legend()
-        plt.savefig(self.__PATH_TO_FLIGHT_PATHS_FIGURES + '/flight_paths' + '_' + problem_size + '.png')
+        color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        segments, segment_colors, legend_handles = [], [], []
+
+        for position, (flight_number, flight_path) in enumerate(flight_paths.items()):
+            points = np.column_stack([
+                self.__find_longitudinal_values(flight_path),
+                self.__find_latitudinal_values(flight_path),
+                self.__find_flight_level_values(flight_path)
+            ])
+            color = color_cycle[position % len(color_cycle)]
+            segments.extend(np.stack([points[:-1], points[1:]], axis=1))  # One segment per edge of the flight path
+            segment_colors.extend([color] * (len(points) - 1))
+            legend_handles.append(Line2D([], [], color=color, alpha=0.5, label=f'Flight number: {flight_number + 1}'))
+
+        if segments:
+            self.__ax.add_collection3d(Line3DCollection(segments, colors=segment_colors, alpha=0.5))  # All flight paths are one artist
+
+        self.__fig.legend(handles=legend_handles)
+        self.__fig.savefig(self.__PATH_TO_FLIGHT_PATHS_FIGURES + '/flight_paths' + '_' + problem_size + '.png')
 
 if __name__ == '__main__':
     grid = [
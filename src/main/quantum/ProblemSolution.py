@@ -1,12 +1,15 @@
-from typing import AnyStr, List, Tuple, Dict
-
-from dimod import SampleSet
+from typing import AnyStr, List, Tuple, Dict, Optional, TYPE_CHECKING
 
+from src.main.quantum.ProblemDefinition import ProblemDefinition
+from src.main.quantum.SampleRepair import RepairedSample, SampleRepair
 from src.main.quantum.model.Voxel import Voxel
 
+if TYPE_CHECKING:
+    from dimod import SampleSet
+
 
 class ProblemSolution:
-    def __init__(self, cqm_sample_set: SampleSet | None):
+    def __init__(self, cqm_sample_set: 'SampleSet | None'):
         self.cqm_sample_set = cqm_sample_set
         self.__lowest_energy_flight_path, self.__lowest_cost = self.__find_lowest_energy_solution()
 
@@ -53,6 +56,29 @@ class ProblemSolution:
         print(f'Flight path is: {self.__lowest_energy_flight_path}\n'
               f'Cost is {self.__lowest_cost}')
 
+    def repair_lowest_energy_samples(self, problem_definition: ProblemDefinition, top_k: int = 10) -> Optional[RepairedSample]:
+        """Repairs the top_k samples with the lowest energy, feasible or not, into valid paths (see SampleRepair) and returns
+        the repaired sample with the lowest climate cost, None if no sample could be repaired."""
+        df = self.cqm_sample_set.to_pandas_dataframe(True)
+        lowest_energy_samples = df.iloc[df["energy"].argsort()[:top_k]]  # Infeasible samples are often almost a valid path
+
+        sample_repair = SampleRepair(problem_definition)
+        repaired_samples = [sample_repair.repair(sample) for sample in lowest_energy_samples["sample"]]
+        repaired_samples = [repaired_sample for repaired_sample in repaired_samples if repaired_sample is not None]
+        if not repaired_samples:
+            print("No sample could be repaired!")
+            return None
+
+        return min(repaired_samples, key=lambda repaired_sample: repaired_sample.cost)
+
+    def find_repaired_flight_paths(self, problem_definition: ProblemDefinition, top_k: int = 10) -> Dict[int, List[Voxel]]:
+        "Flight paths of the best repaired sample (see repair_lowest_energy_samples), in the format of find_flight_paths."
+        repaired_sample = self.repair_lowest_energy_samples(problem_definition, top_k)
+        if repaired_sample is None:
+            return {}
+
+        return {flight_number: [problem_definition.voxels[voxel_id] for voxel_id in path] for flight_number, path in repaired_sample.flight_paths.items()}
+
     def find_flight_paths(self, voxels: List[Voxel]):
         return self.__parse_solution(self.__lowest_energy_flight_path, voxels)
 
@@ -1,27 +1,92 @@
-from typing import Literal
-
-from dimod import SampleSet
-from dwave.system import LeapHybridCQMSampler
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AnyStr, Dict, Iterable, Iterator, Literal, NamedTuple, Tuple, TYPE_CHECKING
 
 from src.main.quantum.ProblemDefinition import ProblemDefinition
-from src.main.quantum.ProblemPlotter import ProblemPlotter
 from src.main.quantum.ProblemSolution import ProblemSolution
 
+if TYPE_CHECKING:
+    from dimod import SampleSet
+
+
+class JobTiming(NamedTuple):
+    build_s: float  # Time to create the CQM
+    queue_s: float  # Time between the CQM being ready and the sampler being called (waiting for a free slot)
+    sample_s: float  # Time until the sample set was returned by the sampler
+    total_s: float  # Time from the start of the build until the sampler returned
+
+
+class SolvedJob(NamedTuple):
+    label: AnyStr
+    problem_definition: ProblemDefinition
+    problem_solution: ProblemSolution
+    timing: JobTiming
+
 
 class ProblemSolver:
-    def __init__(self):
-        self.cqm_sampler = LeapHybridCQMSampler()
+    def __init__(self, cqm_sampler=None):
+        self.__cqm_sampler = cqm_sampler  # Any object with sample_cqm(cqm, label), e.g. LocalCQMSampler for offline runs
+
+    @property
+    def cqm_sampler(self):
+        if self.__cqm_sampler is None:
+            from dwave.system import LeapHybridCQMSampler  # Only needed (and connecting to Leap) when sampling on D'Wave
+            self.__cqm_sampler = LeapHybridCQMSampler()
+        return self.__cqm_sampler
 
     def solve(self, problem_definition: ProblemDefinition) -> ProblemSolution:
         cqm = problem_definition.create_constraint_quadratic_model()  # Define CQM
 
         print("Defined constrained quadratic model! Sampling on CQM-Solver.")
-        cqm_sample_set: SampleSet = self.cqm_sampler.sample_cqm(cqm, label='QuantumChallenge')  # Sample CQM on D'Wave
+        cqm_sample_set: 'SampleSet' = self.cqm_sampler.sample_cqm(cqm, label='QuantumChallenge')  # Sample CQM on D'Wave
 
         return ProblemSolution(cqm_sample_set)  # Return solution
 
+    def __sample(self, cqm, label: AnyStr, ready: float) -> Tuple['SampleSet', float, float, float]:
+        started = time.perf_counter()
+        cqm_sample_set: 'SampleSet' = self.cqm_sampler.sample_cqm(cqm, label=label)
+        if hasattr(cqm_sample_set, 'resolve'):
+            cqm_sample_set.resolve()  # Sample sets of the hybrid solver are returned before the result is available
+        finished = time.perf_counter()
+        return cqm_sample_set, started - ready, finished - started, finished
+
+    def solve_all(self, problem_definitions: Iterable[Tuple[AnyStr, ProblemDefinition]], max_in_flight: int = 2) -> Iterator[SolvedJob]:
+        """Submits the (label, problem definition) pairs and yields a SolvedJob whenever a job is finished, not in the order
+        of submission. The CQM of the next problem is created while up to max_in_flight earlier jobs are sampling; once
+        max_in_flight jobs are running, the next one is only submitted after one of them finished.
+        Problem definitions are taken from the iterable one at a time, so a generator can create them lazily."""
+        self.cqm_sampler  # Create the sampler before the threads are started
+        in_flight: Dict[Future, Tuple[AnyStr, ProblemDefinition, float, float]] = {}
+
+        def finished_jobs(block: bool) -> Iterator[SolvedJob]:
+            done, _ = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                label, problem_definition, build_started, build_s = in_flight.pop(future)
+                cqm_sample_set, queue_s, sample_s, finished = future.result()
+                timing = JobTiming(build_s, queue_s, sample_s, finished - build_started)
+                print(f'Job {label} finished: build {build_s:.2f} s, queue {queue_s:.2f} s, sampling {sample_s:.2f} s, total {timing.total_s:.2f} s')
+                yield SolvedJob(label, problem_definition, ProblemSolution(cqm_sample_set), timing)
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:  # Threads wait for the sampler, the CQMs are built in this thread
+            for label, problem_definition in problem_definitions:
+                build_started = time.perf_counter()
+                cqm = problem_definition.create_constraint_quadratic_model()
+                ready = time.perf_counter()
+                build_s = ready - build_started
+
+                while len(in_flight) >= max_in_flight:
+                    yield from finished_jobs(block=True)
+                future = executor.submit(self.__sample, cqm, label, ready)
+                in_flight[future] = (label, problem_definition, build_started, build_s)
+                yield from finished_jobs(block=False)  # Jobs that finished while building
+
+            while in_flight:
+                yield from finished_jobs(block=True)
+
 
 if __name__ == "__main__":
+    from src.main.quantum.ProblemPlotter import ProblemPlotter
+
     problem_size: Literal['small', 'medium', 'big'] = "small"
     print("Start solving problem!")
     problem_definition = ProblemDefinition(problem_size)
@@ -0,0 +1,127 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from src.main.quantum.ProblemDefinition import ProblemDefinition
+
+
+class RepairedSample(NamedTuple):
+    flight_paths: Dict[int, List[int]]  # Flight number to the voxel ids of its path from start to destination
+    cost: float  # Climate cost of all paths (sum of the edge costs of the CQM objective)
+    flight_costs: Dict[int, float]  # Climate cost per flight
+    spliced_edges: int  # Number of edges that were not active in the sample
+
+
+class SampleRepair:
+    """Turns samples of the CQM (feasible or not) into valid start -> destination paths for every flight.
+    The active edges of a flight are followed from the start voxel (prefix) and backwards from the destination voxel
+    (suffix). If they do not meet, the cheapest path over the neighbour graph from the end of the prefix to any voxel of
+    the suffix is spliced in, so as much of the sample as possible is kept.
+    Negative climate costs count as 0 while searching the splice, the returned cost uses the real edge costs."""
+
+    def __init__(self, problem_definition: ProblemDefinition):
+        self.problem_definition: ProblemDefinition = problem_definition
+        self.edge_costs: np.ndarray = problem_definition.find_edge_costs()
+        problem = problem_definition.compiled_problem
+        self.neighbour_indptr: List[int] = np.asarray(problem.neighbour_indptr).tolist()
+        self.neighbour_indices: List[int] = np.asarray(problem.neighbour_indices).tolist()
+        self.search_costs: List[float] = np.maximum(self.edge_costs, 0).tolist()
+        starts, ends = problem.edges()
+        self.edge_by_voxels: Dict[Tuple[int, int], int] = {edge: i for i, edge in enumerate(zip(starts.tolist(), ends.tolist()))}
+        self.voxel_id_by_index: Dict[int, int] = {voxel.index: voxel_id for voxel_id, voxel in enumerate(problem_definition.voxels)}
+        self.start_and_destination_by_flight_number: Dict[int, Tuple[int, int]] = {
+            flight_number: (self.voxel_id_by_index[flight_details.start_voxel.voxel.index], self.voxel_id_by_index[flight_details.destination_voxel.voxel.index])
+            for flight_number, flight_details in problem_definition.flight_details_by_flight_number.items()
+        }
+
+    def active_edges(self, sample: Mapping[str, float]) -> Dict[int, List[Tuple[int, int]]]:
+        "Active edges (start and end voxel id) per flight of a sample, read from the names of the binary variables."
+        edges_by_flight_number = defaultdict(list)
+        for binary_variable, value in sample.items():
+            if value != 1:
+                continue
+            splitted_string = binary_variable.split("_")  # flight_<flight number>_between_voxels_<voxel index>_<voxel index>
+            edges_by_flight_number[int(splitted_string[1])].append(
+                (self.voxel_id_by_index[int(splitted_string[4])], self.voxel_id_by_index[int(splitted_string[5])]))
+        return edges_by_flight_number
+
+    def path_cost(self, path: List[int]) -> float:
+        return float(sum(self.edge_costs[self.edge_by_voxels[edge]] for edge in zip(path[:-1], path[1:])))
+
+    def __cheapest_paths(self, source: int, blocked: Set[int], targets: Set[int]) -> Tuple[Dict[int, float], Dict[int, int]]:
+        "Dijkstra from source. Blocked voxels are never entered, targets are entered but not left."
+        distances = {source: 0.0}
+        parents = {}
+        queue = [(0.0, source)]
+        while queue:
+            distance, voxel = heapq.heappop(queue)
+            if distance > distances[voxel] or (voxel in targets and voxel != source):
+                continue
+            for edge in range(self.neighbour_indptr[voxel], self.neighbour_indptr[voxel + 1]):
+                neighbour = self.neighbour_indices[edge]
+                if neighbour in blocked:
+                    continue
+                neighbour_distance = distance + self.search_costs[edge]
+                if neighbour_distance < distances.get(neighbour, np.inf):
+                    distances[neighbour] = neighbour_distance
+                    parents[neighbour] = voxel
+                    heapq.heappush(queue, (neighbour_distance, neighbour))
+        return distances, parents
+
+    def __chain(self, first: int, next_voxels: Dict[int, List[int]], visited: Set[int]) -> List[int]:
+        "Follows the active edges from first as long as they lead to a voxel that is not visited yet (cheapest edge first)."
+        chain = [first]
+        visited.add(first)
+        while True:
+            following = [voxel for voxel in next_voxels.get(chain[-1], []) if voxel not in visited]
+            if not following:
+                return chain
+            chain.append(following[0])
+            visited.add(following[0])
+
+    def repair_flight(self, flight_number: int, edges: List[Tuple[int, int]]) -> Optional[List[int]]:
+        "Path from start to destination of the flight that keeps the active edges at both ends, None if none exists."
+        start, destination = self.start_and_destination_by_flight_number[flight_number]
+        edges = sorted(edges, key=lambda edge: self.edge_costs[self.edge_by_voxels[edge]])
+        successors, predecessors = defaultdict(list), defaultdict(list)
+        for voxel, neighbour in edges:
+            successors[voxel].append(neighbour)
+            predecessors[neighbour].append(voxel)
+
+        visited: Set[int] = {destination}  # The prefix may end at the destination, but must not pass it
+        prefix = self.__chain(start, successors, visited)
+        if prefix[-1] == destination:
+            return prefix
+        visited.discard(destination)
+        suffix = self.__chain(destination, predecessors, visited)[::-1]  # Does not contain voxels of the prefix
+
+        for source, blocked in [(prefix[-1], set(prefix[:-1])), (start, set())]:  # Without a path from the end of the prefix, the prefix is dropped
+            targets = set(suffix) - {source}
+            distances, parents = self.__cheapest_paths(source, blocked, targets)
+            remaining = [self.path_cost(suffix[i:]) for i in range(len(suffix))]  # Cost from each voxel of the suffix to the destination
+            reachable = [i for i, voxel in enumerate(suffix) if voxel in distances]
+            if not reachable:
+                continue
+            target = min(reachable, key=lambda i: distances[suffix[i]] + remaining[i])
+            splice = [suffix[target]]
+            while splice[-1] != source:
+                splice.append(parents[splice[-1]])
+            head = prefix[:-1] if source == prefix[-1] else []
+            return head + splice[::-1] + suffix[target + 1:]
+        return None
+
+    def repair(self, sample: Mapping[str, float]) -> Optional[RepairedSample]:
+        "Repaired paths of all flights of a sample, None if a flight cannot reach its destination over the neighbour graph."
+        edges_by_flight_number = self.active_edges(sample)
+        flight_paths, flight_costs, spliced_edges = {}, {}, 0
+        for flight_number in self.start_and_destination_by_flight_number:
+            edges = edges_by_flight_number.get(flight_number, [])
+            path = self.repair_flight(flight_number, edges)
+            if path is None:
+                return None
+            flight_paths[flight_number] = path
+            flight_costs[flight_number] = self.path_cost(path)
+            spliced_edges += len(set(zip(path[:-1], path[1:])) - set(edges))
+        return RepairedSample(flight_paths, sum(flight_costs.values()), flight_costs, spliced_edges)
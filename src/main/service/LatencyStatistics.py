@@ -0,0 +1,35 @@
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+import numpy as np
+
+
+class LatencyStatistics:
+    "Latencies of the last window requests per kind of request (e.g. 'route shortest-path'), safe to record from many threads."
+
+    def __init__(self, window: int = 1000):
+        self.window: int = window
+        self.__latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self.__requests: Dict[str, int] = defaultdict(int)  # All requests since the start, not only the window
+        self.__lock: threading.Lock = threading.Lock()
+
+    def record(self, kind: str, latency_s: float) -> None:
+        with self.__lock:
+            self.__latencies[kind].append(latency_s)
+            self.__requests[kind] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        "Number of requests and mean, median, 95th percentile and maximum latency in seconds per kind."
+        with self.__lock:
+            latencies = {kind: np.array(values) for kind, values in self.__latencies.items()}
+            requests = dict(self.__requests)
+        return {
+            kind: {
+                'requests': requests[kind],
+                'mean_s': float(values.mean()),
+                'p50_s': float(np.percentile(values, 50)),
+                'p95_s': float(np.percentile(values, 95)),
+                'max_s': float(values.max())
+            } for kind, values in latencies.items()
+        }
@@ -0,0 +1,113 @@
+"""Local HTTP front end of the PlanningService: python -m src.main.service.PlanningServer [--dataset accf] [--port 8080]
+
+- GET /status: loaded climate, backends and latency statistics per kind of request
+- POST /route: JSON {"backend": "shortest-path", "options": {...}, "queries": [{"start": [lon, lat], "destination": [lon, lat],
+  "flight_level": 300, "time": "2018-06-23 07:00:00"}]}, a single query can also be given without "queries"
+- POST /flights?backend=cpsat: csv body in the format of the flights files, further query parameters are backend options
+- POST /climate: JSON {"dataset": "quantum", "size": "medium"} or {"directory": "<saved CompiledProblem>"}, swaps the climate.
+  Other keys are rejected, the directory is relative to the repository and may not lead out of it
+
+Every response contains latency_s (from reading the request to writing the response), planning responses also queue_s and plan_s."""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from src.main.Paths import Paths
+from src.main.service.PlanningService import PlanningService
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    server: 'PlanningServer'
+
+    CLIMATE_KEYS = ('dataset', 'size', 'directory')  # Accepted by POST /climate
+
+    def __body(self) -> str:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+
+    def __respond(self, status: int, response: Dict, kind: str, start: float) -> None:
+        response['latency_s'] = time.perf_counter() - start
+        if status == 200:
+            self.server.service.statistics.record(kind, response['latency_s'])
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __handle(self, method: str) -> None:
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        kind = url.path
+        try:
+            status, response, kind = self.__dispatch(method, url.path, dict(parse_qsl(url.query)))
+        except (ValueError, KeyError, TypeError) as error:  # Invalid request
+            status, response = 400, {'error': f'{type(error).__name__}: {error}'}
+        except Exception as error:
+            status, response = 500, {'error': f'{type(error).__name__}: {error}'}
+        self.__respond(status, response, kind, start)
+
+    def __dispatch(self, method: str, path: str, parameters: Dict[str, str]) -> Tuple[int, Dict, str]:
+        "Status, response and kind of request (for the latency statistics)."
+        service = self.server.service
+        if method == 'GET' and path == '/status':
+            return 200, service.status(), path
+        if method == 'POST' and path == '/route':
+            request = json.loads(self.__body())
+            backend = request.get('backend', 'shortest-path')
+            return 200, service.route(request.get('queries', [request]), backend, request.get('options')), f'{path} {backend}'
+        if method == 'POST' and path == '/flights':
+            backend = parameters.pop('backend', 'shortest-path')
+            return 200, service.plan_csv(self.__body(), backend, parameters), f'{path} {backend}'
+        if method == 'POST' and path == '/climate':
+            return 200, service.swap_climate(**self.__climate_request(json.loads(self.__body()))), path
+        return 404, {'error': f'No {method} {path}'}, path
+
+    def __climate_request(self, request: Dict) -> Dict:
+        "Arguments of swap_climate from the body of POST /climate."
+        unknown = [key for key in request if key not in self.CLIMATE_KEYS]
+        if unknown:
+            raise ValueError(f'Unknown keys {unknown}, use {list(self.CLIMATE_KEYS)}')
+        if request.get('directory') is not None:
+            request['directory'] = Paths.in_repository(str(request['directory']))
+        return request
+
+    def do_GET(self) -> None:
+        self.__handle('GET')
+
+    def do_POST(self) -> None:
+        self.__handle('POST')
+
+
+class PlanningServer(ThreadingHTTPServer):
+    "Answers every request in a thread of its own, all threads share the service (and its loaded climate)."
+
+    daemon_threads = True
+
+    def __init__(self, service: PlanningService, host: str = '127.0.0.1', port: int = 8080):
+        super().__init__((host, port), PlanningRequestHandler)
+        self.service: PlanningService = service
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local planning service that keeps the climate data and neighbour graph in memory')
+    parser.add_argument('--dataset', choices=PlanningService.DATASETS, default='accf')
+    parser.add_argument('--size', choices=['small', 'medium', 'big'], default='small', help='Size of the quantum data set')
+    parser.add_argument('--directory', default=None, help='Saved CompiledProblem to load instead of the data set')
+    parser.add_argument('--time-resolution', type=float, default=1800, help='Seconds per time bucket of the router')
+    parser.add_argument('--max-concurrent-plans', type=int, default=None, help='Requests planned at the same time, defaults to the number of cores')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    arguments = parser.parse_args()
+
+    planning_service = PlanningService(arguments.dataset, arguments.size, arguments.directory, arguments.time_resolution, arguments.max_concurrent_plans)
+    print(f'Loaded {planning_service.state.describe()}')
+    server = PlanningServer(planning_service, arguments.host, arguments.port)
+    print(f'Listening on http://{arguments.host}:{arguments.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
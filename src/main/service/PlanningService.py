@@ -0,0 +1,235 @@
+import io
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.main.Paths import Paths
+from src.main.problem.CompiledProblem import CompiledProblem
+from src.main.problem.TimeDependentRouter import TimeDependentRouter
+from src.main.service.LatencyStatistics import LatencyStatistics
+from src.main.service.PlanningState import PlanningState
+
+
+class PlanningService:
+    """Plans flights on climate data that is loaded once and kept in memory, instead of parsing the csv files and building
+    the neighbour graph for every query. Requests are either route queries (start and destination in degree, flight level
+    and start time) or flight batches in the csv format of the flights files, planned with one of the backends:
+    - shortest-path: time dependent shortest path (TimeDependentRouter) per flight
+    - local-cqm: CQM of all flights sampled by LocalCQMSampler, the lowest energy samples are repaired into paths
+    - cpsat: OR-Tools model of all flights on the grid cells from the origin of the grid up to the starts and destinations
+
+    Requests may come from many threads: each plans with the state that was current when it started, at most
+    max_concurrent_plans plan at the same time (the others wait, reported as queue_s). swap_climate loads new climate data
+    next to the current state and replaces it when it is ready, a grid with the same voxels keeps the neighbour graphs."""
+
+    BACKENDS = ['shortest-path', 'local-cqm', 'cpsat']
+    DATASETS = ['quantum', 'material', 'accf']
+    SIZES = ['small', 'medium', 'big']  # Of the quantum data set
+    FLIGHT_COLUMNS = ['start_time', 'start_flightlevel', 'start_longitudinal', 'start_latitudinal', 'end_longitudinal', 'end_latitudinal']
+
+    def __init__(self, dataset: str = 'accf', size: str = 'small', directory: Optional[str] = None, time_resolution_s: float = 1800,
+                 max_concurrent_plans: Optional[int] = None, max_cpsat_variables: int = 2 * 10 ** 5, max_cqm_variables: int = 2 * 10 ** 4):
+        self.time_resolution_s: float = time_resolution_s  # Of the router, see TimeDependentRouter
+        self.max_cpsat_variables: int = max_cpsat_variables  # Larger CP-SAT models are rejected instead of built (ortools_4_10_10_5 has 180000)
+        self.max_cqm_variables: int = max_cqm_variables  # Larger CQMs are rejected instead of built (one flight on the aCCF grid has 56252, built in ~30 s)
+        self.statistics: LatencyStatistics = LatencyStatistics()
+        self.__plans: threading.BoundedSemaphore = threading.BoundedSemaphore(max_concurrent_plans or os.cpu_count() or 1)
+        self.__state_lock: threading.Lock = threading.Lock()  # Guards the reference to the current state
+        self.__swap_lock: threading.Lock = threading.Lock()  # One climate swap at a time
+        self.__state: Optional[PlanningState] = None
+        self.swap_climate(dataset, size, directory)
+
+    @property
+    def state(self) -> PlanningState:
+        with self.__state_lock:
+            return self.__state
+
+    @classmethod
+    def load_problem(cls, dataset: str, size: str = 'small', directory: Optional[str] = None) -> CompiledProblem:
+        "Loads a problem saved with CompiledProblem.save from directory, or compiles one of the data sets."
+        if directory is not None:
+            return CompiledProblem.load(directory)
+        if dataset == 'quantum':
+            if size not in cls.SIZES:
+                raise ValueError(f'Unknown size {size}, use one of {cls.SIZES}')
+            return CompiledProblem.from_quantum_resources(Paths.DATA, size)
+        if dataset == 'material':
+            return CompiledProblem.load_or_compile(Paths.material('compiled'), CompiledProblem.from_material)
+        if dataset == 'accf':
+            return CompiledProblem.from_accf()
+        raise ValueError(f'Unknown dataset {dataset}, use one of {cls.DATASETS}')
+
+    def swap_climate(self, dataset: str = 'accf', size: str = 'small', directory: Optional[str] = None) -> Dict:
+        "Loads new climate data and makes it the state of all following requests, running requests finish on the old one."
+        with self.__swap_lock:
+            start = time.perf_counter()
+            problem = self.load_problem(dataset, size, directory)
+            current = self.state
+            cqm_problem = None
+            if current is not None and problem.neighbour_indptr is None and current.problem.same_voxels(problem):
+                problem.share_neighbour_graph(current.router.problem)
+                if current.cqm_graph is not None:
+                    cqm_problem = problem.derive(neighbour_graph=False)
+                    cqm_problem.share_neighbour_graph(current.cqm_graph)
+            router = TimeDependentRouter(problem, time_resolution_s=self.time_resolution_s)  # Builds the neighbour graph if it is not shared
+            state = PlanningState(current.version + 1 if current else 1, router.problem, router, {'dataset': dataset, 'size': size, 'directory': directory},
+                                  time.perf_counter() - start, cqm_problem)
+            with self.__state_lock:
+                self.__state = state
+        return state.describe()
+
+    def status(self) -> Dict:
+        return {'climate': self.state.describe(), 'backends': self.BACKENDS, 'latency': self.statistics.summary()}
+
+    @staticmethod
+    def __start_time(value, state: PlanningState) -> pd.Timestamp:
+        "Start time given in seconds since epoch or as a date string, the first snapshot of the climate if None."
+        if value is None:
+            return pd.Timestamp(CompiledProblem.to_datetime(state.problem.times[0]))
+        if isinstance(value, (int, float)):
+            return pd.Timestamp(CompiledProblem.to_datetime(value))
+        return pd.Timestamp(value)
+
+    def flights_from_queries(self, queries: List[Dict], state: PlanningState) -> DataFrame:
+        "Flights of route queries: start and destination as [longitude, latitude] in degree, flight_level, time and optionally flight_number."
+        rows = []
+        for i, query in enumerate(queries):
+            (start_longitude, start_latitude), (end_longitude, end_latitude) = query['start'], query['destination']
+            rows.append({
+                'flight_number': int(query.get('flight_number', i)),
+                'start_time': self.__start_time(query.get('time'), state),
+                'start_flightlevel': int(query['flight_level']),
+                'start_longitudinal': float(start_longitude),
+                'start_latitudinal': float(start_latitude),
+                'end_longitudinal': float(end_longitude),
+                'end_latitudinal': float(end_latitude)
+            })
+        return DataFrame(rows, columns=['flight_number'] + self.FLIGHT_COLUMNS)
+
+    def flights_from_csv(self, text: str, state: PlanningState) -> DataFrame:
+        """Flights of a csv in the format of the flights files (comma or semicolon separated, coordinates in degree).
+        Start times without a date (like in material/flights.csv) are on the day of the first climate snapshot."""
+        flights = pd.read_csv(io.StringIO(text), sep=None, engine='python')
+        missing = [column for column in self.FLIGHT_COLUMNS if column not in flights]
+        if missing:
+            raise ValueError(f'Missing columns {missing}')
+        if 'flight_number' not in flights:
+            flights['flight_number'] = np.arange(len(flights))
+        start_times = flights['start_time'].astype(str)
+        day = CompiledProblem.to_datetime(state.problem.times[0]).strftime('%Y-%m-%d')
+        flights['start_time'] = pd.to_datetime(start_times.where(start_times.str.contains('-'), day + ' ' + start_times))
+        return flights
+
+    def route(self, queries: List[Dict], backend: str = 'shortest-path', options: Optional[Dict] = None) -> Dict:
+        state = self.state
+        return self.plan(state, self.flights_from_queries(queries, state), backend, options)
+
+    def plan_csv(self, text: str, backend: str = 'shortest-path', options: Optional[Dict] = None) -> Dict:
+        state = self.state
+        return self.plan(state, self.flights_from_csv(text, state), backend, options)
+
+    def plan(self, state: PlanningState, flights: DataFrame, backend: str, options: Optional[Dict] = None) -> Dict:
+        "Plans the flights with a backend. Returns one result per flight, the climate version and the time waited and planned."
+        if backend not in self.BACKENDS:
+            raise ValueError(f'Unknown backend {backend}, use one of {self.BACKENDS}')
+        options = options or {}
+        start = time.perf_counter()
+        with self.__plans:
+            queue_s = time.perf_counter() - start
+            if backend == 'shortest-path':
+                results = self.__plan_shortest_path(state, flights)
+            elif backend == 'local-cqm':
+                results = self.__plan_local_cqm(state, flights, options)
+            else:
+                results = self.__plan_cpsat(state, flights, options)
+        return {'backend': backend, 'climate_version': state.version, 'flights': results, 'queue_s': queue_s,
+                'plan_s': time.perf_counter() - start - queue_s}
+
+    @staticmethod
+    def __check_model_size(backend: str, variables: int, max_variables: int) -> None:
+        "Rejects a model that is too large to be built and solved within a request."
+        if variables > max_variables:
+            raise ValueError(f'The {backend} model would have {variables} variables (at most {max_variables}), use a smaller grid, fewer flights or fewer steps')
+
+    @staticmethod
+    def __coordinates(problem: CompiledProblem, cells: np.ndarray) -> List[List[float]]:
+        "[longitude, latitude, flight level] of grid cells (rows of longitude, latitude and flight level index)."
+        cells = np.asarray(cells).reshape(-1, 3)
+        return np.stack([problem.longitudes[cells[:, 0]], problem.latitudes[cells[:, 1]], problem.flight_levels[cells[:, 2]]], axis=1).tolist()
+
+    def __plan_shortest_path(self, state: PlanningState, flights: DataFrame) -> List[Dict]:
+        problem = state.problem.derive(flights)
+        results = []
+        for row, flight_number in enumerate(problem.flight_numbers.tolist()):
+            route = state.router.route(int(problem.flight_start_voxels[row]), int(problem.flight_destination_voxels[row]), float(problem.flight_start_times[row]))
+            results.append({
+                'flight_number': flight_number,
+                'found': route is not None,
+                'cost': route.cost if route else None,
+                'path': self.__coordinates(problem, problem.voxel_cells[route.voxels]) if route else [],
+                'times': [CompiledProblem.to_datetime(seconds).isoformat() for seconds in route.times] if route else []
+            })
+        return results
+
+    def __plan_local_cqm(self, state: PlanningState, flights: DataFrame, options: Dict) -> List[Dict]:
+        from src.main.quantum.LocalCQMSampler import LocalCQMSampler
+        from src.main.quantum.ProblemDefinition import ProblemDefinition
+        from src.main.quantum.ProblemSolver import ProblemSolver
+
+        problem = state.cqm_problem(ProblemDefinition.MAX_VOXEL_HORIZONTAL_DISTANCE_IN_METER, ProblemDefinition.MAX_VOXEL_VERTICAL_DISTANCE_IN_METER).derive(flights)
+        self.__check_model_size('CQM', len(flights) * len(problem.neighbour_indices), self.max_cqm_variables)  # One binary per flight and edge
+        problem_definition = ProblemDefinition(problem.name, compiled_problem=problem)
+        sampler = LocalCQMSampler(latency_s=(0.0, 0.0), num_reads=int(options.get('num_reads', 20)), seed=options.get('seed'))
+        repaired_sample = ProblemSolver(sampler).solve(problem_definition).repair_lowest_energy_samples(problem_definition, int(options.get('top_k', 10)))
+        return [{
+            'flight_number': flight_number,
+            'found': repaired_sample is not None,
+            'cost': repaired_sample.flight_costs[flight_number] if repaired_sample else None,
+            'path': self.__coordinates(problem, problem.voxel_cells[repaired_sample.flight_paths[flight_number]]) if repaired_sample else []
+        } for flight_number in problem.flight_numbers.tolist()]
+
+    def __plan_cpsat(self, state: PlanningState, flights: DataFrame, options: Dict) -> List[Dict]:
+        from ortools.sat.python import cp_model
+        from src.main.cpsat.CPSolver import CPSolver
+
+        problem = state.problem.derive(flights)
+        starts = problem.voxel_cells[problem.flight_start_voxels]
+        destinations = problem.voxel_cells[problem.flight_destination_voxels]
+        size = (np.maximum(starts.max(axis=0), destinations.max(axis=0)) + 1).tolist()  # CPSolver grids start at the origin of the problem grid
+        steps = int(options.get('steps', 20))
+        time_index = int(np.abs(problem.times - problem.flight_start_times.min()).argmin())  # Snapshot closest to the first start
+        self.__check_model_size('CP-SAT', steps * len(flights) * int(np.prod(size)) * 3, self.max_cpsat_variables)
+        if np.isnan(problem.costs[:size[0], :size[1], :size[2], time_index]).any():
+            raise ValueError('The CP-SAT grid contains cells without climate cost')
+
+        CP = CPSolver(len(flights), size, steps, starts.tolist(), destinations.tolist())
+        CP.addConstraints()
+        if options.get('relative_error') is None:
+            CP.model.Minimize(CP.problemCostFunction(problem, time_index) - CP.REWARD_WEIGHT * CP.reward())
+        else:
+            from src.main.problem.CostQuantizer import CostQuantizer
+            quantizer = CostQuantizer(float(options['relative_error']))
+            CP.model.Minimize(CP.quantizedCostFunction(problem, quantizer, time_index) - CP.quantizedReward(quantizer))
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = int(options.get('workers', 1))
+        solver.parameters.max_time_in_seconds = float(options.get('time_limit_s', 60))
+        status = solver.Solve(CP.model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return [{'flight_number': flight_number, 'found': False, 'cost': None, 'path': [], 'status': solver.StatusName(status)}
+                    for flight_number in problem.flight_numbers.tolist()]
+
+        positions, maneuvers, _ = CP.extractTrajectories(solver.ResponseProto())
+        float_costs = CP.trajectoryFloatCosts(problem, positions, maneuvers, time_index)
+        at_destination = (positions == destinations[:, None, :]).all(axis=2)
+        return [{
+            'flight_number': flight_number,
+            'found': bool(at_destination[airplane, -1]),
+            'cost': float(float_costs[airplane].sum()),
+            'path': self.__coordinates(problem, positions[airplane][:int(np.argmax(at_destination[airplane])) + 1] if at_destination[airplane, -1] else positions[airplane]),
+            'status': solver.StatusName(status)
+        } for airplane, flight_number in enumerate(problem.flight_numbers.tolist())]
@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from src.main.problem.CompiledProblem import CompiledProblem
+from src.main.problem.TimeDependentRouter import TimeDependentRouter
+
+
+class PlanningState:
+    """Climate data loaded by the planning service: the compiled problem with its neighbour graph and fuel table and the
+    router over it. A state is never changed once it is in use, a new climate replaces the whole state, so a request
+    plans with the state it started with even if the climate is swapped in the meantime.
+    The CQM uses a neighbour graph with other limits (see ProblemDefinition), it is built on the first local-cqm request."""
+
+    def __init__(self, version: int, problem: CompiledProblem, router: TimeDependentRouter, source: Dict, load_s: float,
+                 cqm_problem: Optional[CompiledProblem] = None):
+        self.version: int = version  # Increased by every climate swap
+        self.problem: CompiledProblem = problem
+        self.router: TimeDependentRouter = router
+        self.source: Dict = source  # Arguments the problem has been loaded with
+        self.load_s: float = load_s  # Time to load the problem and build the graph and the router
+        self.loaded_at: float = time.time()
+        self.cqm_graph: Optional[CompiledProblem] = cqm_problem  # Problem with the CQM neighbour graph, sharing every other array with problem
+        self.__cqm_lock: threading.Lock = threading.Lock()
+
+    def cqm_problem(self, max_horizontal_distance_m: float, max_vertical_distance_m: float) -> CompiledProblem:
+        "Problem with the neighbour graph of the CQM, sharing every other array with problem."
+        with self.__cqm_lock:
+            if self.cqm_graph is None:
+                self.cqm_graph = self.problem.with_neighbour_graph(max_horizontal_distance_m, max_vertical_distance_m)
+            return self.cqm_graph
+
+    def describe(self) -> Dict:
+        return {
+            'version': self.version,
+            'name': self.problem.name,
+            'source': self.source,
+            'voxels': self.problem.number_of_voxels(),
+            'edges': len(self.problem.neighbour_indices),
+            'snapshots': [CompiledProblem.to_datetime(seconds).isoformat() for seconds in self.problem.times],
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'load_s': self.load_s
+        }
@@ -1,4 +1,5 @@
 import csv
+import os
 from datetime import datetime
 from typing import List
 
@@ -6,22 +7,26 @@ import imageio as imageio
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import colors, markers
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
+from src.main.Paths import Paths
 from src.main.visualization.Coordinate import Coordinate
 from src.main.visualization.Flight import Flight
 
 
 class Visualization:
-    __PATH_TO_FLIGHTS_CSV = "../../resources/data/flights_big.csv"
-    __PATH_TO_VISUALIZATION_DATA = '../../resources/visualization'
+    __PATH_TO_FLIGHTS_CSV = os.path.join(Paths.DATA, "flights_big.csv")
+    __PATH_TO_VISUALIZATION_DATA = Paths.VISUALIZATION
 
     def __init__(self):
         self.flights: List[Flight] = self.read_in_flights()  # Read all flights
 
-    def plot_flights(self):
-        images = []
-
-        fig = plt.figure(dpi=600)
+    def plot_flights(self, dpi: int = 600, fps: float = 1):
+        """Writes a GIF with one frame per flight (sorted by start time), each frame adds the flight to the previous ones.
+        The lines of all flights are one artist whose segments are replaced per frame, the markers are two scatters that
+        are replaced per frame, and every frame is appended to the GIF writer as soon as it is drawn, so the memory does
+        not grow with the number of flights."""
+        fig = plt.figure(dpi=dpi)
         ax = fig.add_subplot(projection='3d')
 
         # Define min and max for longitudinal axis
@@ -55,54 +60,37 @@ class Visualization:
         start_times.sort()
 
         available_colors = [i for i in colors.cnames.keys()]
-
-        flight: Flight
-        for flight in self.flights:
-            longitudinal_points = [flight.start_coordinate.longitudinal, flight.end_coordinate.longitudinal]
-            latitudinal_points = [flight.start_coordinate.latitudinal, flight.end_coordinate.latitudinal]
-            flight_levels = [flight.start_coordinate.flight_level, flight.start_coordinate.flight_level]
-
-            # Add start_voxel to image
-            ax.scatter(
-                flight.start_coordinate.longitudinal,
-                flight.start_coordinate.latitudinal,
-                flight.start_coordinate.flight_level,
-                alpha=0.9,
-                c=available_colors[flight.flight_number],
-                marker=markers.CARETUPBASE
-            )
-
-            # Add destination_voxel to image
-            ax.scatter(
-                flight.end_coordinate.longitudinal,
-                flight.end_coordinate.latitudinal,
-                flight.start_coordinate.flight_level,
-                alpha=0.1,
-                c=available_colors[flight.flight_number],
-                marker=markers.CARETDOWNBASE
-            )
-
-            #  Add line between start_voxel and destination_voxel to image
-            ax.plot(
-                longitudinal_points,
-                latitudinal_points,
-                flight_levels,
-                alpha=0.5,
-                c=available_colors[start_times.index(flight.start_time)]
-            )
-
-            # Update title to corresponding flight
-            plt.title("Start time: {0}".format(flight.start_time))
-
-            fig.canvas.draw()
-            image = np.frombuffer(fig.canvas.tostring_rgb(), dtype='uint8')
-            image = image.reshape(fig.canvas.get_width_height()[::-1] + (3,))
-
-            images.append(image)
-
-        # kwargs_write = {'fps': 1.0, 'quantizer': 'nq'}
-        imageio.mimsave(self.__PATH_TO_VISUALIZATION_DATA + '/flights.gif', images, fps=1)
-
+        flight_colors = [colors.to_rgba(available_colors[flight.flight_number]) for flight in self.flights]
+        line_colors = [colors.to_rgba(available_colors[start_times.index(flight.start_time)], alpha=0.5) for flight in self.flights]
+
+        starts = np.array([[flight.start_coordinate.longitudinal, flight.start_coordinate.latitudinal, flight.start_coordinate.flight_level] for flight in self.flights], dtype=float)
+        ends = np.array([[flight.end_coordinate.longitudinal, flight.end_coordinate.latitudinal, flight.start_coordinate.flight_level] for flight in self.flights], dtype=float)
+
+        # The lines of all flights shown so far are one artist, the markers of the start and destination voxels are
+        # replaced by a new scatter per frame (the points of a 3D scatter can only be set through private attributes)
+        start_markers, destination_markers = None, None
+        lines = Line3DCollection(np.stack([starts[:1], ends[:1]], axis=1))
+        ax.add_collection3d(lines)
+        title = ax.set_title('')
+
+        os.makedirs(self.__PATH_TO_VISUALIZATION_DATA, exist_ok=True)
+        with imageio.get_writer(self.__PATH_TO_VISUALIZATION_DATA + '/flights.gif', mode='I', fps=fps) as writer:
+            for shown, flight in enumerate(self.flights, start=1):
+                if start_markers is not None:
+                    start_markers.remove()
+                    destination_markers.remove()
+                start_markers = ax.scatter(*starts[:shown].T, color=flight_colors[:shown], alpha=0.9, marker=markers.CARETUPBASE)
+                destination_markers = ax.scatter(*ends[:shown].T, color=flight_colors[:shown], alpha=0.1, marker=markers.CARETDOWNBASE)
+                lines.set_segments(np.stack([starts[:shown], ends[:shown]], axis=1))
+                lines.set_color(line_colors[:shown])
+
+                # Update title to corresponding flight
+                title.set_text("Start time: {0}".format(flight.start_time))
+
+                fig.canvas.draw()
+                writer.append_data(np.asarray(fig.canvas.buffer_rgba())[:, :, :3])  # Encoded right away, only one frame is held
+
+        plt.close(fig)
 
     def read_in_flights(self) -> List[Flight]:
         flights = []
@@ -0,0 +1,41 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from src.main.classic.ClimateField import ClimateField, to_seconds
+
+
+class ClimateFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        # A single snapshot and a single flight level, as the material climate csv of one time has them
+        self.time = datetime(2018, 6, 23, 12)
+        self.costs = np.arange(12, dtype=np.float64).reshape((4, 3, 1, 1))
+        self.climate_field = ClimateField([0, 1e5, 2e5, 3e5], [0, 1e5, 2e5], [300], [to_seconds(self.time)], self.costs)
+
+    def test_nearest_index_on_a_single_value_axis(self):
+        axis = np.array([300])
+        self.assertEqual(ClimateField.nearest_index(axis, [300], 100), 0)
+        self.assertEqual(ClimateField.nearest_index(axis, [300], 300.0), 0)
+        indices = ClimateField.nearest_index(axis, [300], np.array([[100, 300], [400, 500]]))
+        self.assertEqual(indices.shape, (2, 2))
+        self.assertTrue((indices == 0).all())
+
+    def test_lookup_with_a_single_snapshot_and_flight_level(self):
+        self.assertEqual(self.climate_field.lookup(1.4e5, 2.2e5, 340, self.time), self.costs[1, 2, 0, 0])
+        x, y = np.array([0, 2.6e5, 5e5]), np.array([-1e5, 0.9e5, 1.6e5])
+        costs = self.climate_field.lookup(x, y, np.full(3, 280), np.full(3, to_seconds(self.time) + 3600))
+        self.assertEqual(costs.tolist(), [self.costs[0, 0, 0, 0], self.costs[3, 1, 0, 0], self.costs[3, 2, 0, 0]])
+
+    def test_nearest_index_chooses_the_lower_value_on_a_tie(self):
+        axis = np.array([0.0, 10.0, 20.0])
+        for target in [-5, 0, 4, 5, 6, 15, 25]:
+            with self.subTest(target=target):
+                expected = min(range(len(axis)), key=lambda i: abs(axis[i] - target))
+                self.assertEqual(ClimateField.nearest_index(axis, axis.tolist(), target), expected)
+                self.assertEqual(ClimateField.nearest_index(axis, axis.tolist(), np.array([target]))[0], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from src.main.classic.ClassicPlanner import ClassicPlanner, load_flights
+from src.main.classic.ClimateField import ClimateField
+from src.main.classic.FlightSweep import FlightSweep
+from src.main.classic.FuelTable import FuelTable
+from src.main.classic.PlannerProfile import PlannerProfile
+from src.main.Paths import Paths
+
+
+class FlightSweepTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.climate_field = ClimateField.from_csv(Paths.material('aCCF_0623_p_spec.csv'))
+        cls.fuel_table = FuelTable.from_csv(Paths.material('bada_data.csv'))
+        cls.flights = load_flights(Paths.material('flights.csv'))[:2]
+
+    def test_sweep_with_the_options_of_a_planner(self):
+        planner = ClassicPlanner(self.climate_field, self.fuel_table, look_ahead_steps=10, profile=PlannerProfile())
+        sweep = FlightSweep(self.climate_field, self.fuel_table, look_ahead_steps=10, max_workers=1,
+                            planner_options=planner.options(), profile_sample_every=4)
+        results = sweep.run(self.flights, [0.01])
+
+        self.assertEqual([result[0] for result in results], list(self.flights.index))
+        for flight_number, goal_greedy, cost, _ in results:
+            self.assertEqual(cost, planner.calculate_flight(flight_number, self.flights.loc[flight_number], goal_greedy)[2])
+        self.assertEqual(len(sweep.task_profiles), len(self.flights))
+
+
+if __name__ == '__main__':
+    unittest.main()
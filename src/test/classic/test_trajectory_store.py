@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from src.main.classic.TrajectoryStore import TrajectoryStore
+
+
+def history(steps: int, offset: float = 0.0):
+    "Path in the format of ClassicPlanner.get_path."
+    start_time = datetime(2018, 6, 23, 6)
+    path = [{'coordinates': [offset, 0.0, 300.0], 'time': start_time, 'cost': 0, 'alpha': 0.5, 'path_cost': 0}]
+    for step in range(1, steps + 1):
+        path.append({'coordinates': [offset + step * 1e4, step * 5e3, 300.0 + step], 'time': start_time + timedelta(seconds=120 * step),
+                     'cost': 0.1 * step, 'alpha': 0.5 + 0.01 * step, 'direction': ['straight', 'left', 'up'][step % 3],
+                     'path_cost': path[-1]['path_cost'] + 0.1 * step})
+    return path
+
+
+class TrajectoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = self.directory.name
+
+    def test_paths_are_read_back(self):
+        store = TrajectoryStore(self.path)
+        store.append(0, 0.01, 1.5, history(3))
+        store.append(1, 0.001, 2.5, history(5, offset=1e5))
+
+        store = TrajectoryStore(self.path)
+        self.assertEqual(store.finished_tasks(), {(0, 0.01), (1, 0.001)})
+        self.assertEqual(store.load_history(0, 0.01), history(3))
+        self.assertEqual(store.load_history(1, 0.001), history(5, offset=1e5))
+        self.assertIsNone(store.load_history(0, 0.001))
+        self.assertEqual(store.results_data_frame().loc[1, 0.001], 2.5)
+
+    def test_resume_after_an_interrupted_write(self):
+        store = TrajectoryStore(self.path)
+        store.append(0, 0.01, 1.5, history(3))
+        store.append(1, 0.01, 2.5, history(4))
+        # The rows of a third task were written, but its index line was interrupted
+        with open(os.path.join(self.path, 'x'), 'ab') as column:
+            column.write(b'\0' * 8 * 2)
+        with open(os.path.join(self.path, TrajectoryStore.INDEX_FILE), 'a') as index_file:
+            index_file.write('2,0.01,3.')
+
+        store = TrajectoryStore(self.path)
+        self.assertEqual(store.finished_tasks(), {(0, 0.01), (1, 0.01)})
+        self.assertEqual(store.rows, 4 + 5)
+        self.assertEqual(os.path.getsize(os.path.join(self.path, 'x')), 8 * store.rows)
+
+        store.append(2, 0.01, 3.5, history(2, offset=2e5))
+        store = TrajectoryStore(self.path)
+        self.assertEqual(store.finished_tasks(), {(0, 0.01), (1, 0.01), (2, 0.01)})
+        self.assertEqual(store.load_history(1, 0.01), history(4))
+        self.assertEqual(store.load_history(2, 0.01), history(2, offset=2e5))
+
+    def test_empty_index_is_rewritten(self):
+        open(os.path.join(self.path, TrajectoryStore.INDEX_FILE), 'w').close()
+
+        store = TrajectoryStore(self.path)
+        store.append(0, 0.01, 1.5, history(1))
+        self.assertEqual(TrajectoryStore(self.path).load_history(0, 0.01), history(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.main.Paths import Paths
+from src.main.quantum.ProblemDefinition import ProblemDefinition
+from src.main.quantum.model.Voxel import Voxel
+
+
+def baseline_neighbour_costs(problem_definition: ProblemDefinition, climate: pd.DataFrame):
+    """Edge costs as the ProblemDefinition computed them before the compiled problem: every pair of voxels of the same
+    time within the distance limits, half the distance flown in each voxel at its speed and fuel consumption."""
+    def distance(a: Voxel, b: Voxel, vertical: bool = True) -> float:
+        return np.sqrt((a.longitude_meter - b.longitude_meter) ** 2 + (a.latitude_meter - b.latitude_meter) ** 2
+                       + ((a.flight_level_meter - b.flight_level_meter) ** 2 if vertical else 0))
+
+    def cost_per_voxel(half_distance: float, direction: str, voxel: Voxel, cost: float) -> float:
+        details = problem_definition.airplane_details[voxel.flight_level]
+        fuel_kg_s = {'DESCENT': details.fuel_consumption.descent_fuel_consumption_kg_s,
+                     'CLIMB': details.fuel_consumption.climb_fuel_consumption_kg_s}.get(direction, details.fuel_consumption.cruise_fuel_consumption_kg_s)
+        return cost * fuel_kg_s * half_distance / details.airplane_speed.airplane_speed_m_s
+
+    time_voxels = [(Voxel(int(row.INDEX), int(row.LONGITUDE), int(row.LATITUDE), int(row.FL)), row.TIME, float(row.MERGED)) for row in climate.itertuples()]
+    costs = {}
+    for start, start_time, start_cost in time_voxels:
+        costs[start.index] = {}
+        for end, end_time, end_cost in time_voxels:
+            if start == end or start_time != end_time:
+                continue
+            if distance(start, end, vertical=False) > ProblemDefinition.MAX_VOXEL_HORIZONTAL_DISTANCE_IN_METER:
+                continue
+            if abs(start.flight_level_meter - end.flight_level_meter) > ProblemDefinition.MAX_VOXEL_VERTICAL_DISTANCE_IN_METER:
+                continue
+            direction = 'DESCENT' if start.flight_level_meter > end.flight_level_meter else 'CLIMB' if start.flight_level_meter < end.flight_level_meter else 'CRUISE'
+            half_distance = distance(start, end) / 2
+            costs[start.index][end.index] = cost_per_voxel(half_distance, direction, start, start_cost) + cost_per_voxel(half_distance, direction, end, end_cost)
+    return costs
+
+
+class CompiledProblemTest(unittest.TestCase):
+
+    def test_costs_equal_the_baseline_problem_definition(self):
+        for size in ['small', 'medium']:
+            with self.subTest(size=size):
+                problem_definition = ProblemDefinition(size)
+                climate = pd.read_csv(os.path.join(Paths.DATA, f'climate_cost_{size}.csv'))
+                expected = baseline_neighbour_costs(problem_definition, climate)
+
+                actual = problem_definition.find_cost_for_neighbouring_voxels()
+                self.assertEqual(actual.keys(), expected.keys())
+                for voxel_index, cost_by_neighbour in expected.items():
+                    self.assertEqual(actual[voxel_index].keys(), cost_by_neighbour.keys())
+                    for neighbour_index, cost in cost_by_neighbour.items():
+                        self.assertAlmostEqual(actual[voxel_index][neighbour_index], cost, delta=1e-9 * max(abs(cost), 1))
+
+    def test_flights_are_snapped_to_the_closest_voxel(self):
+        for size in ['small', 'medium']:
+            with self.subTest(size=size):
+                problem_definition = ProblemDefinition(size)
+                voxels = problem_definition.voxels
+                flights = pd.read_csv(os.path.join(Paths.DATA, f'flights_{size}.csv'))
+
+                def closest(longitude, latitude, flight_level) -> int:
+                    voxel = Voxel(None, longitude, latitude, flight_level)
+                    return voxels[int(np.argmin([np.sqrt((voxel.longitude_meter - other.longitude_meter) ** 2 + (voxel.latitude_meter - other.latitude_meter) ** 2
+                                                         + (voxel.flight_level_meter - other.flight_level_meter) ** 2) for other in voxels]))].index
+
+                for flight in flights.itertuples():
+                    flight_details = problem_definition.flight_details_by_flight_number[int(flight.flight_number)]
+                    self.assertEqual(flight_details.start_voxel.voxel.index, closest(flight.start_longitudinal, flight.start_latitudinal, flight.start_flightlevel))
+                    self.assertEqual(flight_details.destination_voxel.voxel.index, closest(flight.end_longitudinal, flight.end_latitudinal, flight.start_flightlevel))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.main.problem.CostQuantizer import CostQuantizer
+
+
+class CostQuantizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.random = np.random.default_rng(0)
+
+    def test_costs_are_within_the_relative_error(self):
+        costs = self.random.lognormal(0, 2, 1000)
+        for relative_error in [0.05, 0.01, 0.001]:
+            with self.subTest(relative_error=relative_error):
+                quantizer = CostQuantizer(relative_error)
+                weights = quantizer.fit_quantize(costs)
+
+                self.assertEqual(weights.dtype, np.int64)
+                self.assertTrue((np.abs(quantizer.dequantize(weights) - costs) <= relative_error * costs * (1 + 1e-12)).all())
+                self.assertLessEqual(quantizer.max_relative_error(costs), relative_error * (1 + 1e-12))
+                self.assertEqual(quantizer.max_weight, int(np.abs(weights).max()))
+
+    def test_costs_below_the_minimum_are_within_the_absolute_error(self):
+        costs = np.array([-3.0, -0.001, 0.0, 0.0004, 0.2, 5.0])
+        quantizer = CostQuantizer(0.01, min_cost=0.1)
+        weights = quantizer.fit_quantize(costs)
+
+        self.assertTrue((np.abs(quantizer.dequantize(weights) - costs) <= 0.5 / quantizer.scale).all())
+        large = np.abs(costs) >= 0.1
+        self.assertTrue((np.abs(quantizer.dequantize(weights[large]) - costs[large]) <= 0.01 * np.abs(costs[large]) * (1 + 1e-12)).all())
+        self.assertEqual(weights[2], 0)
+        self.assertFalse(quantizer.non_negative)
+        self.assertIsNone(quantizer.report()['relative_gap'])
+
+    def test_quantized_optimum_is_within_the_gap(self):
+        # Solutions are subsets of 3 to 8 costs, the optimum of the quantized costs is compared with the real optimum
+        costs = self.random.lognormal(0, 1, 50)
+        solutions = [self.random.choice(len(costs), self.random.integers(3, 9), replace=False) for _ in range(2000)]
+        real_optimum = min(costs[solution].sum() for solution in solutions)
+        for relative_error in [0.1, 0.05, 0.01]:
+            with self.subTest(relative_error=relative_error):
+                quantizer = CostQuantizer(relative_error)
+                weights = quantizer.fit_quantize(costs)
+                quantized_optimum = min(solutions, key=lambda solution: weights[solution].sum())
+
+                self.assertLessEqual(costs[quantized_optimum].sum(), real_optimum * (1 + quantizer.relative_gap))
+                self.assertLessEqual(costs[quantized_optimum].sum() - real_optimum, quantizer.absolute_gap(2 * 8))
+
+    def test_quantize_needs_fit(self):
+        with self.assertRaises(ValueError):
+            CostQuantizer(0.01).quantize([1.0])
+        with self.assertRaises(ValueError):
+            CostQuantizer(1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
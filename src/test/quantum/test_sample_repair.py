@@ -0,0 +1,71 @@
+import unittest
+
+from src.main.quantum.ProblemDefinition import ProblemDefinition
+from src.main.quantum.SampleRepair import SampleRepair
+
+
+class SampleRepairTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.problem_definition = ProblemDefinition('medium')
+        cls.sample_repair = SampleRepair(cls.problem_definition)
+        cls.voxels = cls.problem_definition.voxels
+
+    def sample(self, edges_by_flight_number):
+        "Sample of the CQM with the given edges (voxel ids) active and every other binary variable 0."
+        starts, ends = self.problem_definition.compiled_problem.edges()
+        sample = {}
+        for flight_number in self.problem_definition.flight_details_by_flight_number:
+            active = set(edges_by_flight_number.get(flight_number, []))
+            for edge in zip(starts.tolist(), ends.tolist()):
+                sample[f'flight_{flight_number}_between_voxels_{self.voxels[edge[0]].index}_{self.voxels[edge[1]].index}'] = int(edge in active)
+        return sample
+
+    def assertValidPath(self, flight_number, path):
+        start, destination = self.sample_repair.start_and_destination_by_flight_number[flight_number]
+        self.assertEqual(path[0], start)
+        self.assertEqual(path[-1], destination)
+        self.assertEqual(len(set(path)), len(path))
+        for edge in zip(path[:-1], path[1:]):
+            self.assertIn(edge, self.sample_repair.edge_by_voxels)
+
+    def test_empty_sample_is_repaired_into_paths(self):
+        repaired = self.sample_repair.repair(self.sample({}))
+
+        self.assertEqual(repaired.flight_paths.keys(), self.problem_definition.flight_details_by_flight_number.keys())
+        for flight_number, path in repaired.flight_paths.items():
+            self.assertValidPath(flight_number, path)
+            self.assertAlmostEqual(repaired.flight_costs[flight_number], self.sample_repair.path_cost(path))
+        self.assertEqual(repaired.spliced_edges, sum(len(path) - 1 for path in repaired.flight_paths.values()))
+        self.assertAlmostEqual(repaired.cost, sum(repaired.flight_costs.values()))
+
+    def test_broken_sample_keeps_its_prefix(self):
+        flight_number = next(iter(self.problem_definition.flight_details_by_flight_number))
+        start, destination = self.sample_repair.start_and_destination_by_flight_number[flight_number]
+        successors = [end for begin, end in self.sample_repair.edge_by_voxels if begin == start and end != destination]
+        predecessors = [begin for begin, end in self.sample_repair.edge_by_voxels if end == destination and begin not in (start, successors[-1])]
+        prefix, suffix = (start, successors[-1]), (predecessors[0], destination)
+        loop = (predecessors[-1], start)  # An active edge back to the start, as infeasible samples have them
+
+        repaired = self.sample_repair.repair(self.sample({flight_number: [prefix, suffix, loop]}))
+
+        path = repaired.flight_paths[flight_number]
+        self.assertValidPath(flight_number, path)
+        self.assertEqual(tuple(path[:2]), prefix)
+        self.assertNotIn(loop, set(zip(path[:-1], path[1:])))
+        spliced_edges = [len(set(zip(other[:-1], other[1:]))) for other_flight_number, other in repaired.flight_paths.items() if other_flight_number != flight_number]
+        self.assertEqual(repaired.spliced_edges, len(set(zip(path[:-1], path[1:])) - {prefix, suffix}) + sum(spliced_edges))  # The other flights have no active edges
+
+    def test_feasible_sample_is_kept(self):
+        paths = self.sample_repair.repair(self.sample({})).flight_paths
+        edges_by_flight_number = {flight_number: list(zip(path[:-1], path[1:])) for flight_number, path in paths.items()}
+
+        repaired = self.sample_repair.repair(self.sample(edges_by_flight_number))
+
+        self.assertEqual(repaired.flight_paths, paths)
+        self.assertEqual(repaired.spliced_edges, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()